@@ -0,0 +1,111 @@
+# bench_artifact.py
+# date: 2026-10-18
+
+# This script compares the load time of the fitted model saved as a pickle
+# with the memory-mappable model artifact. Cold loads run in a fresh
+# interpreter, as a scoring worker would at start-up, and include the
+# imports each loader needs; warm loads repeat the load in this process.
+
+# Usage
+'''
+python benchmarks/bench_artifact.py
+python benchmarks/bench_artifact.py --pipeline=results/models/shooter_pipeline.pickle --repeats=20
+'''
+
+# Imports
+import click
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+import numpy as np
+import pandas as pd
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+from src.model_artifact import save_artifact, load_predictor, load_pipeline
+
+# Statement timed in a fresh interpreter for each way of loading the model
+COLD_LOADS = {
+    "pickle pipeline": "import pickle\nwith open({path!r}, 'rb') as f:\n    pickle.load(f)",
+    "artifact predictor": "from src.model_artifact import load_predictor\nload_predictor({path!r})",
+    "artifact pipeline": "from src.model_artifact import load_pipeline\nload_pipeline({path!r})",
+}
+
+
+def fit_example_pipeline():
+    """Fit the classifier's pipeline on synthetic rosters."""
+    from sklearn.compose import make_column_transformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from src.clean_rosters import clean_rosters
+    from src.synthetic_rosters import synthetic_rosters
+
+    rosters = clean_rosters(synthetic_rosters(10_000).drop_duplicates())
+    features = ["weight_in_kilograms", "height_in_centimeters"]
+    preprocessor = make_column_transformer((StandardScaler(), features))
+    pipeline = make_pipeline(preprocessor, LogisticRegression(random_state=123, class_weight="balanced"))
+    return pipeline.fit(rosters[features], rosters["shoots_left"])
+
+
+def cold_load_seconds(statement):
+    """Wall time of a fresh interpreter that runs `statement`, minus the
+    time of one that runs nothing."""
+    def run(code):
+        started = timeit.default_timer()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        return timeit.default_timer() - started
+    return run(statement) - run("pass")
+
+
+@click.command()
+@click.option('--pipeline', type=str, default=None, help="Path to a fitted pipeline pickle; by default one is fitted on synthetic rosters")
+@click.option('--repeats', type=int, default=10, help="Number of cold and warm loads per format; the median is reported")
+def main(pipeline, repeats):
+    """Times cold and warm loads of the pickled pipeline and the artifact."""
+    if pipeline is None:
+        sklearn_pipeline = fit_example_pipeline()
+    else:
+        with open(pipeline, "rb") as f:
+            sklearn_pipeline = pickle.load(f)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {"pickle": os.path.join(directory, "shooter_pipeline.pickle"),
+                 "artifact": os.path.join(directory, "shooter_model.npmodel")}
+        with open(paths["pickle"], "wb") as f:
+            pickle.dump(sklearn_pipeline, f)
+        save_artifact(sklearn_pipeline, paths["artifact"])
+
+        # Every loader must give the pipeline's predictions before its speed is worth comparing
+        rng = np.random.default_rng(123)
+        X = pd.DataFrame({"weight_in_kilograms": rng.uniform(55, 125, 1000),
+                          "height_in_centimeters": rng.uniform(155, 210, 1000)})
+        expected = sklearn_pipeline.predict_proba(X)
+        np.testing.assert_allclose(load_predictor(paths["artifact"]).predict_proba(X), expected, rtol=1e-12)
+        np.testing.assert_allclose(load_pipeline(paths["artifact"]).predict_proba(X), expected, rtol=1e-12)
+
+        def load_pickle():
+            with open(paths["pickle"], "rb") as f:
+                return pickle.load(f)
+        warm_loads = {
+            "pickle pipeline": load_pickle,
+            "artifact predictor": lambda: load_predictor(paths["artifact"]),
+            "artifact pipeline": lambda: load_pipeline(paths["artifact"]),
+        }
+
+        rows = []
+        for name, statement in COLD_LOADS.items():
+            file = paths[name.split()[0]]
+            cold = statistics.median(cold_load_seconds(statement.format(path=file)) for _ in range(repeats))
+            warm = statistics.median(timeit.repeat(warm_loads[name], number=1, repeat=repeats))
+            rows.append([name, os.path.getsize(file), cold * 1000, warm * 1000])
+
+    results = pd.DataFrame(rows, columns=["loader", "file bytes", "cold load (ms)", "warm load (ms)"])
+    click.echo(results.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+# bench_library.py
+# date: 2026-10-18
+
+# This script times the src/ library functions of the preprocessing, EDA
+# and classification stages on synthetic roster data of growing size. For
+# every function and size it records the best wall time and the peak
+# memory allocated, fits the scaling exponent k of time ~ rows^k, and
+# compares the results with a stored baseline. It fails if a function got
+# slower or hungrier than the baseline allows, or scales worse than it did.
+
+# Usage
+'''
+python benchmarks/bench_library.py
+python benchmarks/bench_library.py --sizes=1e4,1e5,1e6 --case=write_csv --case=check_eda
+python benchmarks/bench_library.py --sizes=1e4,1e5,1e6 --save-baseline
+'''
+
+# Imports
+import click
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.synthetic_rosters import synthetic_rosters
+
+# Library functions measured, in the order they run in the pipeline
+CASES = ["drop_duplicates", "collapse_players", "clean_rosters", "validate", "hash_split",
+         "write_csv", "check_eda", "fit_and_evaluate_model"]
+
+# Times below this many seconds are too noisy to compare with the baseline:
+# a single run of a few tens of milliseconds varies by more than the tolerance
+MIN_COMPARED_SECONDS = 0.1
+
+
+def measure_call(func, repeats):
+    """Return the fastest of `repeats` timed calls of `func`, in seconds,
+    and the peak memory allocated by one more call traced by tracemalloc,
+    in MB."""
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak / 2**20
+
+
+def case_calls(n_rows, directory):
+    """Yield the name and a zero-argument call of each case on `n_rows`
+    synthetic rows. Inputs are prepared outside of the calls, and each one
+    is released once the cases reading it have run, so the largest sizes
+    hold as few copies of the data as possible. Each call binds its inputs
+    when it is created, so calling it later still uses them."""
+    from sklearn import set_config
+    from sklearn.compose import make_column_transformer
+    from sklearn.preprocessing import StandardScaler
+    from src.check_eda import check_eda
+    from src.clean_rosters import clean_rosters, roster_schema
+    from src.collapse_players import collapse_players
+    from src.fit_and_evaluate_model import fit_and_evaluate_model
+    from src.split_rosters import hash_split
+    from src.validate_rosters import RosterValidator
+    from src.write_csv import write_csv
+    set_config(transform_output="pandas")
+
+    rosters = synthetic_rosters(n_rows)
+    yield "drop_duplicates", lambda df=rosters: df.drop_duplicates()
+    rosters = rosters.drop_duplicates()
+    yield "collapse_players", lambda df=rosters: collapse_players(df)
+    yield "clean_rosters", lambda df=rosters: clean_rosters(df, keep=["player_id"])
+    rosters = clean_rosters(rosters, keep=["player_id"])
+    yield "validate", lambda df=rosters: RosterValidator(roster_schema).validate(df)
+    yield "hash_split", lambda df=rosters: hash_split(df["player_id"])
+
+    is_test = hash_split(rosters.pop("player_id"))
+    train_df, test_df = rosters[~is_test], rosters[is_test]
+    del rosters
+    yield "write_csv", lambda: write_csv(train_df, directory, "roster_train.csv")
+    yield "check_eda", lambda: check_eda(train_df, directory)
+
+    features = ["weight_in_kilograms", "height_in_centimeters"]
+    preprocessor = make_column_transformer((StandardScaler(), features))
+    yield "fit_and_evaluate_model", lambda: fit_and_evaluate_model(
+        train_df[features], train_df["shoots_left"], test_df[features], test_df["shoots_left"], preprocessor
+    )
+
+
+def scaling_exponent(sizes, values):
+    """Slope of the least-squares line through (log size, log value)."""
+    sizes, values = np.asarray(sizes, dtype=float), np.asarray(values, dtype=float)
+    if len(sizes) < 2:
+        return np.nan
+    return float(np.polyfit(np.log(sizes), np.log(np.maximum(values, 1e-9)), 1)[0])
+
+
+def summarize(results):
+    """Fit the time and memory scaling exponent of each case."""
+    return {
+        case: {
+            "time_exponent": scaling_exponent(group["rows"], group["seconds"]),
+            "memory_exponent": scaling_exponent(group["rows"], group["peak_mb"]),
+        }
+        for case, group in results.groupby("case", sort=False)
+    }
+
+
+def compare(results, baseline, tolerance, exponent_slack):
+    """Return a description of every case and size that regressed against
+    the baseline. Scaling exponents are refitted on the sizes both runs
+    measured, so a run over other sizes is still compared like for like."""
+    failures = []
+    for case, group in results.groupby("case", sort=False):
+        reference = pd.DataFrame.from_dict(baseline["cases"].get(case, {}), orient="index")
+        group = group[group["rows"].astype(str).isin(reference.index)]
+        if group.empty:
+            continue
+        reference = reference.loc[group["rows"].astype(str)]
+
+        for row, expected in zip(group.itertuples(), reference.itertuples()):
+            if row.seconds > tolerance * expected.seconds and row.seconds >= MIN_COMPARED_SECONDS:
+                failures.append(f"{case} at {row.rows} rows took {row.seconds:.3f} s, "
+                                f"{row.seconds / expected.seconds:.1f}x the baseline")
+            if row.peak_mb > tolerance * expected.peak_mb:
+                failures.append(f"{case} at {row.rows} rows allocated {row.peak_mb:.1f} MB, "
+                                f"{row.peak_mb / expected.peak_mb:.1f}x the baseline")
+
+        # Timings of a few milliseconds are mostly overhead and would skew the fitted slope
+        timed = (group["seconds"].to_numpy() >= MIN_COMPARED_SECONDS) & (reference["seconds"].to_numpy() >= MIN_COMPARED_SECONDS)
+        for column, name, rows in [("seconds", "time", timed), ("peak_mb", "memory", slice(None))]:
+            fitted = scaling_exponent(group["rows"][rows], group[column][rows])
+            expected = scaling_exponent(group["rows"][rows], reference[column][rows])
+            if fitted > expected + exponent_slack:
+                failures.append(f"{case} {name} scales as rows^{fitted:.2f}, up from rows^{expected:.2f}")
+    return failures
+
+
+@click.command()
+@click.option('--sizes', type=str, default="1e4,1e5,1e6,1e7", help="Comma separated numbers of synthetic rows")
+@click.option('--case', 'cases', type=click.Choice(CASES), multiple=True, help="Function to measure (repeatable); all by default")
+@click.option('--repeats', type=int, default=3, help="Number of timed runs per case and size; the fastest is reported")
+@click.option('--baseline', type=str, default="benchmarks/baseline.json", help="Path to the stored baseline")
+@click.option('--save-baseline', is_flag=True, default=False, help="Store the results as the new baseline instead of comparing")
+@click.option('--tolerance', type=float, default=1.5, help="Allowed ratio of time or memory to the baseline")
+@click.option('--exponent-slack', type=float, default=0.25, help="Allowed increase of a scaling exponent over the baseline")
+@click.option('--results-to', type=str, default=None, help="Optional path of a CSV file for the measurements")
+def main(sizes, cases, repeats, baseline, save_baseline, tolerance, exponent_slack, results_to):
+    """Measures the library functions on synthetic rosters of each size."""
+    sizes = [int(float(size)) for size in sizes.split(",")]
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n_rows in sizes:
+            for case, call in case_calls(n_rows, directory):
+                if cases and case not in cases:
+                    continue
+                seconds, peak_mb = measure_call(call, repeats)
+                records.append({"case": case, "rows": n_rows, "seconds": seconds, "peak_mb": peak_mb})
+                click.echo(f"{case:<24} {n_rows:>10} rows {seconds:10.4f} s {peak_mb:10.1f} MB")
+
+    results = pd.DataFrame(records, columns=["case", "rows", "seconds", "peak_mb"])
+    exponents = summarize(results)
+    click.echo("\nScaling exponents (time ~ rows^k, memory ~ rows^k):")
+    for case, fitted in exponents.items():
+        click.echo(f"{case:<24} time {fitted['time_exponent']:5.2f}  memory {fitted['memory_exponent']:5.2f}")
+    if results_to is not None:
+        results.to_csv(results_to, index=False)
+
+    if save_baseline:
+        stored = {
+            "cases": {
+                case: {str(row.rows): {"seconds": row.seconds, "peak_mb": row.peak_mb} for row in group.itertuples()}
+                for case, group in results.groupby("case", sort=False)
+            },
+            "exponents": exponents,
+        }
+        with open(baseline, "w") as f:
+            json.dump(stored, f, indent=2)
+        click.echo(f"\nBaseline written to {baseline}")
+        return
+
+    if not os.path.exists(baseline):
+        raise click.ClickException(f"No baseline at {baseline}; run with --save-baseline first")
+    with open(baseline) as f:
+        failures = compare(results, json.load(f), tolerance, exponent_slack)
+    if failures:
+        raise click.ClickException("; ".join(failures))
+    click.echo("\nNo regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# bench_predictor.py
+# date: 2026-10-18
+
+# This script compares the prediction latency of the saved sklearn
+# pipeline with the compiled NumPy predictor and the precomputed
+# probability grid, for a single row and for a large batch of rows, and
+# checks that they give the same results.
+
+# Usage
+'''
+python benchmarks/bench_predictor.py \
+    --pipeline=results/models/shooter_pipeline.pickle \
+    --batch-rows=1000000 \
+    --grid-resolution=1
+'''
+
+# Imports
+import click
+import os
+import pickle
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+from sklearn import set_config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.compile_predictor import compile_predictor
+from src.probability_grid import build_probability_grid
+
+
+def best_time(func, repeats):
+    """Return the fastest of `repeats` timed calls of `func`, in seconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeats))
+
+
+@click.command()
+@click.option('--pipeline', type=str, default="results/models/shooter_pipeline.pickle", help="Path to the fitted pipeline")
+@click.option('--batch-rows', type=int, default=1_000_000, help="Number of rows in the batch benchmark")
+@click.option('--repeats', type=int, default=5, help="Number of timed repeats per case")
+@click.option('--grid-resolution', type=float, default=1.0, help="Spacing of the probability grid, in kg/cm")
+def main(pipeline, batch_rows, repeats, grid_resolution):
+    """Times predict_proba on one row and on a batch for each predictor."""
+    set_config(transform_output="pandas")
+    with open(pipeline, "rb") as f:
+        sklearn_pipeline = pickle.load(f)
+    predictor = compile_predictor(sklearn_pipeline)
+    grid = build_probability_grid(sklearn_pipeline, grid_resolution)
+
+    rng = np.random.default_rng(123)
+    batch = pd.DataFrame({
+        "weight_in_kilograms": rng.uniform(55, 125, batch_rows),
+        "height_in_centimeters": rng.uniform(155, 210, batch_rows),
+    })
+    row = batch.iloc[[0]]
+    row_array = row[predictor.feature_names].to_numpy()[0]
+    batch_array = batch[predictor.feature_names].to_numpy()
+
+    # Both predictors must agree before their speed is worth comparing
+    np.testing.assert_array_equal(predictor.predict(batch), sklearn_pipeline.predict(batch))
+    exact = sklearn_pipeline.predict_proba(batch)
+    max_difference = np.abs(predictor.predict_proba(batch) - exact).max()
+    grid_differences = {method: np.abs(grid.predict_proba(batch_array, method) - exact).max()
+                        for method in ["nearest", "linear"]}
+
+    results = pd.DataFrame([
+        ["single row", "sklearn pipeline", best_time(lambda: sklearn_pipeline.predict_proba(row), repeats)],
+        ["single row", "compiled predictor", best_time(lambda: predictor.predict_proba(row_array), repeats)],
+        ["single row", "grid (nearest)", best_time(lambda: grid.predict_proba(row_array, "nearest"), repeats)],
+        ["single row", "grid (linear)", best_time(lambda: grid.predict_proba(row_array), repeats)],
+        [f"{batch_rows} rows", "sklearn pipeline", best_time(lambda: sklearn_pipeline.predict_proba(batch), repeats)],
+        [f"{batch_rows} rows", "compiled predictor", best_time(lambda: predictor.predict_proba(batch_array), repeats)],
+        [f"{batch_rows} rows", "grid (nearest)", best_time(lambda: grid.predict_proba(batch_array, "nearest"), repeats)],
+        [f"{batch_rows} rows", "grid (linear)", best_time(lambda: grid.predict_proba(batch_array), repeats)],
+    ], columns=["case", "predictor", "seconds"])
+    results["speedup"] = (
+        results.groupby("case")["seconds"].transform("first") / results["seconds"]
+    )
+
+    click.echo(results.to_string(index=False))
+    click.echo(f"Max absolute predict_proba difference: {max_difference:.3e}")
+    for method, difference in grid_differences.items():
+        click.echo(f"Grid ({method}) max absolute difference: {difference:.3e}, "
+                   f"error bound {grid.error_bound[method]:.3e}")
+
+
+if __name__ == '__main__':
+    main()
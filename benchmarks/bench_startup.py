@@ -0,0 +1,83 @@
+# bench_startup.py
+# date: 2026-10-18
+
+# This script measures the import cost of each subcommand of the unified
+# `python -m nhl_shooting` entry point with `python -X importtime`. It
+# fails if a subcommand's --help imports more than its time budget allows,
+# or imports one of the heavy libraries that should only be loaded once a
+# stage actually runs.
+
+# Usage
+'''
+python benchmarks/bench_startup.py
+python benchmarks/bench_startup.py --command=eda --repeats=10 --scale=2
+'''
+
+# Imports
+import click
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Import budget of `nhl_shooting <command> --help`, in milliseconds
+BUDGETS_MS = {
+    "": 150,
+    "download": 200,
+    "generate": 150,
+    "preprocess": 200,
+    "eda": 150,
+    "classify": 150,
+    "pipeline": 150,
+}
+
+# Libraries that no subcommand may import just to parse its arguments
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "requests", "sklearn", "pandera", "altair", "deepchecks",
+                 "matplotlib", "scipy"]
+
+
+def import_profile(command):
+    """Run `nhl_shooting <command> --help` under -X importtime and return
+    the self import time of each module, in microseconds."""
+    args = [sys.executable, "-X", "importtime", "-m", "nhl_shooting", *([command] if command else []), "--help"]
+    result = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        profile[module.strip()] = int(self_us)
+    return profile
+
+
+@click.command()
+@click.option('--command', 'commands', type=click.Choice(list(BUDGETS_MS)), multiple=True, help="Subcommand to measure (repeatable); all by default")
+@click.option('--repeats', type=int, default=5, help="Number of measured runs per subcommand; the median is reported")
+@click.option('--scale', type=float, default=1.0, help="Multiply every budget, e.g. on slower machines")
+def main(commands, repeats, scale):
+    """Checks the import time of each subcommand against its budget."""
+    failures = []
+    for command in commands or BUDGETS_MS:
+        profiles = [import_profile(command) for _ in range(repeats)]
+        total_ms = statistics.median(sum(profile.values()) for profile in profiles) / 1000
+        budget_ms = BUDGETS_MS[command] * scale
+        heavy = sorted({module.split(".")[0] for module in profiles[0]} & set(HEAVY_MODULES))
+        slowest = sorted(profiles[0].items(), key=lambda item: item[1], reverse=True)[:3]
+
+        name = command or "(entry point)"
+        status = "ok" if total_ms <= budget_ms and not heavy else "FAIL"
+        click.echo(f"{name:<15} {total_ms:8.1f} ms / {budget_ms:6.0f} ms  {status}  "
+                   f"slowest: {', '.join(f'{module} {us / 1000:.1f} ms' for module, us in slowest)}")
+        if total_ms > budget_ms:
+            failures.append(f"{name} imports for {total_ms:.1f} ms, over its {budget_ms:.0f} ms budget")
+        if heavy:
+            failures.append(f"{name} imports {', '.join(heavy)} before running")
+
+    if failures:
+        raise click.ClickException("; ".join(failures))
+
+
+if __name__ == '__main__':
+    main()
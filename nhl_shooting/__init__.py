@@ -0,0 +1,7 @@
+"""Single command line entry point for the NHL shooting hand analysis.
+
+Run ``python -m nhl_shooting --help`` for the list of stages. Each stage is
+the ``main`` command of a script in ``scripts/``, imported only when that
+stage is run, so the entry point starts without loading pandas,
+scikit-learn, altair or deepchecks.
+"""
@@ -0,0 +1,4 @@
+from nhl_shooting.cli import cli
+
+if __name__ == '__main__':
+    cli(prog_name="nhl_shooting")
@@ -0,0 +1,51 @@
+import importlib
+import os
+import sys
+import click
+
+# The scripts are imported as modules of the project root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Subcommand name -> (module holding its click `main`, short help)
+COMMANDS = {
+    "download": ("scripts.download_data", "Download the raw roster data."),
+    "generate": ("scripts.generate_rosters", "Generate synthetic rosters for load testing."),
+    "preprocess": ("scripts.preprocess_and_validate", "Clean, validate and split the raw rosters."),
+    "eda": ("scripts.eda", "Write the EDA tables and feature histograms."),
+    "classify": ("scripts.shooting_hand_classifier", "Train and evaluate the shooting hand classifier."),
+    "pipeline": ("scripts.run_pipeline", "Run the stages whose inputs changed since they were cached."),
+}
+
+
+class LazyGroup(click.Group):
+    """Click group whose subcommands are imported on first use.
+
+    The short help of each subcommand is kept in `COMMANDS`, so listing the
+    subcommands does not import any of them.
+    """
+
+    def __init__(self, *args, lazy_commands: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted([*super().list_commands(ctx), *self.lazy_commands])
+
+    def get_command(self, ctx, name):
+        if name not in self.lazy_commands:
+            return super().get_command(ctx, name)
+        module, _ = self.lazy_commands[name]
+        return importlib.import_module(module).main
+
+    def format_commands(self, ctx, formatter):
+        rows = [(name, help_text) for name, (_, help_text) in sorted(self.lazy_commands.items())]
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+def cli():
+    """Predict an NHL player's shooting hand from their height and weight."""
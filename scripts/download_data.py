@@ -11,57 +11,52 @@
 #   --write_to=data/raw
 
 # Imports
+# requests is imported where it is used, so that --help does not pay for it
 import click
 import os
-import requests
-import pandas as pd
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import run_manifest
 
 
 def download_and_extract_csv(url, directory):
     """
-    Read a csv file from the given URL and extract its contents to the specified directory.
+    Download a csv file from the given URL in to the specified directory.
+
+    The file is streamed straight to disk. Re-running against an unchanged
+    upstream file only costs a conditional request, and an interrupted
+    download is resumed where it stopped.
 
     Parameters:
     ----------
     url : str
         The URL of the csv file to be read.
     directory : str
-        The directory where the contents of the zip file will be extracted.
+        The directory where the csv file will be saved.
 
     Returns:
     -------
-    None
+    str
+        "downloaded", "resumed" or "not-modified".
     """
-    request = requests.get(url)
-    filename_from_url = os.path.basename(url)
-
-    # check if URL exists, if not raise an error
-    if request.status_code != 200:
-        raise ValueError('The URL provided does not exist.')
-
-    # check if the directory exists, if not raise an error
-    if not os.path.isdir(directory):
-        raise ValueError('The directory provided does not exist.')
-
-    # Read csv file in to a DataFrame
-    df = pd.read_csv(url)
-
-    # Write the DataFrame to a CSV file
-    path_to_file = os.path.join(directory, filename_from_url)
-    df.to_csv(path_to_file, index=False)
+    # requests is only imported once there is something to download
+    from src.download_file import download_file
+    return download_file(url, directory)
 
 
 @click.command()
 @click.option('--url', type=str, help="URL of dataset to be downloaded")
 @click.option('--write_to', type=str, help="Path to directory where raw data is written")
-def main(url, write_to):
-    """Downloads csv data from the web to a local filepath and extracts it"""
-    try:
-        download_and_extract_csv(url, write_to)
-    except:
-        os.makedirs(write_to)
-        download_and_extract_csv(url, write_to)
+@click.option('--manifest-to', type=str, default="results/manifests", help="Directory where the stage's performance manifest is written")
+@click.option('--profile', is_flag=True, help="Also write a cProfile dump of the stage next to its manifest")
+@click.option('--trace-memory', is_flag=True, help="Record the peak Python memory of each step with tracemalloc (slower)")
+def main(url, write_to, manifest_to, profile, trace_memory):
+    """Downloads csv data from the web to a local filepath"""
+    with run_manifest("download", manifest_to, profile=profile, trace_memory=trace_memory):
+        os.makedirs(write_to, exist_ok=True)
+        status = download_and_extract_csv(url, write_to)
+        click.echo(f"{os.path.basename(url)}: {status}")
 
 # Call main function
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -13,85 +13,123 @@ python scripts/eda.py \
     --tables-to=results/tables \
     --plot-to=results/figures
     ""
+
+Histograms are binned with NumPy before charting, so the chart spec holds
+one row per bar. Add --no-prebinned to let Vega-Lite bin the raw rows.
+
+When the training data is a partitioned store, restrict the analysis with
+filters such as --where="season>=20002001" --where="position_type==defensemen";
+only the partitions that may match are read.
 '''
 
 # import libraries/packages
+# altair and the src modules are imported where they are used, so that
+# --help does not pay for them
 import click
 import os
-import altair as alt
-import pandas as pd
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.check_eda import check_eda
-
-@click.command()
-@click.option('--processed-training-data', type=str, help="Path to processed training data")
-@click.option('--tables-to', type=str, help="Path to directory where the table will be written to")
-@click.option('--plot-to', type=str, help="Path to directory where the plot will be written to")
-
+from src.instrumentation import run_manifest, record_rows
 
-def main(processed_training_data, tables_to, plot_to):
-    '''Plots the densities of each feature in the processed training data
-        by class and displays them as a grid of plots. Also saves the plot.'''
 
-    # Create processed data folder if it doesn't exist
-    os.makedirs(plot_to, exist_ok=True)
-    os.makedirs(tables_to, exist_ok=True)
-    
-    train_df = pd.read_csv(processed_training_data)
-    train_df = check_eda(train_df, tables_to)
+def histogram_panel(train_df, column, axis_title, title, facet_title, prebinned=True):
+    '''Returns a title and a histogram of `column` faceted by shooting hand.
+        With `prebinned`, the bars are counted with NumPy and only the counts
+        are embedded in the chart, otherwise every row is embedded and
+        Vega-Lite bins them at render time.'''
+    import altair as alt
+    from src.binned_counts import binned_counts
 
-    # Code for Chart Begins
-    # =============================
-    # Weight Chart with Title
-    weight_title = alt.Chart({'values': [{}]}).mark_text(
-        align='center',
-        fontSize=14,
-        fontWeight='bold',
-        text='Distribution of Player Weights by Shooting Hand'
-    ).properties(width=400, height=30)
-    
-    weight_chart = alt.Chart(train_df).mark_bar().encode(
-        alt.X("weight_in_kilograms:Q", title="Weight (kg)").bin(),
-        alt.Y("count()", title="Number of Players"),
-        alt.Color("shoots_left", title="Shoots Left or NOT")
-    ).properties(
-        height=300,
-        width=200
-    ).facet(
-        alt.Facet("shoots_left:N", title="Shoots Left or Right")
-    )
-    
-    # Height Chart with Title
-    height_title = alt.Chart({'values': [{}]}).mark_text(
+    title_chart = alt.Chart({'values': [{}]}).mark_text(
         align='center',
         fontSize=14,
         fontWeight='bold',
-        text='Distribution of Player Heights by Shooting Hand'
+        text=title
     ).properties(width=400, height=30)
-    
-    height_chart = alt.Chart(train_df).mark_bar().encode(
-        alt.X("height_in_centimeters:Q", title="Height (cm)").bin(),
-        alt.Y("count()", title="Number of Players"),
-        alt.Color("shoots_left", title="Shoots Left or NOT")
-    ).properties(
+
+    if prebinned:
+        counts = binned_counts(train_df, column, "shoots_left")
+        chart = alt.Chart(counts).mark_bar().encode(
+            alt.X("bin_start:Q", title=axis_title, bin="binned"),
+            alt.X2("bin_end:Q"),
+            alt.Y("count:Q", title="Number of Players"),
+            alt.Color("shoots_left", title="Shoots Left or NOT")
+        )
+    else:
+        chart = alt.Chart(train_df).mark_bar().encode(
+            alt.X(f"{column}:Q", title=axis_title).bin(),
+            alt.Y("count()", title="Number of Players"),
+            alt.Color("shoots_left", title="Shoots Left or NOT")
+        )
+
+    chart = chart.properties(
         height=300,
         width=200
     ).facet(
-        alt.Facet("shoots_left:N", title="Shoots Left or NOT")
+        alt.Facet("shoots_left:N", title=facet_title)
     )
+    return title_chart, chart
+
+
+@click.command()
+@click.option('--processed-training-data', type=str, help="Path to processed training data")
+@click.option('--tables-to', type=str, help="Path to directory where the table will be written to")
+@click.option('--plot-to', type=str, help="Path to directory where the plot will be written to")
+@click.option('--prebinned/--no-prebinned', default=True, help="Count the histogram bins with NumPy before charting")
+@click.option('--where', type=str, multiple=True, help="Filter on the training rows, such as season>=20002001; may be repeated")
+@click.option('--manifest-to', type=str, default="results/manifests", help="Directory where the stage's performance manifest is written")
+@click.option('--profile', is_flag=True, help="Also write a cProfile dump of the stage next to its manifest")
+@click.option('--trace-memory', is_flag=True, help="Record the peak Python memory of each step with tracemalloc (slower)")
+
+
+def main(processed_training_data, tables_to, plot_to, prebinned, where, manifest_to, profile, trace_memory):
+    '''Plots the densities of each feature in the processed training data
+        by class and displays them as a grid of plots. Also saves the plot.'''
+    run_stage(processed_training_data, tables_to, plot_to, prebinned, where, manifest_to, profile, trace_memory)
+
+
+def run_stage(processed_training_data, tables_to, plot_to, prebinned=True, where=(), manifest_to="results/manifests",
+              profile=False, trace_memory=False, inputs=None):
+    '''Runs the EDA stage with the parameters of `main`. When `inputs` holds
+        the result of the preprocess stage run in the same process, its
+        training split is used instead of reading the training data.'''
+    import altair as alt
+    from src.check_eda import check_eda
+    from src.read_plan import read_plan, report_memory, plan_frame
+    from src.storage import read_table
+    from src.partitioned_store import parse_filter
+
+    with run_manifest("eda", manifest_to, profile=profile, trace_memory=trace_memory):
+        # Create processed data folder if it doesn't exist
+        os.makedirs(plot_to, exist_ok=True)
+        os.makedirs(tables_to, exist_ok=True)
     
-    # Combine Titles and Charts
-    combined_chart = alt.vconcat(
-        weight_title,
-        weight_chart,
-        height_title,
-        height_chart
-    )
+        plan = read_plan("eda")
+        filters = [parse_filter(text) for text in where]
+        preprocessed = (inputs or {}).get("preprocess")
+        if preprocessed is not None:
+            train_df = plan_frame(preprocessed["train"], plan, filters)
+        else:
+            train_df = read_table(processed_training_data, columns=list(plan), dtypes=plan, filters=filters)
+            report_memory(train_df, processed_training_data, "eda", manifest_to)
+        record_rows(rows_in=len(train_df))
+        train_df = check_eda(train_df, tables_to)
+
+        # Code for Chart Begins
+        # =============================
+        panels = [
+            ("weight_in_kilograms", "Weight (kg)", "Distribution of Player Weights by Shooting Hand", "Shoots Left or Right"),
+            ("height_in_centimeters", "Height (cm)", "Distribution of Player Heights by Shooting Hand", "Shoots Left or NOT"),
+        ]
+        # Prebinned panels are a few bins each, so building them costs little next to the single render
+        charts = [histogram_panel(train_df, *panel, prebinned=prebinned) for panel in panels]
+
+        # Combine Titles and Charts
+        combined_chart = alt.vconcat(*[chart for panel in charts for chart in panel])
     
-    combined_chart.save(os.path.join(plot_to, "player_height_weight_distribution.png"))
-    # =============================
-    # Code for Chart Ends
+        combined_chart.save(os.path.join(plot_to, "player_height_weight_distribution.png"))
+        # =============================
+        # Code for Chart Ends
 
     
 
@@ -0,0 +1,80 @@
+# generate_rosters.py
+# date: 2026-10-18
+
+# This script generates synthetic NHL rosters with the columns and value
+# distributions of the raw roster data, at any number of rows, to load test
+# the pipeline. Shards are generated and written in parallel processes, and
+# can be combined into a single raw file for the preprocessing stage.
+
+# Usage
+'''
+python scripts/generate_rosters.py \
+    --rows=10000000 \
+    --write-to=data/synthetic \
+    --invalid-fraction=0.01 \
+    --combine
+
+python scripts/preprocess_and_validate.py \
+    --raw-data=data/synthetic/nhl_rosters.csv \
+    --data-to=data/processed \
+    --preprocessor-to=results/models \
+    --chunksize=100000
+'''
+
+# Imports
+# pandas and the generator are imported where they are used, so that
+# --help does not pay for them
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import run_manifest
+
+
+def combine_shards(paths, path):
+    """Append the shards, in order, to a single table at `path` and delete
+    them. Each shard is read in chunks, so memory stays bounded."""
+    import pandas as pd
+    from src.clean_rosters import RAW_DTYPES
+    from src.storage import TableWriter, iter_table
+
+    template = pd.DataFrame(columns=list(RAW_DTYPES)).astype(RAW_DTYPES)
+    with TableWriter(path, template) as writer:
+        for shard in paths:
+            for chunk in iter_table(shard, 1_000_000, dtypes=RAW_DTYPES):
+                writer.write(chunk)
+            os.remove(shard)
+
+
+@click.command()
+@click.option('--rows', type=int, required=True, help="Number of roster rows to generate")
+@click.option('--write-to', type=str, default="data/synthetic", help="Path to directory where the rosters will be written to")
+@click.option('--shard-rows', type=int, default=1_000_000, help="Number of rows per shard")
+@click.option('--n-jobs', type=int, default=None, help="Number of worker processes; one per CPU by default")
+@click.option('--seed', type=int, default=123, help="Seed of the generator; the output is the same for any number of workers")
+@click.option('--file-format', type=click.Choice(["csv", "parquet", "feather"]), default="csv", help="Storage format of the shards")
+@click.option('--duplicate-fraction', type=float, default=0.01, help="Fraction of rows that repeat an earlier row")
+@click.option('--missing-fraction', type=float, default=0.01, help="Fraction of rows missing their weight or height")
+@click.option('--invalid-fraction', type=float, default=0.0, help="Fraction of rows with an out of range weight or height")
+@click.option('--combine', is_flag=True, help="Combine the shards into a single nhl_rosters file")
+@click.option('--manifest-to', type=str, default="results/manifests", help="Directory where the stage's performance manifest is written")
+@click.option('--profile', is_flag=True, help="Also write a cProfile dump of the stage next to its manifest")
+@click.option('--trace-memory', is_flag=True, help="Record the peak Python memory of each step with tracemalloc (slower)")
+def main(rows, write_to, shard_rows, n_jobs, seed, file_format, duplicate_fraction, missing_fraction,
+         invalid_fraction, combine, manifest_to, profile, trace_memory):
+    """Generates synthetic rosters in shards written by parallel processes."""
+    from src.synthetic_rosters import write_synthetic_rosters
+
+    with run_manifest("generate", manifest_to, profile=profile, trace_memory=trace_memory):
+        os.makedirs(write_to, exist_ok=True)
+        paths = write_synthetic_rosters(
+            rows, write_to, shard_rows=shard_rows, n_jobs=n_jobs, random_state=seed, file_format=file_format,
+            duplicate_fraction=duplicate_fraction, missing_fraction=missing_fraction,
+            invalid_fraction=invalid_fraction
+        )
+        if combine:
+            combine_shards(paths, os.path.join(write_to, f"nhl_rosters.{file_format}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -12,59 +12,144 @@ Usage: python scripts/preprocess_and_validate.py \
     --raw-data=data/raw/nhl_rosters.csv \
     --data-to=data/processed \
     --preprocessor-to=results/models
+
+Add --chunksize=100000 to stream the raw data in bounded memory, and
+--file-format=feather to write the splits as memory-mappable Arrow files.
+Add --collapse-players=median to train on one weighted record per player,
+and --split=player to keep all of a player's rows in the same split.
+Add --keep-season to keep each row's season in the splits, so that the
+classifier can later be retrained incrementally on new seasons.
+Add --partition-by=season (and --partition-by=team_code) to write the
+splits as partitioned stores data/processed/roster_train and roster_test,
+which keep each row's season, team and position and can be read with
+filters such as --where="season>=20002001" by the later stages.
 '''
 
 # Imports
+# pandas, scikit-learn and the pandera schema are imported where they are
+# used, so that --help does not pay for them
 import click
-import json
 import logging
 import os
 import sys
-import pandas as pd
-import pandera as pa
 import pickle
-from sklearn.model_selection import train_test_split
-from sklearn import set_config
-from sklearn.preprocessing import StandardScaler
-from sklearn.compose import make_column_transformer
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.write_csv import write_csv
+from src.instrumentation import run_manifest, record_rows
+from src.choices import AGGREGATIONS, PARTITION_COLUMNS, SPLITS
+
+# Logging configuration
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
 
 @click.command()
 @click.option('--raw-data', type=str, help="Path to raw data")
 @click.option('--data-to', type=str, help="Path to directory where processed data will be written to")
 @click.option('--preprocessor-to', type=str, help="Path to directory where the preprocessor object will be written to")
-def main(raw_data, data_to, preprocessor_to):
+@click.option('--chunksize', type=int, default=None, help="Stream the raw data in chunks of this many rows instead of loading it all at once")
+@click.option('--file-format', type=click.Choice(["csv", "parquet", "feather"]), default="csv", help="Storage format of the processed data")
+@click.option('--collapse-players', type=click.Choice(AGGREGATIONS), default=None, help="Collapse each player's seasons into one record with this aggregation, weighted by season count")
+@click.option('--split', type=click.Choice(SPLITS), default="random", help="Assign rows to train/test at random, or whole players by a stable hash of player_id")
+@click.option('--keep-season', is_flag=True, help="Keep each row's season in the splits, for incremental retraining")
+@click.option('--partition-by', type=click.Choice(PARTITION_COLUMNS), multiple=True, help="Write the splits as stores partitioned by season, and optionally team_code")
+@click.option('--manifest-to', type=str, default="results/manifests", help="Directory where the stage's performance manifest is written")
+@click.option('--profile', is_flag=True, help="Also write a cProfile dump of the stage next to its manifest")
+@click.option('--trace-memory', is_flag=True, help="Record the peak Python memory of each step with tracemalloc (slower)")
+def main(raw_data, data_to, preprocessor_to, chunksize, file_format, collapse_players, split,
+         keep_season, partition_by, manifest_to, profile, trace_memory):
     """Main function to execute preprocessing and cleaning"""
-    set_config(transform_output="pandas")
-
-    column_names = [
-        'team_code',
-        'season',
-        'position_type',
-        'player_id',
-        'headshot',
-        'first_name',
-        'last_name',
-        'sweater_number',
-        'position_code',
-        'shoots_catches',
-        'height_in_inches',
-        'weight_in_pounds',
-        'height_in_centimeters',
-        'weight_in_kilograms',
-        'birth_date',
-        'birth_city',
-        'birth_country',
-        'birth_state_province'
-    ]
-
-    # Read in raw data
-    rosters = pd.read_csv(raw_data)
+    run_stage(raw_data, data_to, preprocessor_to, chunksize, file_format, collapse_players, split,
+              keep_season, partition_by, manifest_to, profile, trace_memory)
+
+
+def run_stage(raw_data, data_to, preprocessor_to, chunksize=None, file_format="csv", collapse_players=None,
+              split="random", keep_season=False, partition_by=(), manifest_to="results/manifests", profile=False,
+              trace_memory=False, inputs=None):
+    """Run the preprocessing stage with the parameters of `main`, writing
+    its outputs. Returns the train and test splits and the preprocessor as
+    a dict, so that later stages run in the same process can use them
+    without reading the files back, or None when the raw data is streamed.
+    `inputs` is not used; the stage reads its raw data from disk."""
+    from sklearn import set_config
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.compose import make_column_transformer
+    from src.stream_rosters import stream_rosters
+
+    with run_manifest("preprocess", manifest_to, profile=profile, trace_memory=trace_memory):
+        set_config(transform_output="pandas")
+
+        # Create processed data folder if it doesn't exist
+        os.makedirs(data_to, exist_ok=True)
+
+        if chunksize is not None and collapse_players is not None:
+            raise click.UsageError("--collapse-players needs the whole data set and cannot be used with --chunksize.")
+        if (keep_season or partition_by) and collapse_players is not None:
+            raise click.UsageError("--collapse-players merges a player's seasons and cannot be used with "
+                                   "--keep-season or --partition-by.")
+        if partition_by and "season" not in partition_by:
+            raise click.UsageError("Stores are partitioned by season first; add --partition-by=season.")
+
+        if chunksize is not None:
+            # Stream the raw data in chunks so memory use stays bounded
+            counts = stream_rosters(raw_data, data_to, chunksize, test_size=0.3, random_state=123,
+                                    file_format=file_format, split=split, keep_season=keep_season,
+                                    partition_by=list(partition_by) or None)
+            logging.info(f"Streamed preprocessing row counts: {counts}")
+            record_rows(rows_in=counts["raw"], rows_out=counts["train"] + counts["test"])
+            splits = None
+        else:
+            splits = preprocess_in_memory(raw_data, data_to, file_format, collapse_players, split, manifest_to,
+                                          keep_season, list(partition_by) or None)
+
+        # Lists of feature names
+        numeric_features = ["weight_in_kilograms", "height_in_centimeters"]
+
+        # Create the column transformer
+        roster_preprocessor = make_column_transformer(
+            (StandardScaler(), numeric_features),  # scaling on numeric features
+        )
+
+        # Create model directory if does not exist
+        os.makedirs(preprocessor_to, exist_ok=True)
+
+        with open(os.path.join(preprocessor_to, "roster_preprocessor.pickle"), "wb") as f:
+            pickle.dump(roster_preprocessor, f)
+
+    if splits is None:
+        return None
+    return {"train": splits[0], "test": splits[1], "preprocessor": roster_preprocessor}
+
+
+def preprocess_in_memory(raw_data, data_to, file_format, player_aggregation=None, split="random",
+                         memory_report_to=None, keep_season=False, partition_by=None):
+    """Read the whole raw data set, clean and validate it, and write the
+    train and test splits and the quarantined rows. With a player
+    aggregation, each player's seasons are first collapsed into one record
+    with a sample_weight column. With split="player", rows are assigned to
+    the splits by a stable hash of player_id. With keep_season, each row's
+    season is kept in the splits. With partition_by, the splits are
+    written as partitioned stores that keep the season, team and position
+    of each row. Only the columns of the
+    preprocessing read plan are read, and their memory is compared with an
+    untyped read in a report written to `memory_report_to`. Returns the
+    train and test splits."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from src.storage import write_table, read_table, table_columns, TableWriter
+    from src.clean_rosters import COLUMN_NAMES, QUARANTINE_DTYPES, roster_schema, clean_rosters
+    from src.read_plan import read_plan, report_memory
+    from src.validate_rosters import RosterValidator
+    from src.partitioned_store import STORE_COLUMNS, write_store
+    from src.collapse_players import collapse_players
+    from src.split_rosters import hash_split
 
     # Data Validation: Check if column names are correct
-    for column in rosters.columns:
-        assert column in column_names, "Data Validation: Incorrect column names"
+    for column in table_columns(raw_data):
+        assert column in COLUMN_NAMES, "Data Validation: Incorrect column names"
+
+    # Read in the raw columns the stage needs, with compact dtypes
+    plan = read_plan("preprocess")
+    rosters = read_table(raw_data, columns=list(plan), dtypes=plan)
+    report_memory(rosters, raw_data, "preprocess", memory_report_to)
 
     # Data wrangling and cleanup
     # Drop NA records
@@ -72,79 +157,39 @@ def main(raw_data, data_to, preprocessor_to):
     if rosters_clean.duplicated().any():
         raise ValueError("Duplicate rows found in the rosters_clean DataFrame")
 
-    rosters_clean = rosters_clean[[
-        "weight_in_kilograms",
-        "height_in_centimeters",
-        "shoots_catches"
-    ]]
-    rosters_clean = rosters_clean.dropna()
-
-    # Data Validation: Check for Empty Observations
-    assert not rosters_clean.isnull().values.any(), "Data Validation: There are empty observations!"
-
-    # Convert target column to binary with shoots left as 1 and shoots right as 0
-    rosters_clean["shoots_left"] = rosters_clean["shoots_catches"].replace({
-        'L': True,
-        'R': False
-    }).astype(bool)
-    rosters_clean = rosters_clean.drop("shoots_catches", axis=1)
-
-    # Data Validation with Pandera:
-    schema = pa.DataFrameSchema(
-        {
-            "weight_in_kilograms": pa.Column(float, pa.Check.between(55, 125), nullable=False),
-            "height_in_centimeters": pa.Column(float, pa.Check.between(155, 210), nullable=False),
-            "shoots_left": pa.Column(bool, pa.Check.isin([True, False]), nullable=False)
-        }
-    )
-
-    # Initialize error cases DataFrame
-    error_cases = pd.DataFrame()
-    data = rosters_clean.copy()
-
-    # Validate data and handle errors
-    try:
-        validated_data = schema.validate(data, lazy=True)
-    except pa.errors.SchemaErrors as e:
-        error_cases = e.failure_cases
-
-        # Convert the error message to a JSON string
-        error_message = json.dumps(e.message, indent=2)
-        logging.error("\n" + error_message)
-
-    # Filter out invalid rows based on the error cases
-    if not error_cases.empty:
-        invalid_indices = error_cases["index"].dropna().unique()
-        validated_data = (
-            data.drop(index=invalid_indices)
-            .reset_index(drop=True)
-            .drop_duplicates()
-            .dropna(how="all")
-        )
-    else:
-        validated_data = data
+    keep = ["player_id"] if split == "player" else []
+    if player_aggregation is not None:
+        rosters_clean = collapse_players(rosters_clean, player_aggregation)
+        keep.append("sample_weight")
+    if partition_by:
+        keep.extend(STORE_COLUMNS)
+    elif keep_season:
+        keep.append("season")
+    rosters_clean = clean_rosters(rosters_clean, keep=keep)
+
+    # Data Validation: drop rows that fail the schema checks and
+    # quarantine them with the checks they failed
+    quarantine_template = pd.DataFrame(columns=list(QUARANTINE_DTYPES)).astype(QUARANTINE_DTYPES)
+    with TableWriter(os.path.join(data_to, f"roster_quarantine.{file_format}"), quarantine_template) as quarantine:
+        validator = RosterValidator(roster_schema, quarantine=quarantine)
+        validated_data = validator.validate(rosters_clean)
+    logging.info("Validation failures per check:\n" + validator.summary().to_string(index=False))
 
     # Split into train and test
-    train_df, test_df = train_test_split(rosters_clean, test_size=0.3, random_state=123)
-
-    # Create processed data folder if it doesn't exist
-    os.makedirs(data_to, exist_ok=True)
-
-    write_csv(train_df, data_to, "roster_train.csv", keep_index=False)
-    write_csv(test_df, data_to, "roster_test.csv", keep_index=False)
-
-    # Lists of feature names
-    numeric_features = ["weight_in_kilograms", "height_in_centimeters"]
-
-    # Create the column transformer
-    roster_preprocessor = make_column_transformer(
-        (StandardScaler(), numeric_features),  # scaling on numeric features
-    )
-
-    # Create model directory if does not exist
-    os.makedirs(preprocessor_to, exist_ok=True)
+    if split == "player":
+        is_test = hash_split(validated_data.pop("player_id"), test_size=0.3, random_state=123)
+        train_df, test_df = validated_data[~is_test], validated_data[is_test]
+    else:
+        train_df, test_df = train_test_split(validated_data, test_size=0.3, random_state=123)
 
-    pickle.dump(roster_preprocessor, open(os.path.join(preprocessor_to, "roster_preprocessor.pickle"), "wb"))
+    if partition_by:
+        write_store(train_df, os.path.join(data_to, "roster_train"), partition_by, file_format)
+        write_store(test_df, os.path.join(data_to, "roster_test"), partition_by, file_format)
+    else:
+        write_table(train_df, data_to, f"roster_train.{file_format}", keep_index=False)
+        write_table(test_df, data_to, f"roster_test.{file_format}", keep_index=False)
+    record_rows(rows_in=len(rosters), rows_out=len(train_df) + len(test_df))
+    return train_df, test_df
 
 
 if __name__ == '__main__':
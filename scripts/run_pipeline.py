@@ -0,0 +1,180 @@
+# run_pipeline.py
+# date: 2026-10-18
+
+# This script runs the analysis as a set of stages (download, preprocess,
+# eda, classify, report). Each stage is fingerprinted from the contents of
+# its script and the src modules it imports, its input files and its CLI
+# parameters, and is skipped when that fingerprint is already in the
+# content-addressed cache. The download stage always runs, so that a changed
+# remote file is fetched. Outputs of cached stages that are missing are
+# restored from the cache instead of being rebuilt.
+# With --in-process, the Python stages run as functions in this process,
+# independent stages (eda and classify) run concurrently, and the data and
+# preprocessor are handed from preprocess to the later stages in memory.
+
+# Usage
+'''
+python scripts/run_pipeline.py                   # bring every stage up to date
+python scripts/run_pipeline.py --stage=eda       # only eda and what it needs
+python scripts/run_pipeline.py --stage=classify --force
+python scripts/run_pipeline.py --in-process      # one interpreter, eda and classify concurrently
+python scripts/run_pipeline.py --in-process --backend=process --n-jobs=2
+'''
+
+# Imports
+import ast
+import click
+import importlib
+import logging
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.stage_cache import PYTHON, Stage, run_stages, run_stages_in_process
+
+# Logging configuration
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DATA_URL = "https://raw.githubusercontent.com/rfordatascience/tidytuesday/refs/heads/main/data/2024/2024-01-09/nhl_rosters.csv"
+
+
+def local_sources(script):
+    """Return the script and every src module it imports, directly or
+    through other src modules, so that edits to any of them invalidate the
+    stage."""
+    sources, pending = [], [script]
+    while pending:
+        path = pending.pop()
+        if path in sources or not os.path.exists(path):
+            continue
+        sources.append(path)
+        with open(path) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module and node.module.startswith("src."):
+                pending.append(os.path.join(*node.module.split(".")) + ".py")
+    return sorted(sources)
+
+
+def pipeline_stages():
+    """Return the stages of the analysis."""
+    python = PYTHON
+    return [
+        Stage(
+            "download",
+            [[python, "scripts/download_data.py", f"--url={DATA_URL}", "--write_to=data/raw"]],
+            inputs=local_sources("scripts/download_data.py"),
+            outputs=["data/raw/nhl_rosters.csv"],
+            # The remote file can change without any input changing; an
+            # unchanged one only costs a conditional request
+            always_run=True
+        ),
+        Stage(
+            "preprocess",
+            [[python, "scripts/preprocess_and_validate.py",
+              "--raw-data=data/raw/nhl_rosters.csv",
+              "--data-to=data/processed",
+              "--preprocessor-to=results/models"]],
+            inputs=local_sources("scripts/preprocess_and_validate.py") + ["data/raw/nhl_rosters.csv"],
+            outputs=["data/processed/roster_train.csv",
+                     "data/processed/roster_test.csv",
+                     "data/processed/roster_quarantine.csv",
+                     "results/models/roster_preprocessor.pickle"]
+        ),
+        Stage(
+            "eda",
+            [[python, "scripts/eda.py",
+              "--processed-training-data=data/processed/roster_train.csv",
+              "--tables-to=results/tables",
+              "--plot-to=results/figures"]],
+            inputs=local_sources("scripts/eda.py") + ["data/processed/roster_train.csv"],
+            outputs=["results/figures/player_height_weight_distribution.png",
+                     "results/tables/df_describe.csv",
+                     "results/tables/df_head.csv",
+                     "results/tables/df_info.csv"]
+        ),
+        Stage(
+            "classify",
+            [[python, "scripts/shooting_hand_classifier.py",
+              "--training-data=data/processed/roster_train.csv",
+              "--test-data=data/processed/roster_test.csv",
+              "--preprocessor=results/models/roster_preprocessor.pickle",
+              "--pipeline-to=results/models",
+              "--plot-to=results/figures",
+              "--results-to=results/tables"]],
+            inputs=local_sources("scripts/shooting_hand_classifier.py") + [
+                "data/processed/roster_train.csv",
+                "data/processed/roster_test.csv",
+                "results/models/roster_preprocessor.pickle"],
+            outputs=["results/figures/confusion_matrix.png",
+                     "results/tables/test_scores.csv",
+                     "results/tables/test_scores_ci.csv",
+                     "results/tables/calibration.csv",
+                     "results/models/shooter_pipeline.pickle",
+                     "results/models/shooter_model.npmodel"]
+        ),
+        Stage(
+            "report",
+            [["quarto", "render", "report/shooting_hand_predictor.qmd", "--to", "html"],
+             ["quarto", "render", "report/shooting_hand_predictor.qmd", "--to", "pdf"]],
+            inputs=["report/shooting_hand_predictor.qmd",
+                    "report/references.bib",
+                    "data/processed/roster_train.csv",
+                    "results/tables/test_scores.csv",
+                    "results/tables/df_info.csv",
+                    "results/figures/player_height_weight_distribution.png",
+                    "results/figures/confusion_matrix.png"],
+            outputs=["report/shooting_hand_predictor.html",
+                     "report/shooting_hand_predictor.pdf"]
+        ),
+    ]
+
+
+def call_stage(module, params, **inputs):
+    """Run the `run_stage` function of a stage script with its CLI
+    parameters and the results of the stages it requires."""
+    return importlib.import_module(module).run_stage(**params, inputs=inputs)
+
+
+def stage_functions(stages):
+    """Return, for each stage run by a single Python script that has a
+    `run_stage` function, that function and the parameters its command
+    line parses to, so that running it in process is the same as running
+    the command."""
+    functions = {}
+    for stage in stages:
+        command = stage.commands[0]
+        if len(stage.commands) != 1 or command[0] != PYTHON:
+            continue
+        module = importlib.import_module(os.path.splitext(command[1])[0].replace("/", "."))
+        if not hasattr(module, "run_stage"):
+            continue
+        params = module.main.make_context(stage.name, command[2:]).params
+        functions[stage.name] = (call_stage, {"module": module.__name__, "params": params})
+    return functions
+
+
+@click.command()
+@click.option('--stage', 'stages', type=str, multiple=True, help="Stage to bring up to date (repeatable); all stages by default")
+@click.option('--cache-dir', type=str, default=".stage_cache", help="Path to the content-addressed stage cache")
+@click.option('--force', is_flag=True, help="Run the selected stages even if they are cached")
+@click.option('--in-process', is_flag=True, help="Run the Python stages as functions in this process, independent stages concurrently")
+@click.option('--backend', type=click.Choice(["thread", "process"]), default="thread", help="Pool that runs the stages with --in-process")
+@click.option('--n-jobs', type=int, default=None, help="Number of stages run at once with --in-process")
+def main(stages, cache_dir, force, in_process, backend, n_jobs):
+    """Runs the pipeline stages whose inputs changed since they were cached."""
+    # Stage paths are relative to the project root
+    os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+    targets = list(stages) or None
+    if in_process:
+        all_stages = pipeline_stages()
+        status = run_stages_in_process(all_stages, stage_functions(all_stages), cache_dir, targets=targets,
+                                       force=force, n_jobs=n_jobs, backend=backend)
+    else:
+        status = run_stages(pipeline_stages(), cache_dir, targets=targets, force=force)
+    for name, outcome in status.items():
+        click.echo(f"{name}: {outcome}")
+
+
+if __name__ == '__main__':
+    main()
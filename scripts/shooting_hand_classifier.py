@@ -16,24 +16,50 @@ python scripts/shooting_hand_classifier.py \
     --pipeline-to=results/models \
     --plot-to=results/figures \
     --results-to=results/tables
+
+Add --param-grid=<grid.json> --n-jobs=4 to tune the logistic regression
+with a parallel cross-validated grid search, for example with the grid
+{"C": [0.01, 0.1, 1, 10], "penalty": ["l2"], "solver": ["lbfgs"],
+ "class_weight": ["balanced", null]}
+
+The feature-label predictive power check is computed natively; add
+--pps-sample-size or --pps-time-budget to run it on a stratified sample, or
+--pps-check=deepchecks to run deepchecks' FeatureLabelCorrelation instead.
+
+Add --chunksize=100000 to train out of core with SGD on chunks of the
+training data, in bounded memory.
+
+When the training data has a season column (preprocess with --keep-season),
+the model artifact also stores a training state. Add --incremental to then
+update results/models/shooter_model.npmodel with only the seasons it has
+not been trained on, instead of refitting on all of them; each version is
+also kept as shooter_model-v<version>.npmodel. Without a saved artifact,
+--incremental trains from scratch. When the training data is a
+partitioned store, an incremental update reads only the partitions of new
+seasons.
+
+Add --grid-resolution=1 to also store the model's probabilities over the
+valid weight/height domain in the model artifact, served by
+src/probability_grid.py's load_probability_grid with an error bound
+against the exact model.
+
+Add --where="season>=20002001" (repeatable) to train and test on the rows
+matching the filters; with partitioned stores, only the partitions that may
+match are read.
 '''
 
 # Imports
+# scikit-learn, matplotlib, deepchecks and the src modules are imported
+# where they are used, so that --help does not pay for them
 import click
-import pandas as pd
+import json
 import pickle
 import os
 import sys
-from deepchecks.tabular.checks import FeatureLabelCorrelation
-from deepchecks.tabular import Dataset
-from sklearn import set_config
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import make_pipeline
-from sklearn.metrics import ConfusionMatrixDisplay
 import warnings
 import logging
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from src.fit_and_evaluate_model import fit_and_evaluate_model
+from src.instrumentation import run_manifest, record_rows
 
 # Silence warnings
 warnings.filterwarnings("ignore", category=FutureWarning, module="deepchecks")
@@ -42,11 +68,38 @@ warnings.filterwarnings("ignore", category=FutureWarning, module="deepchecks")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 
-def load_data_and_preprocessor(training_data, test_data, preprocessor_path):
-    """Load training and test data, as well as the preprocessor object."""
+def load_data_and_preprocessor(training_data, test_data, preprocessor_path, chunksize=None, memory_report_to=None,
+                               filters=None, train_filters=None, preprocessed=None):
+    """Load training and test data, as well as the preprocessor object. With
+    a chunk size, only the first chunk of the training data is loaded. The
+    columns of the classify read plan are read with compact dtypes, and the
+    memory of the training data is reported. Both sets are restricted to
+    the rows matching `filters`, and the training data also to those
+    matching `train_filters`. When `preprocessed` holds the result of the
+    preprocess stage run in the same process, the data and an unfitted
+    copy of the preprocessor are taken from it instead of from the files."""
+    from sklearn.base import clone
+    from src.read_plan import read_plan, report_memory, plan_frame
+    from src.storage import read_table, iter_table
+
+    if preprocessed is not None and chunksize is None:
+        plan = read_plan("classify")
+        train_df = plan_frame(preprocessed["train"], plan, [*(filters or []), *(train_filters or [])])
+        test_df = plan_frame(preprocessed["test"], plan, filters)
+        logging.info("Data and preprocessor taken from the preprocess stage.")
+        return train_df, test_df, clone(preprocessed["preprocessor"])
+
     try:
-        train_df = pd.read_csv(training_data)
-        test_df = pd.read_csv(test_data)
+        plan = read_plan("classify", training_data)
+        train_filters = [*(filters or []), *(train_filters or [])]
+        if chunksize is not None:
+            train_df = next(iter_table(training_data, chunksize, columns=list(plan), dtypes=plan,
+                                       filters=train_filters))
+        else:
+            train_df = read_table(training_data, columns=list(plan), dtypes=plan, filters=train_filters)
+            report_memory(train_df, training_data, "classify", memory_report_to)
+        test_plan = read_plan("classify", test_data)
+        test_df = read_table(test_data, columns=list(test_plan), dtypes=test_plan, filters=filters)
         with open(preprocessor_path, "rb") as f:
             preprocessor = pickle.load(f)
         logging.info("Data and preprocessor loaded successfully.")
@@ -55,8 +108,12 @@ def load_data_and_preprocessor(training_data, test_data, preprocessor_path):
         raise FileNotFoundError(f"File not found: {e.filename}") from e
 
 
-def check_data_quality(train_df):
-    """Perform data quality checks on the training data."""
+def check_data_quality(train_df, pps_check="native", sample_size=None, time_budget=None):
+    """Perform data quality checks on the training data. The feature-label
+    predictive power check runs natively, optionally on a stratified sample,
+    or with deepchecks when `pps_check` is "deepchecks"."""
+    from src.predictive_power import PPS_THRESHOLD, feature_label_pps
+
     # Check target distribution
     target_counts = train_df["shoots_left"].value_counts().to_dict()
     left_count = target_counts.get(True, 0)
@@ -66,25 +123,49 @@ def check_data_quality(train_df):
         logging.warning("There should be more left-handed shooters than right-handed shooters.")
 
     # Feature-label correlation check
-    train_ds = Dataset(train_df, label="shoots_left", cat_features=[])
-    check_feat_lab_corr = FeatureLabelCorrelation().add_condition_feature_pps_less_than(0.9)
-    check_feat_lab_corr_result = check_feat_lab_corr.run(dataset=train_ds)
+    if pps_check == "deepchecks":
+        # Imported here so that the native check never pays for deepchecks
+        from deepchecks.tabular.checks import FeatureLabelCorrelation
+        from deepchecks.tabular import Dataset
+        train_ds = Dataset(train_df, label="shoots_left", cat_features=[])
+        check_feat_lab_corr = FeatureLabelCorrelation().add_condition_feature_pps_less_than(PPS_THRESHOLD)
+        check_feat_lab_corr_result = check_feat_lab_corr.run(dataset=train_ds)
+        passed = check_feat_lab_corr_result.passed_conditions()
+    else:
+        pps = feature_label_pps(train_df, "shoots_left", sample_size=sample_size, time_budget=time_budget)
+        logging.info("Feature-label predictive power scores:\n" + pps.to_string())
+        passed = bool((pps < PPS_THRESHOLD).all())
 
-    if not check_feat_lab_corr_result.passed_conditions():
+    if not passed:
         raise ValueError("Feature-label correlation exceeds the maximum acceptable threshold.")
     logging.info("Data quality checks passed successfully.")
 
 
-def save_outputs(logreg_fit, accuracy, results_to, pipeline_to, plot_to, X_test, y_test):
-    """Save test scores, pipeline object, and confusion matrix."""
+def save_outputs(logreg_fit, evaluation, results_to, pipeline_to, plot_to, training_state=None,
+                 grid_resolution=None):
+    """Save test scores, calibration bins, pipeline object, model artifact,
+    and confusion matrix, all from the cached evaluation. With a training
+    state, it is stored in the artifact and a copy of the artifact is kept
+    under its version number. With a grid resolution, a table of predicted
+    probabilities over the valid feature domain is also stored in the
+    artifact."""
+    import shutil
+    from matplotlib.figure import Figure
+    from sklearn.metrics import ConfusionMatrixDisplay
+    from src.model_artifact import save_artifact
+    from src.probability_grid import build_probability_grid, grid_error, grid_state
+
     # Ensure directories exist
     os.makedirs(results_to, exist_ok=True)
     os.makedirs(pipeline_to, exist_ok=True)
     os.makedirs(plot_to, exist_ok=True)
 
-    # Save accuracy scores
-    test_scores = pd.DataFrame({'accuracy': [accuracy]})
+    # Save test scores, one column per metric, and their bootstrap confidence intervals
+    scores = evaluation["scores"]
+    test_scores = scores[["value"]].T
     test_scores.to_csv(os.path.join(results_to, "test_scores.csv"), index=False)
+    scores.rename_axis("metric").to_csv(os.path.join(results_to, "test_scores_ci.csv"))
+    evaluation["calibration"].to_csv(os.path.join(results_to, "calibration.csv"), index=False)
     logging.info("Test scores saved.")
 
     # Save the pipeline
@@ -92,21 +173,45 @@ def save_outputs(logreg_fit, accuracy, results_to, pipeline_to, plot_to, X_test,
         pickle.dump(logreg_fit, f)
     logging.info("Pipeline saved.")
 
-    # Generate and save confusion matrix
-    cm = ConfusionMatrixDisplay.from_estimator(
-        logreg_fit,
-        X_test,
-        y_test,
-        values_format="d",
+    # Save the fitted parameters as a memory-mappable artifact, which scoring
+    # workers load without scikit-learn or unpickling
+    artifact_path = os.path.join(pipeline_to, "shooter_model.npmodel")
+    if training_state is not None:
+        version = training_state["metadata"]["lineage"][-1]["version"]
+        version_path = os.path.join(pipeline_to, f"shooter_model-v{version:04d}.npmodel")
+        if os.path.exists(version_path):
+            raise FileExistsError(f"{version_path} already exists; versioned artifacts are never overwritten.")
+    extra_arrays = dict((training_state or {}).get("extra_arrays", {}))
+    metadata = dict((training_state or {}).get("metadata", {}))
+    if grid_resolution is not None:
+        grid = build_probability_grid(logreg_fit, grid_resolution)
+        state = grid_state(grid)
+        extra_arrays.update(state["extra_arrays"])
+        metadata.update(state["metadata"])
+        logging.info(f"Probability grid of {grid.table.shape} points saved; error bound per lookup method "
+                     f"{grid.error_bound}, largest error at cell centres {grid_error(grid, logreg_fit):.2e}.")
+    save_artifact(logreg_fit, artifact_path, extra_arrays or None, metadata or None)
+    if training_state is not None:
+        shutil.copyfile(artifact_path, version_path)
+        logging.info(f"Model artifact version {version} saved.")
+    else:
+        logging.info("Model artifact saved.")
+
+    # Generate and save confusion matrix. It is drawn on its own Figure, not
+    # through pyplot's global state, so the stage can run on a worker thread
+    figure = Figure()
+    cm = ConfusionMatrixDisplay(
+        confusion_matrix=evaluation["confusion_matrix"],
         display_labels=["Shoots Right", "Shoots Left"]
-    )
+    ).plot(ax=figure.subplots(), values_format="d")
     # Add a title to the confusion matrix
     cm.ax_.set_title("Confusion Matrix for Shooting Hand Classification")
     cm.ax_.set_xlabel("Predicted Class")
     cm.ax_.set_ylabel("Actual Class")
     
-    cm.figure_.tight_layout()
-    cm.figure_.savefig(os.path.join(plot_to, "confusion_matrix.png"), dpi=300)
+    figure.tight_layout()
+    figure.savefig(os.path.join(plot_to, "confusion_matrix.png"), dpi=300)
+    figure.clear()
     logging.info("Confusion matrix saved.")
 
 
@@ -117,29 +222,133 @@ def save_outputs(logreg_fit, accuracy, results_to, pipeline_to, plot_to, X_test,
 @click.option('--pipeline-to', type=str, help="Path to directory where the pipeline object will be written to")
 @click.option('--plot-to', type=str, help="Path to directory where the plot will be written to")
 @click.option('--results-to', type=str, help="Path to directory where the scores will be written to")
-def main(training_data, test_data, preprocessor, pipeline_to, plot_to, results_to):
+@click.option('--param-grid', type=str, default=None, help="Path to a JSON hyperparameter grid; runs a cross-validated search when given")
+@click.option('--cv', type=int, default=5, help="Number of cross-validation folds for the hyperparameter search")
+@click.option('--n-jobs', type=int, default=None, help="Number of worker processes for the hyperparameter search")
+@click.option('--pps-check', type=click.Choice(["native", "deepchecks"]), default="native", help="Implementation of the feature-label predictive power check")
+@click.option('--pps-sample-size', type=int, default=None, help="Run the native predictive power check on a stratified sample of this many rows")
+@click.option('--pps-time-budget', type=float, default=None, help="Seconds the native predictive power check may spend, growing its stratified sample until then")
+@click.option('--n-bootstrap', type=int, default=1000, help="Number of bootstrap resamples for the confidence intervals of the test scores")
+@click.option('--chunksize', type=int, default=None, help="Train out of core on chunks of this many training rows with SGD")
+@click.option('--max-epochs', type=int, default=20, help="Maximum number of passes over the training data when training out of core")
+@click.option('--incremental', is_flag=True, help="Update the saved model artifact with the seasons it has not been trained on instead of refitting")
+@click.option('--where', type=str, multiple=True, help="Filter on the training and test rows, such as season>=20002001; may be repeated")
+@click.option('--grid-resolution', type=float, default=None, help="Also store predicted probabilities over the valid weight/height domain in the model artifact, at points this many kg/cm apart")
+@click.option('--replay-size', type=int, default=10_000, help="Number of past training rows kept in the artifact and replayed by incremental updates")
+@click.option('--manifest-to', type=str, default="results/manifests", help="Directory where the stage's performance manifest is written")
+@click.option('--profile', is_flag=True, help="Also write a cProfile dump of the stage next to its manifest")
+@click.option('--trace-memory', is_flag=True, help="Record the peak Python memory of each step with tracemalloc (slower)")
+def main(training_data, test_data, preprocessor, pipeline_to, plot_to, results_to, param_grid, cv, n_jobs,
+         pps_check, pps_sample_size, pps_time_budget, n_bootstrap, chunksize, max_epochs,
+         incremental, where, grid_resolution, replay_size, manifest_to, profile, trace_memory):
     """
     Main function to train a logistic regression model on shooting hand data.
     """
-    set_config(transform_output="pandas")
+    run_stage(training_data, test_data, preprocessor, pipeline_to, plot_to, results_to, param_grid, cv, n_jobs,
+              pps_check, pps_sample_size, pps_time_budget, n_bootstrap, chunksize, max_epochs,
+              incremental, where, grid_resolution, replay_size, manifest_to, profile, trace_memory)
+
+
+def run_stage(training_data, test_data, preprocessor, pipeline_to, plot_to, results_to, param_grid=None, cv=5,
+              n_jobs=None, pps_check="native", pps_sample_size=None, pps_time_budget=None, n_bootstrap=1000,
+              chunksize=None, max_epochs=20, incremental=False, where=(), grid_resolution=None,
+              replay_size=10_000, manifest_to="results/manifests", profile=False, trace_memory=False, inputs=None):
+    """
+    Run the classify stage with the parameters of `main`. When `inputs`
+    holds the result of the preprocess stage run in the same process, its
+    splits and preprocessor are used instead of reading the files.
+    """
+    from sklearn import set_config
+    from src.fit_and_evaluate_model import fit_and_evaluate_model
+    from src.fit_streaming_model import fit_streaming_model
+    from src.search_hyperparameters import search_hyperparameters
+    from src.evaluate_predictions import evaluate_predictions
+    from src.incremental_model import training_state, trained_seasons, update_model
+    from src.partitioned_store import parse_filter
+
+    with run_manifest("classify", manifest_to, profile=profile, trace_memory=trace_memory):
+        set_config(transform_output="pandas")
+
+        if chunksize is not None and param_grid is not None:
+            raise click.UsageError("--param-grid needs the whole training set and cannot be used with --chunksize.")
+        if incremental and (chunksize is not None or param_grid is not None):
+            raise click.UsageError("--incremental cannot be used with --chunksize or --param-grid.")
+
+        # Load data and preprocessor; an incremental update reads only the rows of seasons not yet trained on
+        filters = [parse_filter(text) for text in where]
+        artifact_path = os.path.join(pipeline_to, "shooter_model.npmodel")
+        if incremental and not os.path.exists(artifact_path):
+            logging.warning(f"There is no model artifact at {artifact_path} to update; training from scratch.")
+            incremental = False
+        train_filters = [("season", "not in", trained_seasons(artifact_path))] if incremental else None
+        train_df, test_df, preprocessor = load_data_and_preprocessor(training_data, test_data, preprocessor, chunksize,
+                                                                     manifest_to, filters, train_filters,
+                                                                     (inputs or {}).get("preprocess"))
+        if chunksize is None:
+            record_rows(rows_in=len(train_df))
 
-    # Load data and preprocessor
-    train_df, test_df, preprocessor = load_data_and_preprocessor(training_data, test_data, preprocessor)
+        # Use the season counts of collapsed player records as sample weights
+        sample_weight = train_df.pop("sample_weight") if "sample_weight" in train_df else None
+        test_df = test_df.drop(columns=["sample_weight"], errors="ignore")
+        # Seasons are not a feature; they tell incremental updates which rows are new
+        seasons = train_df.pop("season") if "season" in train_df else None
+        test_df = test_df.drop(columns=["season"], errors="ignore")
+        if incremental and seasons is None:
+            raise click.UsageError("--incremental needs a season column; preprocess with --keep-season.")
+        if incremental and train_df.empty:
+            logging.info("No new seasons since the saved model artifact; it is unchanged.")
+            return
 
-    # Check data quality
-    check_data_quality(train_df)
+        # Check data quality, on the first chunk when training out of core
+        check_data_quality(train_df, pps_check, pps_sample_size, pps_time_budget)
 
-    # Prepare data
-    X_train = train_df.drop(columns=["shoots_left"])
-    X_test = test_df.drop(columns=["shoots_left"])
-    y_train = train_df["shoots_left"]
-    y_test = test_df["shoots_left"]
+        # Prepare data
+        X_train = train_df.drop(columns=["shoots_left"])
+        X_test = test_df.drop(columns=["shoots_left"])
+        y_train = train_df["shoots_left"]
+        y_test = test_df["shoots_left"]
 
-    # Fit and evaluate model
-    logreg_fit, accuracy = fit_and_evaluate_model(X_train, y_train, X_test, y_test, preprocessor)
+        # Fit and evaluate model, tuning the hyperparameters if a grid is given
+        evaluation, state = None, None
+        if incremental:
+            logreg_fit, state = update_model(artifact_path, X_train, y_train, seasons, sample_weight,
+                                             replay_size=replay_size)
+            if state is None:
+                logging.info("No new seasons since the saved model artifact; it is unchanged.")
+                return
+            logging.info(f"Model updated with seasons {state['metadata']['lineage'][-1]['seasons_added']}.")
+        elif chunksize is not None:
+            logreg_fit, history = fit_streaming_model(training_data, preprocessor, chunksize=chunksize,
+                                                      max_epochs=max_epochs, filters=filters)
+            os.makedirs(results_to, exist_ok=True)
+            history.to_csv(os.path.join(results_to, "training_history.csv"), index=False)
+            logging.info(f"Trained out of core for {len(history)} epochs, final loss {history['loss'].iloc[-1]:.4f}.")
+        elif param_grid is not None:
+            if sample_weight is not None:
+                logging.warning("Sample weights are not used by the hyperparameter search.")
+            with open(param_grid) as f:
+                grid = json.load(f)
+            logreg_fit, _, cv_results = search_hyperparameters(
+                X_train, y_train, X_test, y_test, preprocessor, grid, cv=cv, n_jobs=n_jobs
+            )
+            os.makedirs(results_to, exist_ok=True)
+            cv_results.to_csv(os.path.join(results_to, "cv_results.csv"), index=False)
+            logging.info("Hyperparameter search results saved.")
+        else:
+            logreg_fit, evaluation = fit_and_evaluate_model(X_train, y_train, X_test, y_test, preprocessor,
+                                                            sample_weight=sample_weight, return_evaluation=True,
+                                                            n_bootstrap=n_bootstrap)
+        if seasons is not None and state is None and chunksize is None:
+            state = training_state(logreg_fit, X_train, y_train, seasons,
+                                   sample_weight if param_grid is None else None, replay_size=replay_size,
+                                   parent_path=artifact_path)
+        if evaluation is None:
+            evaluation = evaluate_predictions(y_test == logreg_fit.classes_[1], logreg_fit.predict_proba(X_test)[:, 1],
+                                              n_bootstrap=n_bootstrap)
+        logging.info("Test scores:\n" + evaluation["scores"].to_string())
 
-    # Save outputs
-    save_outputs(logreg_fit, accuracy, results_to, pipeline_to, plot_to, X_test, y_test)
+        # Save outputs
+        save_outputs(logreg_fit, evaluation, results_to, pipeline_to, plot_to, state, grid_resolution)
 
 
 if __name__ == '__main__':
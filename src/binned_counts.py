@@ -0,0 +1,109 @@
+import math
+import numpy as np
+import pandas as pd
+from src.instrumentation import instrumented
+
+# Tolerance Vega uses when assigning values to bins
+BIN_EPSILON = 1e-14
+
+
+def nice_bins(start: float, stop: float, maxbins: int = 10) -> tuple:
+    """Return the (start, stop, step) of the bins Vega-Lite would choose for
+    data spanning [start, stop] with its default `bin` parameters, so that
+    pre-binned charts show the same bars as charts binned at render time.
+
+    Parameters
+    ----------
+    start : float
+        Minimum of the data.
+    stop : float
+        Maximum of the data.
+    maxbins : int, optional
+        Maximum number of bins, by default 10
+
+    Returns
+    -------
+    tuple
+        Start, stop and width of the bins.
+    """
+    span = (stop - start) or abs(start) or 1.0
+    level = math.ceil(math.log(maxbins) / math.log(10))
+    # Round half up like JavaScript's Math.round
+    step = 10.0 ** (math.floor(math.log(span) / math.log(10) + 0.5) - level)
+    while math.ceil(span / step) > maxbins:
+        step *= 10
+    for divisor in (5, 2):
+        if span / (step / divisor) <= maxbins:
+            step /= divisor
+
+    # Snap the extent outward to multiples of the step
+    log_step = math.log(step) / math.log(10)
+    precision = 0 if log_step >= 0 else int(-log_step) + 1
+    eps = 10.0 ** (-precision - 1)
+    nice_start = math.floor(start / step + eps) * step
+    nice_start = nice_start - step if start < nice_start else nice_start
+    nice_stop = math.ceil(stop / step) * step
+    if nice_stop == nice_start:
+        nice_stop = nice_start + step
+    return nice_start, nice_stop, step
+
+
+@instrumented
+def binned_counts(df: pd.DataFrame, column: str, by: str, maxbins: int = 10) -> pd.DataFrame:
+    """Function to count the rows of `df` per bin of `column` and per value
+    of `by` with NumPy, so a histogram can be charted from one row per bar
+    instead of one row per observation.
+
+    The bins are shared by every group and match those Vega-Lite chooses
+    when it bins the raw column itself.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data to bin.
+    column : str
+        Numeric column to bin.
+    by : str
+        Column whose values are counted separately, e.g. `shoots_left`.
+    maxbins : int, optional
+        Maximum number of bins, by default 10
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns `by`, `bin_start`, `bin_end` and `count`, with one row per
+        group and non-empty bin.
+
+    Raises
+    ------
+    TypeError
+        The input is not a Pandas DataFrame
+    ValueError
+        A column is missing
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("The input must be of type Pandas DataFrame.")
+    missing = [name for name in (column, by) if name not in df.columns]
+    if missing:
+        raise ValueError(f"Columns missing from the data: {missing}")
+
+    values = df[column].to_numpy(dtype=np.float64)
+    present = ~np.isnan(values)
+    values = values[present]
+    groups, labels = pd.factorize(df[by].to_numpy()[present], sort=True)
+    if len(values) == 0:
+        return pd.DataFrame({by: labels[:0], "bin_start": [], "bin_end": [], "count": []})
+
+    start, stop, step = nice_bins(values.min(), values.max(), maxbins)
+    n_bins = max(int(round((stop - start) / step)), 1)
+    clipped = np.clip(values, start, stop - step)
+    bins = np.floor(BIN_EPSILON + (clipped - start) / step).astype(np.int64)
+
+    counts = np.bincount(groups * n_bins + bins, minlength=len(labels) * n_bins)
+    group_index, bin_index = np.divmod(np.flatnonzero(counts), n_bins)
+    return pd.DataFrame({
+        by: labels[group_index],
+        "bin_start": start + bin_index * step,
+        "bin_end": start + (bin_index + 1) * step,
+        "count": counts[counts > 0]
+    })
@@ -1,15 +1,22 @@
 import os
 import pandas as pd
+from src.running_stats import RunningStats
+from src.instrumentation import instrumented
 
 
+@instrumented
 def check_eda(train_df, path_for_tables):
     """Function reads in data, creates 3 tables of EDA (info, describe, head)
     and saves tables as CSVs in specified directory.
 
+    The tables are built in a single pass by a `RunningStats` accumulator.
+    An accumulator that has already been filled chunk by chunk, or merged
+    from partial results, can be passed instead of a dataframe.
+
     Parameters
     ----------
-    train_df : pd.Dataframe
-        Pandas dataframe.
+    train_df : pd.Dataframe or RunningStats
+        Pandas dataframe, or statistics accumulated from it.
     path_for_tables : str
         The location to save the CSVs to.
         
@@ -23,18 +30,18 @@ def check_eda(train_df, path_for_tables):
         Created dataframes are empty
     """
     
-    if not isinstance(train_df, pd.DataFrame) or not isinstance(path_for_tables, str):
+    if not isinstance(train_df, (pd.DataFrame, RunningStats)) or not isinstance(path_for_tables, str):
         raise TypeError("Inputs must be a dataframe and a string.")
+
+    if isinstance(train_df, RunningStats):
+        stats = train_df
+    else:
+        stats = RunningStats().update(train_df)
     
     # Create info lookalike dataframe
-    info = pd.DataFrame({
-        "name": train_df.columns,
-        "non-nulls": len(train_df)-train_df.isnull().sum().values,
-        "nulls": train_df.isnull().sum().values,
-        "type": train_df.dtypes.values
-    })
-    describe = train_df.describe()
-    head = train_df.head()
+    info = stats.info()
+    describe = stats.describe()
+    head = stats.head()
     
     if not os.path.exists(path_for_tables):
         raise FileNotFoundError("Directory does not exist.")
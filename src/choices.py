@@ -0,0 +1,11 @@
+# Values accepted by the stage scripts' options. They live here, without
+# pandas, so that a script's --help does not import the modules using them
+
+# Aggregations supported for each collapsed column
+AGGREGATIONS = ["mean", "median", "first", "last"]
+
+# Ways of assigning rows to the train and test splits
+SPLITS = ["random", "player"]
+
+# Columns a store may be partitioned by, in directory nesting order
+PARTITION_COLUMNS = ["season", "team_code"]
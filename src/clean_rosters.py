@@ -0,0 +1,127 @@
+import pandas as pd
+import pandera as pa
+from src.instrumentation import instrumented
+
+
+# Columns expected in the raw NHL roster data
+COLUMN_NAMES = [
+    'team_code',
+    'season',
+    'position_type',
+    'player_id',
+    'headshot',
+    'first_name',
+    'last_name',
+    'sweater_number',
+    'position_code',
+    'shoots_catches',
+    'height_in_inches',
+    'weight_in_pounds',
+    'height_in_centimeters',
+    'weight_in_kilograms',
+    'birth_date',
+    'birth_city',
+    'birth_country',
+    'birth_state_province'
+]
+
+# Fixed dtypes for the raw columns so that every chunk of a streamed read
+# is parsed the same way, whatever values that chunk happens to contain
+RAW_DTYPES = {
+    'team_code': object,
+    'season': 'int64',
+    'position_type': object,
+    'player_id': 'int64',
+    'headshot': object,
+    'first_name': object,
+    'last_name': object,
+    'sweater_number': 'float64',
+    'position_code': object,
+    'shoots_catches': object,
+    'height_in_inches': 'float64',
+    'weight_in_pounds': 'float64',
+    'height_in_centimeters': 'float64',
+    'weight_in_kilograms': 'float64',
+    'birth_date': object,
+    'birth_city': object,
+    'birth_country': object,
+    'birth_state_province': object
+}
+
+# Columns and dtypes of the processed data; measurements are whole
+# kilograms and centimetres, which float32 holds exactly
+PROCESSED_DTYPES = {
+    "weight_in_kilograms": "float32",
+    "height_in_centimeters": "float32",
+    "shoots_left": bool
+}
+
+# Columns and dtypes of the rows rejected by validation
+QUARANTINE_DTYPES = {
+    **PROCESSED_DTYPES,
+    "failed_checks": "string"
+}
+
+# Valid range of each feature, inclusive; rows outside it fail validation
+FEATURE_RANGES = {
+    "weight_in_kilograms": (55, 125),
+    "height_in_centimeters": (155, 210)
+}
+
+# Data validation schema for the processed data
+roster_schema = pa.DataFrameSchema(
+    {
+        "weight_in_kilograms": pa.Column("float32", pa.Check.between(*FEATURE_RANGES["weight_in_kilograms"]),
+                                         nullable=False),
+        "height_in_centimeters": pa.Column("float32", pa.Check.between(*FEATURE_RANGES["height_in_centimeters"]),
+                                           nullable=False),
+        "shoots_left": pa.Column(bool, pa.Check.isin([True, False]), nullable=False)
+    }
+)
+
+
+@instrumented
+def clean_rosters(rosters: pd.DataFrame, keep: list = None) -> pd.DataFrame:
+    """Function to reduce deduplicated raw roster records to the model
+    features and a binary target column.
+
+    Parameters
+    ----------
+    rosters : pd.DataFrame
+        Raw roster records, already deduplicated.
+    keep : list, optional
+        Extra columns to carry through unchanged, by default none.
+
+    Returns
+    -------
+    pd.DataFrame
+        Records with the float32 weight and height features and a boolean
+        `shoots_left` target (followed by any `keep` columns), with missing
+        observations removed.
+
+    Raises
+    ------
+    TypeError
+        The input is not a Pandas DataFrame
+    """
+    if not isinstance(rosters, pd.DataFrame):
+        raise TypeError("The input must be of type Pandas DataFrame.")
+
+    rosters_clean = rosters[[
+        "weight_in_kilograms",
+        "height_in_centimeters",
+        "shoots_catches",
+        *(keep or [])
+    ]]
+    rosters_clean = rosters_clean.dropna()
+
+    # Data Validation: Check for Empty Observations
+    assert not rosters_clean.isnull().values.any(), "Data Validation: There are empty observations!"
+
+    # Convert target column to binary with shoots left as 1 and shoots right as 0
+    # built directly, so it does not depend on how `replace` downcasts categoricals
+    rosters_clean = rosters_clean.assign(
+        shoots_left=rosters_clean["shoots_catches"].astype(str).eq("L")
+    )
+    rosters_clean = rosters_clean.drop("shoots_catches", axis=1)
+    return rosters_clean[[*PROCESSED_DTYPES, *(keep or [])]].astype(PROCESSED_DTYPES)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from src.choices import AGGREGATIONS
+from src.instrumentation import instrumented
+
+
+@instrumented
+def collapse_players(rosters: pd.DataFrame, aggregation="median") -> pd.DataFrame:
+    """Function to collapse the season rows of each player into a single
+    record, with the number of seasons kept as a sample weight.
+
+    Players are mapped to a compact integer index with `pd.factorize` and
+    the rows are ordered by player and season once, so every aggregation is
+    a grouped reduction over contiguous integer codes. "first" and "last"
+    refer to the player's earliest and latest season.
+
+    Parameters
+    ----------
+    rosters : pd.DataFrame
+        Roster records with `player_id`, `season`, `weight_in_kilograms`,
+        `height_in_centimeters` and `shoots_catches` columns.
+    aggregation : str or dict, optional
+        Aggregation for the weight and height ("mean", "median", "first" or
+        "last"), or a dict mapping column names to aggregations to override
+        the defaults, by default "median". The shooting hand is taken from
+        the latest season unless overridden.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per player with `player_id`, the aggregated columns and a
+        `sample_weight` column holding the number of distinct seasons.
+
+    Raises
+    ------
+    TypeError
+        The input is not a Pandas DataFrame
+    ValueError
+        A required column is missing or an aggregation is not supported
+    """
+    if not isinstance(rosters, pd.DataFrame):
+        raise TypeError("The input must be of type Pandas DataFrame.")
+
+    aggregations = {
+        "weight_in_kilograms": aggregation if isinstance(aggregation, str) else "median",
+        "height_in_centimeters": aggregation if isinstance(aggregation, str) else "median",
+        "shoots_catches": "last"
+    }
+    if isinstance(aggregation, dict):
+        aggregations.update(aggregation)
+
+    missing = [column for column in ["player_id", "season", *aggregations] if column not in rosters.columns]
+    if missing:
+        raise ValueError(f"Columns missing from the rosters: {missing}")
+    unsupported = [agg for agg in aggregations.values() if agg not in AGGREGATIONS]
+    if unsupported:
+        raise ValueError(f"Unsupported aggregation {unsupported}. Expected one of {AGGREGATIONS}.")
+
+    codes, player_ids = pd.factorize(rosters["player_id"], sort=True)
+    codes = codes.astype(np.int32)
+    order = np.lexsort((rosters["season"].to_numpy(), codes))
+    ordered = rosters.iloc[order]
+    groups = ordered.groupby(codes[order], sort=True)
+
+    collapsed = pd.DataFrame({"player_id": player_ids})
+    for column, agg in aggregations.items():
+        collapsed[column] = groups[column].agg(agg).to_numpy()
+
+    # Count each season once even if the player changed teams during it
+    seasons = ordered[["season"]].assign(code=codes[order]).drop_duplicates()
+    collapsed["sample_weight"] = np.bincount(seasons["code"], minlength=len(player_ids))
+    return collapsed
@@ -0,0 +1,97 @@
+import numpy as np
+from sklearn.base import BaseEstimator
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from src.instrumentation import instrumented
+from src.linear_predictor import LinearPredictor
+
+
+def _scaling(step: BaseEstimator):
+    """Return the feature names, shift and scale of a fitted preprocessing
+    step made only of standard scaling, so that it maps x to
+    (x - shift) / scale."""
+    if isinstance(step, StandardScaler):
+        n_features = step.n_features_in_
+        names = getattr(step, "feature_names_in_", [f"x{i}" for i in range(n_features)])
+        shift = step.mean_ if step.with_mean else np.zeros(n_features)
+        scale = step.scale_ if step.with_std else np.ones(n_features)
+        return list(names), np.asarray(shift, dtype=float), np.asarray(scale, dtype=float)
+
+    if isinstance(step, Pipeline):
+        names, shift, scale = None, None, None
+        for _, inner in step.steps:
+            inner_names, inner_shift, inner_scale = _scaling(inner)
+            if names is None:
+                names, shift, scale = inner_names, inner_shift, inner_scale
+            else:
+                # (((x - a) / b) - c) / d == (x - (a + c * b)) / (b * d)
+                shift = shift + inner_shift * scale
+                scale = scale * inner_scale
+        return names, shift, scale
+
+    if isinstance(step, ColumnTransformer):
+        names, shifts, scales = [], [], []
+        for name, transformer, columns in step.transformers_:
+            if name == "remainder" and transformer == "drop":
+                continue
+            _, shift, scale = _scaling(transformer)
+            names.extend(columns)
+            shifts.append(shift)
+            scales.append(scale)
+        return names, np.concatenate(shifts), np.concatenate(scales)
+
+    raise TypeError(f"Cannot compile preprocessing step of type {type(step).__name__}.")
+
+
+def _is_logistic(model: BaseEstimator) -> bool:
+    """Return True for a logistic regression, including one fitted by SGD
+    with log loss."""
+    return isinstance(model, LogisticRegression) or (
+        isinstance(model, SGDClassifier) and model.loss == "log_loss"
+    )
+
+
+@instrumented
+def compile_predictor(pipeline: Pipeline) -> LinearPredictor:
+    """Function to turn a fitted pipeline of standard scaling followed by a
+    binary logistic regression into a `LinearPredictor`.
+
+    The scaler statistics are folded into the logistic coefficients:
+    w . (x - mean) / scale + b == (w / scale) . x + (b - w . mean / scale).
+    Predictions match the pipeline exactly and probabilities match it up
+    to floating point rounding.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline whose last step is a binary LogisticRegression (or
+        an SGDClassifier with log loss) and
+        whose earlier steps (at least one) only apply standard scaling.
+
+    Returns
+    -------
+    LinearPredictor
+        The compiled predictor.
+
+    Raises
+    ------
+    TypeError
+        The pipeline is not a Pipeline ending in a LogisticRegression, or a
+        preprocessing step is not standard scaling
+    ValueError
+        The logistic regression is not a binary classifier
+    """
+    if (not isinstance(pipeline, Pipeline) or len(pipeline.steps) < 2
+            or not _is_logistic(pipeline.steps[-1][1])):
+        raise TypeError("pipeline must be a Pipeline ending in a LogisticRegression.")
+    logreg = pipeline.steps[-1][1]
+    if len(logreg.classes_) != 2:
+        raise ValueError("Only binary logistic regression can be compiled.")
+
+    names, shift, scale = _scaling(Pipeline(pipeline.steps[:-1]))
+    weights = logreg.coef_[0]
+    coef = weights / scale
+    intercept = logreg.intercept_[0] - np.dot(coef, shift)
+    return LinearPredictor(names, logreg.classes_, coef, intercept)
@@ -0,0 +1,110 @@
+import json
+import os
+import requests
+from src.instrumentation import instrumented
+
+
+def _read_metadata(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_metadata(path: str, metadata: dict):
+    with open(path + ".tmp", "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+@instrumented
+def download_file(url: str, directory: str, chunk_size: int = 1 << 20, timeout: float = 60) -> str:
+    """Function to download a file from the given URL into the specified
+    directory in a single streamed transfer.
+
+    The response body is written straight to `<filename>.part` and renamed
+    once complete. The ETag and Last-Modified headers are kept in
+    `<filename>.meta.json`. When the file is already present, the request
+    is sent with If-None-Match/If-Modified-Since, so an unchanged upstream
+    file costs one round-trip and no transfer. When a `.part` file is left
+    over from an interrupted download, the rest is requested with a Range
+    request, guarded by If-Range so a changed upstream file is fetched
+    again from the start.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the file to download.
+    directory : str
+        The directory where the file is saved, under the last component of
+        the URL.
+    chunk_size : int, optional
+        Number of bytes written per block, by default 1 MiB
+    timeout : float, optional
+        Seconds to wait for the server to respond, by default 60
+
+    Returns
+    -------
+    str
+        "downloaded", "resumed" or "not-modified".
+
+    Raises
+    ------
+    ValueError
+        The directory does not exist or the URL does not exist
+    """
+    # check if the directory exists, if not raise an error
+    if not os.path.isdir(directory):
+        raise ValueError('The directory provided does not exist.')
+
+    path_to_file = os.path.join(directory, os.path.basename(url))
+    part_path = path_to_file + ".part"
+    metadata_path = path_to_file + ".meta.json"
+    metadata = _read_metadata(metadata_path)
+    if metadata.get("url") != url:
+        metadata = {}
+    validator = metadata.get("etag") or metadata.get("last_modified")
+
+    # Byte ranges only line up with the stored file without content encoding
+    headers = {"Accept-Encoding": "identity"}
+    resume_from = 0
+    if os.path.exists(part_path) and validator:
+        resume_from = os.path.getsize(part_path)
+        headers["Range"] = f"bytes={resume_from}-"
+        headers["If-Range"] = validator
+    elif os.path.exists(path_to_file) and metadata.get("complete"):
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+    with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return "not-modified"
+
+        if response.status_code == 416 and resume_from:
+            # The partial file does not fit the upstream file; start over
+            os.remove(part_path)
+            return download_file(url, directory, chunk_size, timeout)
+
+        # check if URL exists, if not raise an error
+        if response.status_code not in (200, 206):
+            raise ValueError('The URL provided does not exist.')
+
+        resumed = response.status_code == 206
+        metadata = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "complete": False
+        }
+        _write_metadata(metadata_path, metadata)
+
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for block in response.iter_content(chunk_size=chunk_size):
+                f.write(block)
+
+    os.replace(part_path, path_to_file)
+    metadata["complete"] = True
+    _write_metadata(metadata_path, metadata)
+    return "resumed" if resumed else "downloaded"
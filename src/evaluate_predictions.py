@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from src.instrumentation import instrumented
+
+# Metrics computed for every evaluation, in the order they are reported
+METRICS = ["accuracy", "balanced_accuracy", "roc_auc", "pr_auc", "log_loss"]
+
+# Upper bound on bootstrap weights held in memory at once
+MAX_BOOTSTRAP_CELLS = 1 << 22
+
+
+def _weighted_metrics(weights: np.ndarray, y: np.ndarray, proba: np.ndarray, threshold: float) -> dict:
+    """Compute every metric for each row of a (resamples, rows) matrix of
+    row weights; a bootstrap resample weighs each row by the number of
+    times it was drawn.
+
+    The scores are sorted once and tied scores are grouped, so ROC AUC and
+    average precision reduce to cumulative sums over the groups.
+    """
+    positive = y == 1
+    predicted = proba > threshold
+    total = weights.sum(axis=1)
+    n_positive = weights @ positive
+    n_negative = total - n_positive
+    true_positive = weights @ (positive & predicted)
+    true_negative = weights @ (~positive & ~predicted)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = {
+            "accuracy": (true_positive + true_negative) / total,
+            "balanced_accuracy": (true_positive / n_positive + true_negative / n_negative) / 2
+        }
+
+        clipped = np.clip(proba, 1e-15, 1 - 1e-15)
+        metrics["log_loss"] = -(weights @ np.where(positive, np.log(clipped), np.log1p(-clipped))) / total
+
+        # Weight of the positives and negatives at each distinct score, highest first
+        order = np.argsort(-proba, kind="stable")
+        scores = proba[order]
+        starts = np.flatnonzero(np.r_[True, scores[1:] != scores[:-1]])
+        sorted_weights = weights[:, order]
+        group_positive = np.add.reduceat(sorted_weights * positive[order], starts, axis=1)
+        group_negative = np.add.reduceat(sorted_weights * ~positive[order], starts, axis=1)
+
+        # Each positive outranks the negatives below its score and ties with half of its group
+        negatives_below = n_negative[:, None] - np.cumsum(group_negative, axis=1)
+        metrics["roc_auc"] = (group_positive * (negatives_below + group_negative / 2)).sum(axis=1) / (n_positive * n_negative)
+
+        # Average precision: precision at each threshold weighted by the recall gained
+        cumulative_positive = np.cumsum(group_positive, axis=1)
+        precision = cumulative_positive / (cumulative_positive + np.cumsum(group_negative, axis=1))
+        metrics["pr_auc"] = np.nansum(precision * group_positive, axis=1) / n_positive
+
+    metrics["roc_auc"][(n_positive == 0) | (n_negative == 0)] = np.nan
+    metrics["pr_auc"][n_positive == 0] = np.nan
+    return {name: metrics[name] for name in METRICS}
+
+
+@instrumented
+def evaluate_predictions(
+    y_true,
+    proba,
+    threshold: float = 0.5,
+    n_bootstrap: int = 1000,
+    confidence: float = 0.95,
+    n_bins: int = 10,
+    random_state: int = 123
+) -> dict:
+    """Function to evaluate binary predicted probabilities in one pass.
+
+    Every metric, the confusion matrix and the calibration bins are computed
+    from the same array of probabilities, so the model only has to predict
+    on the test set once. Bootstrap confidence intervals are computed by
+    drawing all resamples as one matrix of row indices, turned into row
+    counts with a single `np.bincount`, and evaluating every resample at
+    once as a weighted version of the test set. Resamples are processed in
+    blocks to bound memory.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True labels, with 1 or True for the positive class.
+    proba : array-like
+        Predicted probability of the positive class.
+    threshold : float, optional
+        Probability above which the positive class is predicted, matching
+        `predict` of a logistic regression, by default 0.5
+    n_bootstrap : int, optional
+        Number of bootstrap resamples; 0 skips the confidence intervals,
+        by default 1000
+    confidence : float, optional
+        Coverage of the percentile confidence intervals, by default 0.95
+    n_bins : int, optional
+        Number of equal-width calibration bins, by default 10
+    random_state : int, optional
+        Seed for the bootstrap resamples, by default 123
+
+    Returns
+    -------
+    dict
+        `scores`: pd.DataFrame with the `value`, `ci_lower` and `ci_upper`
+        of each metric, indexed by metric name;
+        `confusion_matrix`: 2x2 np.ndarray with true classes as rows and
+        predicted classes as columns, negative class first;
+        `calibration`: pd.DataFrame with the `bin_start`, `bin_end`,
+        `mean_predicted`, `fraction_positive` and `count` of each non-empty
+        bin.
+
+    Raises
+    ------
+    ValueError
+        The inputs are empty or of different lengths, or the confidence
+        is not between 0 and 1
+    """
+    y = np.asarray(y_true).astype(np.int8).ravel()
+    proba = np.asarray(proba, dtype=np.float64).ravel()
+    if len(y) == 0 or len(y) != len(proba):
+        raise ValueError("y_true and proba must be non-empty and of the same length.")
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1.")
+
+    n = len(y)
+    point = _weighted_metrics(np.ones((1, n)), y, proba, threshold)
+    scores = pd.DataFrame({"value": [point[name][0] for name in METRICS]}, index=METRICS)
+    scores["ci_lower"] = np.nan
+    scores["ci_upper"] = np.nan
+
+    if n_bootstrap > 0:
+        rng = np.random.default_rng(random_state)
+        block = max(1, MAX_BOOTSTRAP_CELLS // n)
+        resampled = {name: [] for name in METRICS}
+        for start in range(0, n_bootstrap, block):
+            size = min(block, n_bootstrap - start)
+            indices = rng.integers(0, n, size=(size, n))
+            counts = np.bincount((indices + n * np.arange(size)[:, None]).ravel(), minlength=size * n)
+            for name, values in _weighted_metrics(counts.reshape(size, n).astype(np.float64), y, proba, threshold).items():
+                resampled[name].append(values)
+        tail = (1 - confidence) / 2 * 100
+        for name in METRICS:
+            values = np.concatenate(resampled[name])
+            scores.loc[name, ["ci_lower", "ci_upper"]] = np.nanpercentile(values, [tail, 100 - tail])
+
+    predicted = (proba > threshold).astype(np.int8)
+    confusion_matrix = np.bincount(2 * y + predicted, minlength=4).reshape(2, 2)
+
+    edges = np.linspace(0, 1, n_bins + 1)
+    bins = np.clip(np.searchsorted(edges, proba, side="right") - 1, 0, n_bins - 1)
+    count = np.bincount(bins, minlength=n_bins)
+    filled = count > 0
+    calibration = pd.DataFrame({
+        "bin_start": edges[:-1][filled],
+        "bin_end": edges[1:][filled],
+        "mean_predicted": np.bincount(bins, weights=proba, minlength=n_bins)[filled] / count[filled],
+        "fraction_positive": np.bincount(bins, weights=y, minlength=n_bins)[filled] / count[filled],
+        "count": count[filled]
+    })
+
+    return {"scores": scores, "confusion_matrix": confusion_matrix, "calibration": calibration}
@@ -1,21 +1,29 @@
+import numpy as np
 import pandas as pd
 from sklearn.pipeline import make_pipeline
 from sklearn.linear_model import LogisticRegression
 from sklearn.base import BaseEstimator
-from typing import Tuple
+from typing import Tuple, Union
+from src.evaluate_predictions import evaluate_predictions
+from src.instrumentation import instrumented
 
 
+@instrumented
 def fit_and_evaluate_model(
     X_train: pd.DataFrame,
     y_train: pd.Series,
     X_test: pd.DataFrame,
     y_test: pd.Series,
-    preprocessor: BaseEstimator
-) -> Tuple[BaseEstimator, float]:
+    preprocessor: BaseEstimator,
+    logreg_params: dict = None,
+    sample_weight: pd.Series = None,
+    return_evaluation: bool = False,
+    n_bootstrap: int = 1000
+) -> Tuple[BaseEstimator, Union[float, dict]]:
     """
     Function to fit a logistic regression pipeline on training data,
     evaluate its performance on test data, and return the trained
-    pipeline and accuracy score.
+    pipeline and its accuracy score, or its full evaluation.
 
     Parameters
     ----------
@@ -29,13 +37,69 @@ def fit_and_evaluate_model(
         Target labels for testing.
     preprocessor : sklearn.base.BaseEstimator
         Preprocessing pipeline to be applied to the data.
+    logreg_params : dict, optional
+        Hyperparameters passed to LogisticRegression, overriding the
+        defaults of random_state=123 and class_weight="balanced".
+    sample_weight : pd.Series, optional
+        Weight of each training row, for example the number of seasons of
+        a collapsed player record. By default all rows weigh the same.
+    return_evaluation : bool, optional
+        Return the full evaluation of `evaluate_predictions` instead of the
+        accuracy, computed from a single `predict_proba` call on the test
+        set, by default False
+    n_bootstrap : int, optional
+        Number of bootstrap resamples for the confidence intervals of the
+        full evaluation, by default 1000
 
     Returns
     -------
     pipeline : sklearn.pipeline.Pipeline
         Trained pipeline with preprocessing and logistic regression.
-    accuracy : float
-        Accuracy score of the model on the test set.
+    accuracy : float or dict
+        Accuracy score of the model on the test set as a float. With
+        `return_evaluation`, the dict returned by `evaluate_predictions`
+        instead: the scores, confusion matrix and calibration bins of the
+        test set.
+
+    Raises
+    ------
+    TypeError
+        If any input data is not of type pandas DataFrame/Series.
+    ValueError
+        If any input data is empty, if the number of features in
+        X_train and X_test does not match, or if sample_weight does not
+        have one value per training row.
+    """
+    check_model_inputs(X_train, y_train, X_test, y_test)
+    fit_params = {}
+    if sample_weight is not None:
+        if len(sample_weight) != len(X_train):
+            raise ValueError("sample_weight must have one value per row of X_train.")
+        fit_params["logisticregression__sample_weight"] = np.asarray(sample_weight, dtype=float)
+
+    # Create pipeline and fit the model
+    params = {"random_state": 123, "class_weight": "balanced", **(logreg_params or {})}
+    pipeline = make_pipeline(preprocessor, LogisticRegression(**params))
+    pipeline.fit(X_train, y_train, **fit_params)
+
+    # Evaluate the model
+    if return_evaluation:
+        proba = pipeline.predict_proba(X_test)[:, 1]
+        return pipeline, evaluate_predictions(y_test == pipeline.classes_[1], proba, n_bootstrap=n_bootstrap)
+    accuracy = pipeline.score(X_test, y_test)
+
+    return pipeline, accuracy
+
+
+def check_model_inputs(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series
+):
+    """
+    Function to check the types and shapes of the training and test data
+    passed to the model fitting functions.
 
     Raises
     ------
@@ -62,12 +126,3 @@ def fit_and_evaluate_model(
         raise ValueError("X_test and y_test cannot be empty.")
     if X_train.shape[1] != X_test.shape[1]:
         raise ValueError("The number of features in X_train and X_test must match.")
-
-    # Create pipeline and fit the model
-    pipeline = make_pipeline(preprocessor, LogisticRegression(random_state=123, class_weight="balanced"))
-    pipeline.fit(X_train, y_train)
-
-    # Evaluate the model
-    accuracy = pipeline.score(X_test, y_test)
-
-    return pipeline, accuracy
\ No newline at end of file
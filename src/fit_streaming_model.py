@@ -0,0 +1,204 @@
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, clone
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
+from typing import Tuple
+from src.storage import iter_table
+from src.instrumentation import instrumented, record_rows
+
+
+def _scalers(step: BaseEstimator, columns: list) -> list:
+    """Return each fitted StandardScaler of a preprocessing step with the
+    input columns it scales."""
+    if isinstance(step, StandardScaler):
+        return [(step, columns)]
+    if isinstance(step, Pipeline) and len(step.steps) == 1:
+        return _scalers(step.steps[0][1], columns)
+    if isinstance(step, ColumnTransformer):
+        scalers = []
+        for _, transformer, transformer_columns in step.transformers_:
+            if transformer in ("drop", "passthrough"):
+                continue
+            scalers.extend(_scalers(transformer, list(transformer_columns)))
+        return scalers
+    raise TypeError(f"Cannot fit preprocessing step of type {type(step).__name__} in a stream.")
+
+
+def _input_columns(step: BaseEstimator, columns: list) -> list:
+    """Return the input columns a fitted preprocessing step reads, in the
+    order of `columns`; a column transformer does not read dropped ones."""
+    if not isinstance(step, ColumnTransformer):
+        return list(columns)
+    used = set()
+    for _, transformer, transformer_columns in step.transformers_:
+        if not (isinstance(transformer, str) and transformer == "drop"):
+            used.update(transformer_columns)
+    return [column for column in columns if column in used]
+
+
+def _split_chunk(chunk: pd.DataFrame, label: str, class_weight: dict) -> tuple:
+    """Split a chunk into features, labels and row weights."""
+    y = chunk.pop(label).to_numpy()
+    weights = pd.Series(y).map(class_weight).to_numpy(dtype=float) if class_weight else np.ones(len(y))
+    if "sample_weight" in chunk:
+        weights = weights * chunk.pop("sample_weight").to_numpy(dtype=float)
+    return chunk, y, weights
+
+
+@instrumented
+def fit_streaming_model(
+    train_path: str,
+    preprocessor: BaseEstimator,
+    chunksize: int = 100_000,
+    label: str = "shoots_left",
+    max_epochs: int = 20,
+    tol: float = 1e-4,
+    n_iter_no_change: int = 3,
+    class_weight: str = "balanced",
+    sgd_params: dict = None,
+    random_state: int = 123,
+    filters: list = None
+) -> Tuple[Pipeline, pd.DataFrame]:
+    """
+    Function to fit a logistic regression pipeline on a training table read
+    chunk by chunk, so that memory use depends on the chunk size rather than
+    on the size of the table.
+
+    A first pass fits the standard scaling of `preprocessor` with
+    `partial_fit`, counts the classes and spills the columns the
+    preprocessor reads to a temporary file. Each later pass (epoch) reads
+    the spilled chunks back memory mapped, in an order drawn from
+    `random_state` anew each epoch, shuffles every chunk and updates an
+    `SGDClassifier` with log loss, which fits the same model as a logistic
+    regression. The loss of each chunk is measured before the model is
+    updated on it, and training stops once the mean epoch loss has not
+    improved by `tol` for `n_iter_no_change` epochs.
+
+    Parameters
+    ----------
+    train_path : str
+        Path to the training table, with the features, the label and an
+        optional `sample_weight` column.
+    preprocessor : sklearn.base.BaseEstimator
+        Preprocessing made of standard scaling, such as the roster
+        preprocessor's column transformer.
+    chunksize : int, optional
+        Number of rows read per chunk, by default 100000
+    label : str, optional
+        Name of the label column, by default "shoots_left"
+    max_epochs : int, optional
+        Maximum number of passes over the table, by default 20
+    tol : float, optional
+        Minimum improvement of the epoch loss, by default 1e-4
+    n_iter_no_change : int, optional
+        Number of epochs without improvement before stopping, by default 3
+    class_weight : str, optional
+        "balanced" to weigh the classes inversely to their frequency, or
+        None, by default "balanced"
+    sgd_params : dict, optional
+        Hyperparameters passed to SGDClassifier, overriding the defaults of
+        log loss, averaged weights (which settle close to the logistic
+        regression solution) and random_state.
+    random_state : int, optional
+        Seed for the classifier and the shuffling, by default 123
+    filters : list, optional
+        (column, operator, value) tuples restricting training to the rows
+        matching all of them, as accepted by `iter_table`; by default every
+        row is used.
+
+    Returns
+    -------
+    pipeline : sklearn.pipeline.Pipeline
+        Trained pipeline with preprocessing and the SGD classifier.
+    history : pd.DataFrame
+        Mean weighted log loss of each epoch.
+
+    Raises
+    ------
+    TypeError
+        The preprocessor is not made of standard scaling
+    ValueError
+        The chunk size is not a positive integer, the table is empty or
+        the label has fewer than two classes
+    """
+    if not isinstance(chunksize, int) or chunksize < 1:
+        raise ValueError("Chunk size must be a positive integer.")
+
+    with tempfile.TemporaryFile() as spill:
+        # Pass 1: fit the scalers, count the classes and spill the rows
+        preprocessor = clone(preprocessor)
+        scalers, features, class_counts = None, None, {}
+        for chunk in iter_table(train_path, chunksize, filters=filters):
+            X, y, sample_weight = _split_chunk(chunk, label, None)
+            if scalers is None:
+                # Fitting on the first chunk sets up the step; its scalers then take every later chunk
+                preprocessor.fit(X)
+                scalers = _scalers(preprocessor, list(X.columns))
+                features = _input_columns(preprocessor, list(X.columns))
+            else:
+                for scaler, columns in scalers:
+                    scaler.partial_fit(X[columns])
+            values, inverse, counts = np.unique(y, return_inverse=True, return_counts=True)
+            for value, count in zip(values, counts):
+                class_counts[value] = class_counts.get(value, 0) + int(count)
+            # Labels are spilled as their position in `class_counts`, which only grows
+            codes = np.array([list(class_counts).index(value) for value in values])[inverse]
+            spill.write(np.column_stack([X[features].to_numpy(dtype=float), codes, sample_weight]).tobytes())
+        if scalers is None:
+            raise ValueError("The training table is empty.")
+        if len(class_counts) < 2:
+            raise ValueError("The label must have at least two classes.")
+
+        classes = np.array(sorted(class_counts))
+        labels = np.array(list(class_counts))
+        n_rows = sum(class_counts.values())
+        record_rows(rows_in=n_rows)
+        class_weights = np.ones(len(labels))
+        if class_weight == "balanced":
+            class_weights = n_rows / (len(classes) * np.array(list(class_counts.values())))
+
+        spill.flush()
+        rows = np.memmap(spill, dtype=float, mode="r", shape=(n_rows, len(features) + 2))
+        params = {"loss": "log_loss", "average": True, "random_state": random_state, **(sgd_params or {})}
+        model = SGDClassifier(**params)
+        rng = np.random.default_rng(random_state)
+
+        history, best_loss, no_improvement = [], np.inf, 0
+        for epoch in range(1, max_epochs + 1):
+            total_loss, total_weight = 0.0, 0.0
+            # Later passes read the spilled chunks in a new random order each epoch
+            for start in rng.permutation(np.arange(0, n_rows, chunksize)):
+                chunk = rows[start:start + chunksize]
+                X = preprocessor.transform(pd.DataFrame(chunk[:, :-2], columns=features))
+                codes = chunk[:, -2].astype(np.intp)
+                y, sample_weight = labels[codes], class_weights[codes] * chunk[:, -1]
+                if hasattr(model, "coef_"):
+                    # Progressive validation: score each chunk before learning from it
+                    proba = np.clip(model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+                    positive = y == classes[1]
+                    losses = -np.where(positive, np.log(proba), np.log1p(-proba))
+                    total_loss += float(losses @ sample_weight)
+                    total_weight += float(sample_weight.sum())
+                order = rng.permutation(len(y))
+                model.partial_fit(X.iloc[order] if hasattr(X, "iloc") else X[order], y[order],
+                                  classes=classes, sample_weight=sample_weight[order])
+
+            loss = total_loss / total_weight if total_weight else np.nan
+            history.append({"epoch": epoch, "loss": loss})
+            if np.isnan(loss):
+                continue
+            if loss > best_loss - tol:
+                no_improvement += 1
+                if no_improvement >= n_iter_no_change:
+                    break
+            else:
+                no_improvement = 0
+            best_loss = min(best_loss, loss)
+
+        del rows
+
+    return make_pipeline(preprocessor, model), pd.DataFrame(history, columns=["epoch", "loss"])
@@ -0,0 +1,298 @@
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from src.fit_streaming_model import _scalers
+from src.instrumentation import instrumented, record_rows
+from src.model_artifact import load_pipeline, read_artifact
+
+# Number of past training rows kept in an artifact and replayed with the
+# new seasons when the model is updated
+REPLAY_SIZE = 10_000
+
+
+def _scaler(pipeline: Pipeline, features: list):
+    """Return the single fitted StandardScaler of a pipeline's preprocessing
+    step, which must scale every feature."""
+    scalers = _scalers(pipeline.steps[0][1], list(features))
+    if len(scalers) != 1 or list(scalers[0][1]) != list(features):
+        raise TypeError("The preprocessing step must be a single StandardScaler of every feature.")
+    return scalers[0][0]
+
+
+def _scaler_features(pipeline: Pipeline) -> list:
+    """Return the feature names of a pipeline's scaling step."""
+    from src.compile_predictor import _scaling
+    return list(_scaling(Pipeline(pipeline.steps[:-1]))[0])
+
+
+def _sample_rows(weights: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw `size` row positions without replacement with probability
+    proportional to `weights` (Efraimidis-Spirakis keys), in row order."""
+    if len(weights) <= size:
+        return np.arange(len(weights))
+    keys = np.log(rng.random(len(weights))) / weights
+    return np.sort(np.argpartition(keys, len(weights) - size)[len(weights) - size:])
+
+
+def _class_weights(estimator, classes: np.ndarray, class_counts: np.ndarray):
+    """Return the estimator's class weights, with "balanced" computed from
+    the class counts of every row trained on rather than of the rows in a
+    single fit."""
+    if estimator.class_weight != "balanced":
+        return estimator.class_weight
+    total = class_counts.sum()
+    return {label: total / (len(classes) * count) for label, count in zip(classes.tolist(), class_counts)}
+
+
+def _state(pipeline, replay_X, replay_y, replay_weight, class_counts, metadata, rng, replay_size) -> dict:
+    """Collect the training state saved with a model artifact."""
+    scaler = _scaler(pipeline, replay_X.columns)
+    keep = _sample_rows(np.asarray(replay_weight, dtype=float), replay_size, rng)
+    n_samples_seen = np.broadcast_to(scaler.n_samples_seen_, len(scaler.mean_))
+    return {
+        "extra_arrays": {
+            "n_samples_seen": np.asarray(n_samples_seen, dtype=np.int64),
+            "var": np.asarray(scaler.var_, dtype=np.float64),
+            "class_counts": np.asarray(class_counts, dtype=np.int64),
+            "replay_X": replay_X.to_numpy(dtype=np.float64)[keep],
+            "replay_y": np.asarray(replay_y)[keep]
+        },
+        "metadata": metadata
+    }
+
+
+@instrumented
+def training_state(
+    pipeline: Pipeline,
+    X: pd.DataFrame,
+    y: pd.Series,
+    seasons: pd.Series,
+    sample_weight: pd.Series = None,
+    replay_size: int = REPLAY_SIZE,
+    random_state: int = 123,
+    parent_path: str = None
+) -> dict:
+    """
+    Function to build the training state of a pipeline fitted from scratch,
+    to save with its model artifact so that `update_model` can later add
+    new seasons to it.
+
+    The state holds the scaler's sample counts and variances (its means are
+    already in the artifact), the class counts, a replay sample of up to
+    `replay_size` training rows drawn in proportion to their sample weights,
+    and metadata listing the seasons trained on and the artifact's lineage.
+    When the pipeline replaces an artifact with a lineage, the lineage is
+    continued: the retrain is the next version, marked `retrained`, with
+    the replaced artifact as its parent.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Pipeline of standard scaling followed by a logistic regression,
+        fitted on `X` and `y`.
+    X : pd.DataFrame
+        Features the pipeline was fitted on.
+    y : pd.Series
+        Labels the pipeline was fitted on.
+    seasons : pd.Series
+        Season of each training row.
+    sample_weight : pd.Series, optional
+        Weight of each training row, by default all rows weigh the same
+    replay_size : int, optional
+        Number of rows in the replay sample, by default 10000
+    random_state : int, optional
+        Seed for the replay sample, by default 123
+    parent_path : str, optional
+        Path of the artifact the pipeline replaces, if any; by default, or
+        when there is no artifact with a lineage there, the lineage starts
+        at version 1.
+
+    Returns
+    -------
+    dict
+        `extra_arrays` and `metadata` to pass to `save_artifact`.
+
+    Raises
+    ------
+    ValueError
+        The seasons or sample weights do not have one value per row of X
+    """
+    if len(seasons) != len(X) or (sample_weight is not None and len(sample_weight) != len(X)):
+        raise ValueError("seasons and sample_weight must have one value per row of X.")
+    features = _scaler_features(pipeline)
+    weight = np.ones(len(X)) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+    classes = pipeline.classes_
+    class_counts = np.array([(np.asarray(y) == label).sum() for label in classes])
+
+    trained = sorted(int(season) for season in pd.unique(seasons))
+    lineage = [{"version": 1, "parent_sha256": None, "seasons_added": trained, "rows_added": len(X)}]
+    if parent_path is not None and os.path.exists(parent_path):
+        parent_lineage = read_artifact(parent_path)[0].get("metadata", {}).get("lineage")
+        if parent_lineage:
+            lineage = [*parent_lineage, {"version": parent_lineage[-1]["version"] + 1,
+                                         "parent_sha256": file_sha256(parent_path), "seasons_added": trained,
+                                         "rows_added": len(X), "retrained": True}]
+    metadata = {"seasons": trained, "weight": float(weight.sum()), "lineage": lineage}
+    rng = np.random.default_rng([random_state, lineage[-1]["version"]])
+    return _state(pipeline, X[features], y, weight, class_counts, metadata, rng, replay_size)
+
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 digest of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def trained_seasons(artifact_path: str) -> list:
+    """Function to list the seasons a model artifact has been trained on.
+
+    Raises
+    ------
+    FileNotFoundError
+        There is no artifact at the path
+    ValueError
+        The artifact was saved without a training state
+    """
+    if not os.path.exists(artifact_path):
+        raise FileNotFoundError(f"There is no model artifact at {artifact_path}; "
+                                f"fit and save one with a training state before updating it.")
+    header, _ = read_artifact(artifact_path)
+    if "seasons" not in header.get("metadata", {}):
+        raise ValueError(f"{artifact_path} has no training state; retrain it from scratch.")
+    return header["metadata"]["seasons"]
+
+
+def new_seasons(artifact_path: str, seasons: pd.Series) -> list:
+    """Function to list the seasons of the training data that the model
+    artifact has not been trained on.
+
+    Raises
+    ------
+    FileNotFoundError
+        There is no artifact at the path
+    ValueError
+        The artifact was saved without a training state
+    """
+    trained = set(trained_seasons(artifact_path))
+    return sorted(int(season) for season in pd.unique(seasons) if int(season) not in trained)
+
+
+@instrumented
+def update_model(
+    artifact_path: str,
+    X: pd.DataFrame,
+    y: pd.Series,
+    seasons: pd.Series,
+    sample_weight: pd.Series = None,
+    replay_size: int = REPLAY_SIZE,
+    random_state: int = 123
+) -> tuple:
+    """
+    Function to update a model artifact with the seasons of the training
+    data it has not been trained on, in time that depends on the new rows
+    rather than on the whole history.
+
+    Rows of seasons already in the artifact are ignored. The scaler's
+    moments are merged with those of the new rows by `partial_fit`. The
+    classifier's coefficients are carried over to the new scaling and used
+    as the warm start of a fit on the new rows plus the artifact's replay
+    sample, whose rows are weighted to stand for all earlier training rows.
+    With balanced class weights, the weights come from the class counts of
+    every row trained on.
+
+    Parameters
+    ----------
+    artifact_path : str
+        Path of a model artifact saved with a training state, by
+        `training_state` or an earlier `update_model`.
+    X : pd.DataFrame
+        Training features, which may include rows of trained seasons.
+    y : pd.Series
+        Training labels.
+    seasons : pd.Series
+        Season of each training row.
+    sample_weight : pd.Series, optional
+        Weight of each training row, by default all rows weigh the same
+    replay_size : int, optional
+        Number of rows in the new replay sample, by default 10000
+    random_state : int, optional
+        Seed for the replay sample, by default 123
+
+    Returns
+    -------
+    pipeline : sklearn.pipeline.Pipeline
+        The updated pipeline, or the saved one when there are no new
+        seasons.
+    state : dict
+        `extra_arrays` and `metadata` to pass to `save_artifact`, with a
+        lineage entry for the new version, or None when there are no new
+        seasons.
+
+    Raises
+    ------
+    FileNotFoundError
+        There is no artifact at `artifact_path`
+    ValueError
+        The artifact has no training state, or the seasons or sample
+        weights do not have one value per row of X
+    """
+    if len(seasons) != len(X) or (sample_weight is not None and len(sample_weight) != len(X)):
+        raise ValueError("seasons and sample_weight must have one value per row of X.")
+    added = new_seasons(artifact_path, seasons)
+    pipeline = load_pipeline(artifact_path)
+    if not added:
+        return pipeline, None
+
+    header, arrays = read_artifact(artifact_path)
+    metadata = header["metadata"]
+    features = header["feature_names"]
+    is_new = np.asarray(pd.Series(seasons).isin(added))
+    X_new, y_new = X.loc[is_new, features], np.asarray(y)[is_new]
+    weight_new = np.ones(len(X_new)) if sample_weight is None else np.asarray(sample_weight, dtype=float)[is_new]
+    record_rows(rows_in=len(X_new))
+
+    # Merge the moments of the new rows into the scaler
+    scaler = _scaler(pipeline, features)
+    old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+    scaler.var_ = np.array(arrays["var"])
+    scaler.n_samples_seen_ = np.array(arrays["n_samples_seen"])
+    if np.all(scaler.n_samples_seen_ == scaler.n_samples_seen_[0]):
+        scaler.n_samples_seen_ = int(scaler.n_samples_seen_[0])
+    scaler.partial_fit(X_new)
+
+    # w . (x - m0) / s0 + b == (w s1 / s0) . (x - m1) / s1 + b + (w / s0) . (m1 - m0)
+    estimator = pipeline.steps[-1][1]
+    raw_coef = estimator.coef_[0] / old_scale
+    estimator.coef_ = (raw_coef * scaler.scale_).reshape(1, -1)
+    estimator.intercept_ = estimator.intercept_ + raw_coef @ (scaler.mean_ - old_mean)
+
+    # Fit on the new rows and the replay sample, which stands for every earlier row
+    replay_X = pd.DataFrame(np.array(arrays["replay_X"]), columns=features).astype(X_new.dtypes.to_dict())
+    replay_y = np.array(arrays["replay_y"])
+    replay_weight = np.full(len(replay_y), metadata["weight"] / max(len(replay_y), 1))
+    fit_X = pd.concat([replay_X, X_new], ignore_index=True)
+    fit_y = np.concatenate([replay_y, y_new])
+    fit_weight = np.concatenate([replay_weight, weight_new])
+
+    classes = np.array(arrays["classes"])
+    class_counts = np.array(arrays["class_counts"]) + np.array([(y_new == label).sum() for label in classes])
+    params = estimator.get_params()
+    estimator.set_params(warm_start=True, class_weight=_class_weights(estimator, classes, class_counts))
+    estimator.fit(Pipeline(pipeline.steps[:-1]).transform(fit_X), fit_y, sample_weight=fit_weight)
+    estimator.set_params(warm_start=params["warm_start"], class_weight=params["class_weight"])
+
+    version = metadata["lineage"][-1]["version"] + 1
+    metadata = {
+        "seasons": sorted(set(metadata["seasons"]) | set(added)),
+        "weight": metadata["weight"] + float(weight_new.sum()),
+        "lineage": [*metadata["lineage"], {"version": version, "parent_sha256": file_sha256(artifact_path),
+                                           "seasons_added": added, "rows_added": len(X_new)}]
+    }
+    rng = np.random.default_rng([random_state, version])
+    state = _state(pipeline, fit_X, fit_y, fit_weight, class_counts, metadata, rng, replay_size)
+    return pipeline, state
@@ -0,0 +1,291 @@
+import contextvars
+import cProfile
+import datetime
+import functools
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Run being recorded in the current context; spans are only measured while
+# one is active. Threads start without one; `propagate_run` carries it over
+_ACTIVE_RUN = contextvars.ContextVar("active_run", default=None)
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+# (stage, profiled or traced) of the runs being recorded in this process, in any thread
+_OPEN_RUNS = []
+
+
+def _rows(value):
+    """Return the number of rows of a table or array, or None."""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    shape = getattr(value, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+def _process_peak_rss_mb() -> float:
+    """Peak resident set size over the whole life of the process, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _rss_mb() -> float:
+    """Current resident set size of the process in MiB, or None where
+    /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def propagate_run(func):
+    """Wrap `func` so that, when it is called in another thread such as a
+    pool worker, its spans are recorded in the run active where it was
+    wrapped."""
+    run = _ACTIVE_RUN.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _ACTIVE_RUN.set(run)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _ACTIVE_RUN.reset(token)
+    return wrapper
+
+
+def _stack() -> list:
+    if not hasattr(_LOCAL, "stack"):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+@contextmanager
+def measure(name: str, rows_in: int = None):
+    """Context manager that records a span of work in the active run.
+
+    The span's wall time, CPU time, growth of the process's RSS, the
+    process-lifetime peak RSS and, when the run traces memory, the peak of
+    memory allocated by Python while the span ran are recorded together
+    with its rows in and out. Row counts can be set on
+    the yielded dict (`span["rows_out"] = ...`) or with `record_rows`.
+    Nothing is measured when no run is active.
+
+    Parameters
+    ----------
+    name : str
+        Name of the span, e.g. the function being measured.
+    rows_in : int, optional
+        Number of rows the span consumes.
+
+    Yields
+    ------
+    dict
+        The span record.
+    """
+    run = _ACTIVE_RUN.get()
+    if run is None:
+        yield {}
+        return
+
+    stack = _stack()
+    span = {"name": name, "parent": stack[-1]["name"] if stack else run.stage, "rows_in": rows_in, "rows_out": None}
+    if run.trace_memory:
+        # Peaks are reset per span, so fold the peak so far into the enclosing span first
+        if stack:
+            stack[-1]["_peak"] = max(stack[-1].get("_peak", 0), tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    stack.append(span)
+    wall, cpu, rss = time.perf_counter(), time.process_time(), _rss_mb()
+    try:
+        yield span
+    finally:
+        span["wall_seconds"] = time.perf_counter() - wall
+        span["cpu_seconds"] = time.process_time() - cpu
+        end_rss = _rss_mb()
+        # Other stages running in the process at the same time also count here
+        span["rss_growth_mb"] = None if rss is None or end_rss is None else end_rss - rss
+        span["process_peak_rss_mb"] = _process_peak_rss_mb()
+        if run.trace_memory:
+            peak = max(span.pop("_peak", 0), tracemalloc.get_traced_memory()[1])
+            span["tracemalloc_peak_mb"] = peak / 2**20
+            if len(stack) > 1:
+                stack[-2]["_peak"] = max(stack[-2].get("_peak", 0), peak)
+        stack.pop()
+        with _LOCK:
+            run.spans.append(span)
+
+
+def record_rows(rows_in: int = None, rows_out: int = None):
+    """Set the rows in and/or out of the innermost span being measured."""
+    stack = _stack()
+    if _ACTIVE_RUN.get() is None or not stack:
+        return
+    if rows_in is not None:
+        stack[-1]["rows_in"] = int(rows_in)
+    if rows_out is not None:
+        stack[-1]["rows_out"] = int(rows_out)
+
+
+def instrumented(func):
+    """Decorator that measures each call of `func` as a span of the active
+    run. Rows in are taken from the first argument with a `shape` (such as
+    a DataFrame or array) and rows out from the result, or from the first
+    element of a tuple result."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _ACTIVE_RUN.get() is None:
+            return func(*args, **kwargs)
+        rows_in = next((rows for rows in map(_rows, args) if rows is not None), None)
+        with measure(func.__qualname__, rows_in) as span:
+            result = func(*args, **kwargs)
+            if span.get("rows_out") is None:
+                span["rows_out"] = _rows(result)
+            return result
+    return wrapper
+
+
+class RunManifest:
+    """Spans recorded while one pipeline stage runs, written as JSON.
+
+    Parameters
+    ----------
+    stage : str
+        Name of the stage.
+    trace_memory : bool, optional
+        Trace Python allocations with tracemalloc to report the peak memory
+        of each span. This slows the stage down, by default False
+    """
+
+    def __init__(self, stage: str, trace_memory: bool = False):
+        self.stage = stage
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    def summary(self) -> list:
+        """Return one record per span name and parent, with the number of
+        calls, summed times and rows and the highest memory peaks, so that
+        functions called once per chunk do not add one record per chunk."""
+        records = {}
+        for span in self.spans:
+            key = (span["parent"], span["name"])
+            if key not in records:
+                records[key] = {"name": span["name"], "parent": span["parent"], "calls": 0,
+                                "wall_seconds": 0.0, "cpu_seconds": 0.0, "rows_in": None, "rows_out": None}
+            record = records[key]
+            record["calls"] += 1
+            record["wall_seconds"] += span["wall_seconds"]
+            record["cpu_seconds"] += span["cpu_seconds"]
+            for field in ("rows_in", "rows_out"):
+                if span[field] is not None:
+                    record[field] = (record[field] or 0) + span[field]
+            for field in ("rss_growth_mb", "process_peak_rss_mb", "tracemalloc_peak_mb"):
+                if span.get(field) is not None:
+                    record[field] = max(record.get(field, span[field]), span[field])
+        for record in records.values():
+            rows = record["rows_in"] if record["rows_in"] is not None else record["rows_out"]
+            record["rows_per_second"] = rows / record["wall_seconds"] if rows and record["wall_seconds"] > 0 else None
+        return list(records.values())
+
+    def to_dict(self) -> dict:
+        """Return the manifest as a JSON-serializable dict. The `total` is
+        the span of the whole stage."""
+        spans = self.summary()
+        total = next((span for span in spans if span["parent"] is None), None)
+        return {
+            "stage": self.stage,
+            "started_at": self.started_at,
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "trace_memory": self.trace_memory,
+            "total": total,
+            "spans": [span for span in spans if span is not total]
+        }
+
+    def write(self, path: str):
+        """Write the manifest to `path` as JSON."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+@contextmanager
+def run_manifest(stage: str, manifest_to: str = None, profile: bool = False, trace_memory: bool = False):
+    """Context manager that records the instrumented work of a stage and
+    writes it to `<manifest_to>/<stage>.json` when the stage finishes.
+
+    Parameters
+    ----------
+    stage : str
+        Name of the stage, used for the span of the whole stage and the
+        file names.
+    manifest_to : str, optional
+        Directory for the manifest; by default nothing is written.
+    profile : bool, optional
+        Also profile the stage with cProfile and dump the statistics to
+        `<manifest_to>/<stage>.prof`, by default False
+    trace_memory : bool, optional
+        Trace Python allocations for per-span peak memory, by default False
+
+    Yields
+    ------
+    RunManifest
+        The manifest being recorded.
+
+    Raises
+    ------
+    RuntimeError
+        Profiling or memory tracing was asked for while another stage is
+        recorded in the process, or another stage is profiled or traced.
+        cProfile and tracemalloc are process-wide, so the stages would
+        corrupt each other's statistics; they are only valid for stages
+        run one at a time.
+    """
+    run = RunManifest(stage, trace_memory=trace_memory)
+    entry = (stage, profile or trace_memory)
+    with _LOCK:
+        if _OPEN_RUNS and (entry[1] or any(exclusive for _, exclusive in _OPEN_RUNS)):
+            raise RuntimeError(f"Stage '{stage}' runs concurrently with "
+                               f"{', '.join(repr(name) for name, _ in _OPEN_RUNS)}; --profile and "
+                               f"--trace-memory are only valid when stages run one at a time.")
+        _OPEN_RUNS.append(entry)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if profile else None
+    # Stages run concurrently on threads each record into their own run
+    token = _ACTIVE_RUN.set(run)
+    saved_stack, _LOCAL.stack = _stack(), []
+    try:
+        if profiler is not None:
+            profiler.enable()
+        with measure(stage) as span:
+            span["parent"] = None
+            yield run
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        with _LOCK:
+            _OPEN_RUNS.remove(entry)
+        _ACTIVE_RUN.reset(token)
+        _LOCAL.stack = saved_stack
+        if started_tracing:
+            tracemalloc.stop()
+        if manifest_to is not None:
+            run.write(os.path.join(manifest_to, f"{stage}.json"))
+            if profiler is not None:
+                profiler.dump_stats(os.path.join(manifest_to, f"{stage}.prof"))
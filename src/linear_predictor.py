@@ -0,0 +1,68 @@
+import numpy as np
+
+
+def as_feature_array(X, feature_names: list) -> np.ndarray:
+    """Return the rows of a DataFrame with the feature columns, a 2-D array
+    with the columns in `feature_names` order, or a single row given as a
+    1-D array, list or dict, as a 2-D float array in feature order."""
+    # DataFrames are recognized by their columns, so pandas need not be imported
+    if hasattr(X, "columns"):
+        return X[feature_names].to_numpy(dtype=float)
+    if isinstance(X, dict):
+        X = [X[name] for name in feature_names]
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.shape[1] != len(feature_names):
+        raise ValueError(f"Expected {len(feature_names)} features, got {X.shape[1]}.")
+    return X
+
+
+class LinearPredictor:
+    """Compact binary logistic regression predictor that runs on plain
+    NumPy arrays.
+
+    The standard scaling of the original pipeline is folded into the
+    coefficients, so a prediction is a single dot product. Inputs may be a
+    DataFrame with the feature columns, a 2-D array with the columns in
+    `feature_names` order, or a single row given as a 1-D array, list or
+    dict.
+
+    Parameters
+    ----------
+    feature_names : list of str
+        Names of the input features, in column order.
+    classes : np.ndarray
+        The two class labels, negative class first.
+    coef : np.ndarray
+        Coefficients on the unscaled features.
+    intercept : float
+        Intercept on the unscaled features.
+    """
+
+    __slots__ = ("feature_names", "classes", "coef", "intercept")
+
+    def __init__(self, feature_names, classes, coef, intercept):
+        self.feature_names = list(feature_names)
+        self.classes = np.asarray(classes)
+        self.coef = np.asarray(coef, dtype=float)
+        self.intercept = float(intercept)
+
+    def _as_array(self, X) -> np.ndarray:
+        return as_feature_array(X, self.feature_names)
+
+    def decision_function(self, X) -> np.ndarray:
+        """Return the log-odds of the positive class for each row."""
+        return self._as_array(X) @ self.coef + self.intercept
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Return the probability of each class for each row."""
+        # exp(-log(1 + exp(-z))) is the logistic function without overflow;
+        # rows with missing values get NaN probabilities without a warning
+        with np.errstate(invalid="ignore"):
+            positive = np.exp(-np.logaddexp(0, -self.decision_function(X)))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        """Return the predicted class label for each row."""
+        return self.classes[(self.decision_function(X) > 0).astype(int)]
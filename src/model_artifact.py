@@ -0,0 +1,267 @@
+import json
+import os
+import struct
+import uuid
+import numpy as np
+from src.instrumentation import instrumented
+from src.linear_predictor import LinearPredictor
+
+# Leading bytes of every model artifact
+MAGIC = b"NHLMODEL"
+# Version written by `save_artifact`; loaders accept this version and older
+FORMAT_VERSION = 1
+# Alignment of the header end and of every array, in bytes
+ALIGNMENT = 64
+# Estimators of sklearn.linear_model an artifact may name
+ESTIMATORS = ["LogisticRegression", "SGDClassifier"]
+# Weights an averaging SGDClassifier keeps besides `coef_` and `intercept_`,
+# which `partial_fit` and warm starts continue from
+SGD_ARRAYS = ["_standard_coef", "_standard_intercept", "_average_coef", "_average_intercept"]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _json_params(estimator) -> dict:
+    """Constructor parameters of an estimator that survive a JSON round trip."""
+    params = {}
+    for name, value in estimator.get_params(deep=False).items():
+        try:
+            if json.loads(json.dumps(value)) == value:
+                params[name] = value
+        except (TypeError, ValueError):
+            continue
+    return params
+
+
+@instrumented
+def save_artifact(pipeline, path: str, extra_arrays: dict = None, metadata: dict = None) -> dict:
+    """Function to save a fitted pipeline of standard scaling followed by a
+    binary logistic regression as a model artifact.
+
+    The artifact is a single file: the 8 bytes `MAGIC`, the length of a
+    JSON header as a little-endian uint32, the header, and the fitted
+    arrays (class labels, scaler mean and scale, coefficients and
+    intercept), each starting on a 64-byte boundary so it can be memory
+    mapped. The header holds the format version, the feature names, the
+    estimator type and its JSON-serializable parameters, and the dtype,
+    shape and offset of every array. Unlike a pickle, loading an artifact
+    runs no code from the file. The file is written to a temporary path
+    and renamed into place.
+
+    An `SGDClassifier` also stores its update count `t_` and epoch count
+    `n_iter_` in the header and, when it averages, its running and
+    averaged weights as arrays, so that a loaded one carries on training
+    where it stopped.
+
+    Extra arrays are stored after the fitted ones and memory mapped like
+    them, and metadata is stored in the header under `metadata`; loaders
+    that do not need them ignore both.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline accepted by `compile_predictor`.
+    path : str
+        Path of the artifact to write.
+    extra_arrays : dict, optional
+        Further named arrays to store, such as the training state used by
+        `incremental_model`, by default none
+    metadata : dict, optional
+        JSON-serializable metadata to store in the header, by default none
+
+    Returns
+    -------
+    dict
+        The header written.
+
+    Raises
+    ------
+    TypeError
+        The pipeline is not standard scaling followed by a logistic
+        regression
+    ValueError
+        The logistic regression is not a binary classifier, or an extra
+        array has the name of a fitted one
+    """
+    # Saving needs scikit-learn to read the pipeline; loading a predictor does not
+    from sklearn.pipeline import Pipeline
+    from src.compile_predictor import _is_logistic, _scaling
+
+    if (not isinstance(pipeline, Pipeline) or len(pipeline.steps) < 2
+            or not _is_logistic(pipeline.steps[-1][1])):
+        raise TypeError("pipeline must be a Pipeline ending in a LogisticRegression.")
+    estimator = pipeline.steps[-1][1]
+    if len(estimator.classes_) != 2:
+        raise ValueError("Only binary logistic regression can be saved.")
+
+    names, mean, scale = _scaling(Pipeline(pipeline.steps[:-1]))
+    classes = np.asarray(estimator.classes_)
+    if classes.dtype == object:
+        classes = classes.astype(str)
+    arrays = {
+        "classes": classes,
+        "mean": mean,
+        "scale": scale,
+        "coef": np.asarray(estimator.coef_[0], dtype=np.float64),
+        "intercept": np.asarray(estimator.intercept_, dtype=np.float64)
+    }
+    estimator_state = None
+    if type(estimator).__name__ == "SGDClassifier":
+        estimator_state = {"t_": float(estimator.t_), "n_iter_": int(estimator.n_iter_)}
+        for name in SGD_ARRAYS:
+            if getattr(estimator, name, None) is not None:
+                arrays[name.lstrip("_")] = np.asarray(getattr(estimator, name), dtype=np.float64)
+    for name, array in (extra_arrays or {}).items():
+        if name in arrays:
+            raise ValueError(f"Extra array '{name}' has the name of a fitted array.")
+        array = np.asarray(array)
+        arrays[name] = array.astype(str) if array.dtype == object else array
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+    header = {
+        "format_version": FORMAT_VERSION,
+        "estimator": type(estimator).__name__,
+        "params": _json_params(estimator),
+        "feature_names": [str(name) for name in names],
+        "arrays": layout
+    }
+    if estimator_state is not None:
+        header["estimator_state"] = estimator_state
+    if metadata is not None:
+        header["metadata"] = metadata
+    encoded = json.dumps(header).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 4 + len(encoded))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    temporary_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return header
+
+
+def read_artifact(path: str) -> tuple:
+    """Function to read the header of a model artifact and memory map its
+    arrays, without copying them into memory.
+
+    Parameters
+    ----------
+    path : str
+        Path of the artifact.
+
+    Returns
+    -------
+    tuple
+        The header dict and a dict of read-only `np.memmap` arrays.
+
+    Raises
+    ------
+    ValueError
+        The file is not a model artifact, or was written by a newer format
+        version
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a model artifact.")
+        header_length, = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    if header.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {header['format_version']}; "
+                         f"this version reads up to {FORMAT_VERSION}.")
+
+    data_start = _aligned(len(MAGIC) + 4 + header_length)
+    arrays = {
+        name: np.memmap(path, dtype=np.dtype(spec["dtype"]), mode="r",
+                        offset=data_start + spec["offset"], shape=tuple(spec["shape"]))
+        for name, spec in header["arrays"].items()
+    }
+    return header, arrays
+
+
+def load_predictor(path: str) -> LinearPredictor:
+    """Function to load a model artifact as a `LinearPredictor`, with the
+    scaling folded into the coefficients. Only NumPy is imported.
+
+    Parameters
+    ----------
+    path : str
+        Path of the artifact.
+
+    Returns
+    -------
+    LinearPredictor
+        Predictor equivalent to the saved pipeline.
+    """
+    header, arrays = read_artifact(path)
+    coef = arrays["coef"] / arrays["scale"]
+    intercept = float(arrays["intercept"][0]) - float(np.dot(coef, arrays["mean"]))
+    return LinearPredictor(header["feature_names"], np.array(arrays["classes"]), coef, intercept)
+
+
+def load_pipeline(path: str):
+    """Function to load a model artifact as a fitted scikit-learn pipeline
+    of a column transformer with standard scaling followed by the saved
+    estimator.
+
+    The pipeline is first fitted on two placeholder rows, which sets up
+    every fitted attribute scikit-learn expects, and the stored parameters
+    then replace the placeholder ones. An `SGDClassifier` also gets back
+    its update count and averaging weights, so `partial_fit` continues
+    from the saved model rather than from the placeholder fit.
+
+    Parameters
+    ----------
+    path : str
+        Path of the artifact.
+
+    Returns
+    -------
+    sklearn.pipeline.Pipeline
+        Pipeline making the same predictions as the saved one.
+
+    Raises
+    ------
+    ValueError
+        The artifact names an estimator other than those in `ESTIMATORS`
+    """
+    import pandas as pd
+    from sklearn import linear_model
+    from sklearn.compose import make_column_transformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    header, arrays = read_artifact(path)
+    if header["estimator"] not in ESTIMATORS:
+        raise ValueError(f"Unsupported estimator '{header['estimator']}'. Expected one of {ESTIMATORS}.")
+    names = header["feature_names"]
+    mean, scale = np.array(arrays["mean"]), np.array(arrays["scale"])
+    classes = np.array(arrays["classes"])
+
+    estimator = getattr(linear_model, header["estimator"])(**header["params"])
+    pipeline = make_pipeline(make_column_transformer((StandardScaler(), names)), estimator)
+    pipeline.fit(pd.DataFrame([mean - scale, mean + scale], columns=names), classes)
+
+    scaler = pipeline.steps[0][1].named_transformers_["standardscaler"]
+    scaler.mean_, scaler.scale_, scaler.var_ = mean, scale, scale ** 2
+    estimator.coef_ = np.array(arrays["coef"]).reshape(1, -1)
+    estimator.intercept_ = np.array(arrays["intercept"])
+    estimator.classes_ = classes
+    for name, value in header.get("estimator_state", {}).items():
+        setattr(estimator, name, value)
+    for name in SGD_ARRAYS:
+        if name.lstrip("_") in arrays:
+            setattr(estimator, name, np.array(arrays[name.lstrip("_")]))
+    return pipeline
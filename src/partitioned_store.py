@@ -0,0 +1,408 @@
+import json
+import operator
+import os
+import re
+import shutil
+import uuid
+import pandas as pd
+from src.choices import PARTITION_COLUMNS
+from src.storage import TableWriter, _astype, read_table
+from src.write_csv import open_csv
+from src.instrumentation import instrumented
+
+# Name of the metadata index at the root of a store
+INDEX_FILE = "_index.json"
+# Version written to the index; readers accept this version and older
+INDEX_VERSION = 1
+# Raw columns kept in a store's rows next to the processed columns, so that
+# reads can be restricted to an era, team or position
+STORE_COLUMNS = {
+    "season": "int32",
+    "team_code": "category",
+    "position_type": "category"
+}
+# Filter operators, mapped to the function that compares a column with a value
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, values: column.isin(values),
+    "not in": lambda column, values: ~column.isin(values)
+}
+
+
+def _scalar(value):
+    """Convert a NumPy scalar to the Python value JSON stores."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def _bounds(series: pd.Series) -> tuple:
+    """Return the minimum and maximum of the non-null values of a column,
+    or None for a column that has none."""
+    values = series.dropna()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(values.cat.categories.dtype)
+    if values.empty:
+        return None
+    return _scalar(values.min()), _scalar(values.max())
+
+
+class PartitionedWriter:
+    """Writes DataFrame chunks to a store: a directory with one
+    subdirectory per value of the partition columns, laid out as
+    `season=20232024/team_code=TOR/part-00000.csv`, and a JSON index
+    `_index.json` listing every partition's files, row count and minimum
+    and maximum of each column.
+
+    Each chunk is appended to the CSV part file of every partition it has
+    rows for; in Parquet and Feather stores, which cannot be appended to,
+    it adds a new part file to each of those partitions instead. The
+    store is built in a temporary directory and renamed into place when the
+    writer is closed, replacing any earlier store at the same path, so
+    readers never see a partial store. Use as a context manager::
+
+        with PartitionedWriter(directory, template, ["season"]) as writer:
+            writer.write(chunk)
+
+    Parameters
+    ----------
+    directory : str
+        Path of the store.
+    template : pd.DataFrame
+        Frame with the columns and dtypes of the rows.
+    partition_by : list, optional
+        Columns of `PARTITION_COLUMNS` to partition by, by default season
+    file_format : str, optional
+        Format of the part files (csv, parquet or feather), by default "csv"
+    """
+
+    def __init__(self, directory: str, template: pd.DataFrame, partition_by: list = ("season",),
+                 file_format: str = "csv"):
+        partition_by = list(partition_by)
+        if not partition_by or any(column not in PARTITION_COLUMNS for column in partition_by):
+            raise ValueError(f"Partition columns must be among {PARTITION_COLUMNS}.")
+        missing = [column for column in partition_by if column not in template.columns]
+        if missing:
+            raise ValueError(f"Partition columns {missing} are not in the template.")
+        if os.path.exists(directory) and not os.path.exists(os.path.join(directory, INDEX_FILE)):
+            raise FileExistsError(f"{directory} exists and is not a store.")
+
+        self.directory = directory
+        self.partition_by = sorted(partition_by, key=PARTITION_COLUMNS.index)
+        self.file_format = file_format
+        self.dtypes = {column: str(dtype) for column, dtype in template.dtypes.items()}
+        self.rows = 0
+        self._partitions = {}
+        parent = os.path.dirname(os.path.abspath(directory))
+        self._temporary = os.path.join(parent, f".{os.path.basename(directory)}.{uuid.uuid4().hex[:8]}.tmp")
+        os.makedirs(self._temporary)
+
+    def write(self, chunk: pd.DataFrame):
+        """Add a chunk with the same columns as the template."""
+        groups = chunk.groupby(self.partition_by, observed=True, sort=False)
+        for key, part in groups:
+            key = key if isinstance(key, tuple) else (key,)
+            values = {column: _scalar(value) for column, value in zip(self.partition_by, key)}
+            path = "/".join(f"{column}={value}" for column, value in values.items())
+            partition = self._partitions.setdefault(path, {
+                "path": path, "values": values, "files": [], "rows": 0, "min": {}, "max": {}
+            })
+            if self.file_format == "csv" and partition["files"]:
+                # CSV parts are appended to, so streamed writes do not leave a file per chunk
+                with open_csv(os.path.join(self._temporary, path, partition["files"][0]), "a") as f:
+                    part.to_csv(f, header=False, index=False)
+            else:
+                filename = f"part-{len(partition['files']):05d}.{self.file_format}"
+                os.makedirs(os.path.join(self._temporary, path), exist_ok=True)
+                with TableWriter(os.path.join(self._temporary, path, filename), part) as writer:
+                    writer.write(part)
+                partition["files"].append(filename)
+            partition["rows"] += len(part)
+            for column in part.columns:
+                bounds = _bounds(part[column])
+                if bounds is None:
+                    continue
+                low, high = bounds
+                partition["min"][column] = min(partition["min"].get(column, low), low)
+                partition["max"][column] = max(partition["max"].get(column, high), high)
+        self.rows += len(chunk)
+
+    def close(self):
+        """Write the index and move the store into place."""
+        index = {
+            "index_version": INDEX_VERSION,
+            "file_format": self.file_format,
+            "partition_by": self.partition_by,
+            "dtypes": self.dtypes,
+            "rows": self.rows,
+            "partitions": sorted(self._partitions.values(), key=lambda partition: partition["path"])
+        }
+        with open(os.path.join(self._temporary, INDEX_FILE), "w") as f:
+            json.dump(index, f, indent=1)
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        os.replace(self._temporary, self.directory)
+
+    def abort(self):
+        """Discard the partial store, leaving any earlier one in place."""
+        shutil.rmtree(self._temporary, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+@instrumented
+def write_store(df: pd.DataFrame, directory: str, partition_by: list = ("season",), file_format: str = "csv"):
+    """Function to write a DataFrame as a partitioned store with one part
+    file per partition; see `PartitionedWriter`.
+
+    Raises
+    ------
+    TypeError
+        The input is not a Pandas DataFrame
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("The input must be of type Pandas DataFrame.")
+    with PartitionedWriter(directory, df, partition_by, file_format) as writer:
+        writer.write(df)
+
+
+def is_store(path: str) -> bool:
+    """Return True when `path` is a store written by `PartitionedWriter`."""
+    return os.path.isfile(os.path.join(str(path), INDEX_FILE))
+
+
+def read_index(path: str) -> dict:
+    """Function to read the metadata index of a store.
+
+    Raises
+    ------
+    ValueError
+        The path is not a store, or its index was written by a newer
+        version
+    """
+    if not is_store(path):
+        raise ValueError(f"{path} is not a partitioned store.")
+    with open(os.path.join(path, INDEX_FILE)) as f:
+        index = json.load(f)
+    if index.get("index_version", 0) > INDEX_VERSION:
+        raise ValueError(f"{path} has index version {index['index_version']}; "
+                         f"this version reads up to {INDEX_VERSION}.")
+    return index
+
+
+def parse_filter(text: str) -> tuple:
+    """Function to parse a filter written as `<column><operator><value>`,
+    such as `season>=20002001`, `position_type==defensemen` or
+    `team_code in TOR,MTL`. Values that are numbers are compared as numbers.
+
+    Returns
+    -------
+    tuple
+        (column, operator, value) accepted by `read_store`.
+
+    Raises
+    ------
+    ValueError
+        The text is not a filter
+    """
+    match = re.fullmatch(r"\s*(\w+)\s*(==|!=|<=|>=|<|>|\s+not\s+in\s+|\s+in\s+)\s*(.+?)\s*", text)
+    if match is None:
+        raise ValueError(f"Cannot parse filter '{text}'. Expected <column><operator><value> "
+                         f"with an operator among {list(OPERATORS)}.")
+    column, op, value = match.group(1), " ".join(match.group(2).split()), match.group(3)
+
+    def number(value):
+        for kind in (int, float):
+            try:
+                return kind(value)
+            except ValueError:
+                continue
+        return value
+    if op in ("in", "not in"):
+        return column, op, [number(item.strip()) for item in value.split(",")]
+    return column, op, number(value)
+
+
+def check_filters(filters: list):
+    """Raise a ValueError for filters with an unknown operator."""
+    for column, op, value in filters or []:
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported filter operator '{op}'. Expected one of {list(OPERATORS)}.")
+
+
+def filter_mask(df: pd.DataFrame, filters: list) -> pd.Series:
+    """Function to evaluate filters on the rows of a frame.
+
+    Returns
+    -------
+    pd.Series
+        Boolean mask that is True for the rows matching every filter.
+    """
+    check_filters(filters)
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters or []:
+        mask &= OPERATORS[op](df[column], value).fillna(False).astype(bool)
+    return mask
+
+
+def _may_match(partition: dict, column: str, op: str, value) -> bool:
+    """Decide from a partition's values and bounds whether any of its rows
+    can match a filter. False only when none can."""
+    if column in partition["values"]:
+        return bool(OPERATORS[op](pd.Series([partition["values"][column]]), value).iloc[0])
+    if column not in partition["min"]:
+        # The column is null throughout the partition and matches nothing but !=
+        return op in ("!=", "not in")
+    low, high = partition["min"][column], partition["max"][column]
+    try:
+        if op == "==":
+            return low <= value <= high
+        if op == "!=":
+            return not low == high == value
+        if op == "<":
+            return low < value
+        if op == "<=":
+            return low <= value
+        if op == ">":
+            return high > value
+        if op == ">=":
+            return high >= value
+        if op == "in":
+            return any(low <= item <= high for item in value)
+        return not (low == high and low in value)
+    except TypeError:
+        # Values of another type than the column's cannot be pruned on
+        return True
+
+
+def prune_partitions(index: dict, filters: list = None) -> list:
+    """Function to select the partitions of a store that may hold rows
+    matching every filter, from the partition values and the per-partition
+    minimum and maximum of each column in the index.
+
+    Returns
+    -------
+    list
+        Index entries of the partitions to read.
+    """
+    check_filters(filters)
+    return [
+        partition for partition in index["partitions"]
+        if all(_may_match(partition, column, op, value) for column, op, value in filters or [])
+    ]
+
+
+def _read_partitions(path: str, index: dict, partitions: list, filters: list, columns: list, dtypes: dict):
+    """Yield the matching rows of each part file of the given partitions."""
+    dtypes = {**index["dtypes"], **(dtypes or {})}
+    columns = list(index["dtypes"]) if columns is None else list(columns)
+    unknown = [column for column, _, _ in filters or [] if column not in index["dtypes"]]
+    if unknown:
+        raise ValueError(f"Filter columns {unknown} are not in the store.")
+    read_columns = list(dict.fromkeys([*columns, *(column for column, _, _ in filters or [])]))
+    read_dtypes = {column: dtypes[column] for column in read_columns if column in dtypes}
+
+    for partition in partitions:
+        for filename in partition["files"]:
+            part = read_table(os.path.join(path, partition["path"], filename), columns=read_columns,
+                              dtypes=read_dtypes)
+            if filters:
+                part = part[filter_mask(part, filters)]
+            yield part[columns]
+
+
+@instrumented
+def read_store(path: str, filters: list = None, columns: list = None, dtypes: dict = None) -> pd.DataFrame:
+    """Function to read the rows of a store that match a list of filters,
+    opening only the partitions whose values and column bounds in the
+    index allow a match.
+
+    Parameters
+    ----------
+    path : str
+        Path of the store.
+    filters : list, optional
+        (column, operator, value) tuples, all of which a row must match,
+        with an operator among `OPERATORS`; `parse_filter` builds them from
+        text. By default every row is read.
+    columns : list, optional
+        Subset of columns to return, by default all columns. Filter columns
+        are read even when not returned.
+    dtypes : dict, optional
+        Column name -> dtype overriding the dtypes recorded in the index.
+
+    Returns
+    -------
+    pd.DataFrame
+        The matching rows, with the store's dtypes.
+
+    Raises
+    ------
+    ValueError
+        The path is not a store, or a filter has an unknown operator or
+        column
+    """
+    index = read_index(path)
+    partitions = prune_partitions(index, filters)
+    columns = list(index["dtypes"]) if columns is None else list(columns)
+    parts = list(_read_partitions(path, index, partitions, filters, columns, dtypes))
+    template = _astype(pd.DataFrame(columns=columns), {**index["dtypes"], **(dtypes or {})})
+    # Categories differ between parts, so the concatenation is cast back to the store's dtypes
+    df = pd.concat(parts, ignore_index=True) if parts else template
+    return _astype(df, {**index["dtypes"], **(dtypes or {})})
+
+
+def iter_store(path: str, chunksize: int, filters: list = None, columns: list = None, dtypes: dict = None):
+    """Function to read the rows of a store that match a list of filters in
+    chunks of at most `chunksize` rows, opening only the partitions that
+    may match. See `read_store` for the parameters.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive chunks of the matching rows.
+    """
+    index = read_index(path)
+    columns = list(index["dtypes"]) if columns is None else list(columns)
+    all_dtypes = {**index["dtypes"], **(dtypes or {})}
+    buffered, rows = [], 0
+    for part in _read_partitions(path, index, prune_partitions(index, filters), filters, columns, dtypes):
+        buffered.append(part)
+        rows += len(part)
+        while rows >= chunksize:
+            combined = pd.concat(buffered, ignore_index=True)
+            yield _astype(combined.iloc[:chunksize].reset_index(drop=True), all_dtypes)
+            buffered, rows = [combined.iloc[chunksize:]], len(combined) - chunksize
+    if rows:
+        yield _astype(pd.concat(buffered, ignore_index=True), all_dtypes)
+
+
+def store_summary(path: str) -> pd.DataFrame:
+    """Function to list the partitions of a store from its index.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per partition with its partition values, number of files
+        and rows, and the minimum and maximum of each column.
+    """
+    index = read_index(path)
+    rows = []
+    for partition in index["partitions"]:
+        row = {**partition["values"], "files": len(partition["files"]), "rows": partition["rows"]}
+        row.update({f"{column}_min": value for column, value in partition["min"].items()
+                    if column not in partition["values"]})
+        row.update({f"{column}_max": value for column, value in partition["max"].items()
+                    if column not in partition["values"]})
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,161 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.instrumentation import instrumented, propagate_run
+
+# Features whose predictive power score reaches this value fail the check
+PPS_THRESHOLD = 0.9
+
+
+def _weighted_f1(y: np.ndarray, y_pred: np.ndarray, n_classes: int) -> float:
+    """Support-weighted F1 score of integer class codes."""
+    true_positives = np.bincount(y[y == y_pred], minlength=n_classes)
+    support = np.bincount(y, minlength=n_classes)
+    predicted = np.bincount(y_pred, minlength=n_classes)
+    denominator = support + predicted
+    f1 = np.divide(2 * true_positives, denominator, out=np.zeros(n_classes), where=denominator > 0)
+    return float(f1 @ support / support.sum())
+
+
+def _feature_pps(x: np.ndarray, y: np.ndarray, folds: np.ndarray, n_classes: int, n_bins: int, n_folds: int) -> float:
+    """Cross-validated predictive power score of one numeric feature.
+
+    The feature is cut into quantile bins and each bin predicts the most
+    common class among the training folds, which is the piecewise-constant
+    rule a single-feature decision tree learns. All folds are fitted at once
+    from one table of counts per fold, bin and class.
+    """
+    present = ~np.isnan(x)
+    x, y, folds = x[present], y[present], folds[present]
+    if len(x) == 0:
+        return 0.0
+
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    bins = np.searchsorted(edges, x, side="right")
+    n_cells = len(edges) + 1
+
+    counts = np.bincount((folds * n_cells + bins) * n_classes + y, minlength=n_folds * n_cells * n_classes)
+    counts = counts.reshape(n_folds, n_cells, n_classes)
+    # Rules fitted on every fold but the held-out one
+    rules = np.argmax(counts.sum(axis=0) - counts, axis=2)
+    y_pred = rules[folds, bins]
+
+    model_f1 = _weighted_f1(y, y_pred, n_classes)
+    baseline_f1 = _weighted_f1(y, np.full_like(y, np.argmax(np.bincount(y, minlength=n_classes))), n_classes)
+    if baseline_f1 >= 1:
+        return 0.0
+    return max(0.0, (model_f1 - baseline_f1) / (1 - baseline_f1))
+
+
+def stratified_sample(labels: np.ndarray, sample_size: int, random_state: int = 123) -> np.ndarray:
+    """Return the sorted positions of a sample of `sample_size` rows that
+    keeps the class proportions of `labels`."""
+    rng = np.random.default_rng(random_state)
+    classes, codes, support = np.unique(labels, return_inverse=True, return_counts=True)
+    if sample_size >= len(labels):
+        return np.arange(len(labels))
+    # Random keys ranked within each class keep the first n_c rows of class c
+    sizes = np.maximum(np.round(support * sample_size / len(labels)).astype(np.int64), 1)
+    order = np.lexsort((rng.random(len(labels)), codes))
+    starts = np.concatenate([[0], np.cumsum(support)[:-1]])
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[order] = np.arange(len(labels)) - np.repeat(starts, support)
+    return np.flatnonzero(rank < sizes[codes])
+
+
+@instrumented
+def feature_label_pps(
+    df: pd.DataFrame,
+    label: str,
+    n_bins: int = 64,
+    n_folds: int = 4,
+    sample_size: int = None,
+    time_budget: float = None,
+    random_state: int = 123,
+    n_jobs: int = None
+) -> pd.Series:
+    """Function to compute the predictive power score (PPS) of each feature
+    for the label, as a fast replacement for deepchecks'
+    `FeatureLabelCorrelation`.
+
+    Each feature is scored by the cross-validated weighted F1 score of the
+    best piecewise-constant rule on its quantile bins, normalized against
+    always predicting the most common class, so 0 means no predictive power
+    and 1 a perfect predictor. Features are scored in parallel threads.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data with numeric features and the label column.
+    label : str
+        Name of the label column.
+    n_bins : int, optional
+        Maximum number of quantile bins per feature, by default 64
+    n_folds : int, optional
+        Number of cross-validation folds, by default 4
+    sample_size : int, optional
+        Score a stratified sample of this many rows instead of all rows.
+    time_budget : float, optional
+        Seconds to spend; stratified samples of doubling size are scored
+        until the next one would not fit in the budget or all rows have
+        been used. By default every row (or `sample_size` rows) is scored
+        once.
+    random_state : int, optional
+        Seed for the sample and the folds, by default 123
+    n_jobs : int, optional
+        Number of threads, by default one per feature
+
+    Returns
+    -------
+    pd.Series
+        PPS of each feature, indexed by feature name.
+
+    Raises
+    ------
+    TypeError
+        The input is not a Pandas DataFrame
+    ValueError
+        The label is missing or a sample size or budget is not positive
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("The input must be of type Pandas DataFrame.")
+    if label not in df.columns:
+        raise ValueError(f"Label column '{label}' is missing from the data.")
+    if sample_size is not None and sample_size < 1:
+        raise ValueError("Sample size must be a positive integer.")
+    if time_budget is not None and time_budget <= 0:
+        raise ValueError("Time budget must be positive.")
+
+    features = [column for column in df.columns if column != label]
+    _, y = np.unique(df[label].to_numpy(), return_inverse=True)
+    y = y.ravel()
+    n_classes = int(y.max()) + 1 if len(y) else 1
+    values = {feature: df[feature].to_numpy(dtype=np.float64) for feature in features}
+
+    def score(positions):
+        rng = np.random.default_rng(random_state)
+        folds = rng.integers(0, n_folds, len(positions))
+        with ThreadPoolExecutor(max_workers=n_jobs or max(len(features), 1)) as executor:
+            scores = executor.map(
+                propagate_run(lambda feature: _feature_pps(values[feature][positions], y[positions], folds,
+                                                           n_classes, n_bins, n_folds)),
+                features
+            )
+            return pd.Series(list(scores), index=features, dtype=np.float64, name="pps")
+
+    limit = min(sample_size or len(y), len(y))
+    if time_budget is None:
+        return score(stratified_sample(y, limit, random_state))
+
+    started = time.perf_counter()
+    size = min(10_000, limit)
+    while True:
+        round_started = time.perf_counter()
+        scores = score(stratified_sample(y, size, random_state))
+        elapsed = time.perf_counter() - round_started
+        remaining = time_budget - (time.perf_counter() - started)
+        # Scoring is linear in the rows, so twice the rows takes about twice as long
+        if size >= limit or 2 * elapsed > remaining:
+            return scores
+        size = min(2 * size, limit)
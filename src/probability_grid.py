@@ -0,0 +1,255 @@
+import numpy as np
+from src.instrumentation import instrumented
+from src.linear_predictor import as_feature_array
+from src.model_artifact import load_predictor, read_artifact
+
+# Ways `ProbabilityGrid` looks up a row between grid points
+METHODS = ["nearest", "linear"]
+
+# Spacing of the grid in feature units (kg, cm). Roster measurements are
+# whole kilograms and centimetres, so every valid input is a grid point
+RESOLUTION = 1.0
+
+# Largest slope and curvature of the logistic function s(z):
+# max s' = 1/4 at z = 0, and max |s''| = 1/(6 sqrt(3)) at z = +-log(2 + sqrt(3))
+_MAX_SLOPE = 0.25
+_MAX_CURVATURE = 1 / (6 * np.sqrt(3))
+
+# Rounding error of a probability stored as float32
+_FLOAT32_ROUNDING = float(np.finfo(np.float32).eps) / 2
+
+
+class ProbabilityGrid:
+    """Precomputed positive-class probabilities of a two-feature model over
+    a rectangular grid of its valid input domain, served by lookup instead
+    of evaluating the model.
+
+    A row inside the domain is answered from the table, either by the
+    nearest grid point (one O(1) index) or by bilinear interpolation of the
+    four surrounding points. Rows outside the domain, or with missing
+    values, are answered by the fallback model. Inputs are accepted in the
+    same forms as `LinearPredictor`.
+
+    Parameters
+    ----------
+    feature_names : list of str
+        Names of the two input features, in column order; the table's first
+        axis is the first feature.
+    classes : np.ndarray
+        The two class labels, negative class first.
+    lows : np.ndarray
+        Value of each feature at the first grid point.
+    steps : np.ndarray
+        Spacing of the grid points along each feature.
+    table : np.ndarray
+        float32 probability of the positive class at each grid point, with
+        at least two points along each feature.
+    fallback : object, optional
+        Model with a `predict_proba` on 2-D arrays in feature order, used
+        for rows outside the domain; without one such rows raise.
+    error_bound : dict, optional
+        Largest absolute difference from the exact model's probability for
+        any row inside the domain, per method.
+    """
+
+    __slots__ = ("feature_names", "classes", "lows", "steps", "table", "fallback", "error_bound")
+
+    def __init__(self, feature_names, classes, lows, steps, table, fallback=None, error_bound=None):
+        self.feature_names = list(feature_names)
+        self.classes = np.asarray(classes)
+        self.lows = np.asarray(lows, dtype=float)
+        self.steps = np.asarray(steps, dtype=float)
+        self.table = table
+        self.fallback = fallback
+        self.error_bound = dict(error_bound or {})
+        if len(self.feature_names) != 2 or self.table.ndim != 2 or min(self.table.shape) < 2:
+            raise ValueError("A probability grid has two features and at least two points along each.")
+
+    @property
+    def highs(self) -> np.ndarray:
+        """Value of each feature at the last grid point."""
+        return self.lows + self.steps * (np.array(self.table.shape) - 1)
+
+    def predict_proba(self, X, method: str = "linear") -> np.ndarray:
+        """Return the probability of each class for each row.
+
+        Raises
+        ------
+        ValueError
+            The method is not one of `METHODS`, or a row is outside the
+            domain and there is no fallback
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unsupported method '{method}'. Expected one of {METHODS}.")
+        X = as_feature_array(X, self.feature_names)
+        rows, columns = self.table.shape
+        # Position of each row in grid steps; NaN compares False, so it is outside
+        x = (X[:, 0] - self.lows[0]) * (1 / self.steps[0])
+        y = (X[:, 1] - self.lows[1]) * (1 / self.steps[1])
+        inside = (x >= 0) & (x <= rows - 1) & (y >= 0) & (y <= columns - 1)
+        if not inside.all():
+            x, y = x[inside], y[inside]
+
+        # Rows are looked up in the flattened table, one index per grid point
+        table = self.table.reshape(-1)
+        if method == "nearest":
+            looked_up = table.take((x + 0.5).astype(np.intp) * columns + (y + 0.5).astype(np.intp))
+        else:
+            i = np.minimum(x.astype(np.intp), rows - 2)
+            j = np.minimum(y.astype(np.intp), columns - 2)
+            u, v = x - i, y - j
+            corner = i * columns + j
+            low_y = table.take(corner) * (1 - u) + table.take(corner + columns) * u
+            high_y = table.take(corner + 1) * (1 - u) + table.take(corner + columns + 1) * u
+            looked_up = low_y * (1 - v) + high_y * v
+
+        if inside.all():
+            positive = looked_up.astype(float)
+        else:
+            positive = np.empty(len(X))
+            positive[inside] = looked_up
+            if self.fallback is None:
+                raise ValueError(f"{(~inside).sum()} rows are outside the grid's domain "
+                                 f"{self.lows.tolist()} to {self.highs.tolist()} and there is no fallback.")
+            positive[~inside] = self.fallback.predict_proba(X[~inside])[:, 1]
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X, method: str = "linear") -> np.ndarray:
+        """Return the predicted class label for each row. Rows whose exact
+        probability is within `error_bound` of 0.5 may get the other label."""
+        return self.classes[(self.predict_proba(X, method)[:, 1] > 0.5).astype(int)]
+
+
+def _grid_points(lows: np.ndarray, steps: np.ndarray, shape: tuple) -> np.ndarray:
+    """Return every point of a grid as rows, in the table's C order."""
+    axes = [low + step * np.arange(size) for low, step, size in zip(lows, steps, shape)]
+    return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(shape))
+
+
+@instrumented
+def build_probability_grid(pipeline, resolution: float = RESOLUTION, ranges: dict = None) -> ProbabilityGrid:
+    """
+    Function to precompute the positive-class probabilities of a fitted
+    pipeline over a grid of its valid input domain.
+
+    The grid spans each feature's valid range with points at most
+    `resolution` apart, and holds the pipeline's `predict_proba` at every
+    point as float32. The compiled pipeline is the fallback for rows
+    outside the domain.
+
+    The error bounds hold for every row inside the domain. With the
+    logistic model p = s(w . x + b), the nearest grid point is at most
+    half a step away along each feature, so the nearest lookup is off by
+    at most max s' * sum(|w_i| h_i / 2). Bilinear interpolation is off by
+    at most sum(h_i^2 / 8 * max |d2p/dx_i^2|) = max |s''| / 8 *
+    sum((w_i h_i)^2). Both add the float32 rounding of the table.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline accepted by `compile_predictor`, with two features.
+    resolution : float, optional
+        Largest spacing between grid points, in feature units, by default
+        1.0
+    ranges : dict, optional
+        Feature name -> (low, high) of the domain, by default the
+        validated ranges in `FEATURE_RANGES`
+
+    Returns
+    -------
+    ProbabilityGrid
+        The grid.
+
+    Raises
+    ------
+    TypeError
+        The pipeline cannot be compiled to a logistic regression
+    ValueError
+        The resolution is not positive, or the pipeline does not have two
+        features with a range each
+    """
+    import pandas as pd
+    from src.clean_rosters import FEATURE_RANGES
+    from src.compile_predictor import compile_predictor
+
+    if resolution <= 0:
+        raise ValueError("resolution must be positive.")
+    ranges = FEATURE_RANGES if ranges is None else ranges
+    predictor = compile_predictor(pipeline)
+    names = predictor.feature_names
+    if len(names) != 2 or any(name not in ranges for name in names):
+        raise ValueError(f"A probability grid needs two features with a range each; got {names}.")
+
+    lows = np.array([ranges[name][0] for name in names], dtype=float)
+    highs = np.array([ranges[name][1] for name in names], dtype=float)
+    shape = tuple(int(size) for size in np.maximum(np.ceil((highs - lows) / resolution - 1e-9), 1) + 1)
+    steps = (highs - lows) / (np.array(shape) - 1)
+
+    points = pd.DataFrame(_grid_points(lows, steps, shape), columns=names)
+    table = pipeline.predict_proba(points)[:, 1].astype(np.float32).reshape(shape)
+
+    weighted_steps = np.abs(predictor.coef) * steps
+    error_bound = {
+        "nearest": _MAX_SLOPE * float(weighted_steps.sum()) / 2 + _FLOAT32_ROUNDING,
+        "linear": _MAX_CURVATURE / 8 * float((weighted_steps ** 2).sum()) + _FLOAT32_ROUNDING
+    }
+    return ProbabilityGrid(names, predictor.classes, lows, steps, table, predictor, error_bound)
+
+
+def grid_error(grid: ProbabilityGrid, model, method: str = "linear") -> float:
+    """Function to measure the largest absolute difference between the
+    grid's and the model's positive-class probability at the centre of
+    every grid cell, where interpolation is furthest from the grid points.
+
+    Parameters
+    ----------
+    grid : ProbabilityGrid
+        The grid.
+    model : object
+        Exact model with a `predict_proba`, such as the fitted pipeline.
+    method : str, optional
+        Lookup method of the grid, by default "linear"
+
+    Returns
+    -------
+    float
+        The largest difference.
+    """
+    import pandas as pd
+    shape = tuple(size - 1 for size in grid.table.shape)
+    centres = pd.DataFrame(_grid_points(grid.lows + grid.steps / 2, grid.steps, shape), columns=grid.feature_names)
+    exact = model.predict_proba(centres)[:, 1]
+    return float(np.abs(grid.predict_proba(centres, method)[:, 1] - exact).max())
+
+
+def grid_state(grid: ProbabilityGrid) -> dict:
+    """Function to describe a grid as the `extra_arrays` and `metadata` to
+    pass to `save_artifact`, so that `load_probability_grid` can serve it
+    from the model artifact."""
+    return {
+        "extra_arrays": {"probability_grid": grid.table},
+        "metadata": {"probability_grid": {
+            "lows": grid.lows.tolist(),
+            "steps": grid.steps.tolist(),
+            "error_bound": grid.error_bound
+        }}
+    }
+
+
+def load_probability_grid(path: str) -> ProbabilityGrid:
+    """Function to load the probability grid stored in a model artifact.
+    The table is memory mapped and the artifact's predictor is the
+    fallback; only NumPy is imported.
+
+    Raises
+    ------
+    ValueError
+        The artifact was saved without a probability grid
+    """
+    header, arrays = read_artifact(path)
+    spec = header.get("metadata", {}).get("probability_grid")
+    if spec is None or "probability_grid" not in arrays:
+        raise ValueError(f"{path} has no probability grid; save it with --grid-resolution.")
+    predictor = load_predictor(path)
+    return ProbabilityGrid(header["feature_names"], predictor.classes, spec["lows"], spec["steps"],
+                           arrays["probability_grid"], predictor, spec["error_bound"])
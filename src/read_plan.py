@@ -0,0 +1,155 @@
+import logging
+import os
+import pandas as pd
+from src.clean_rosters import PROCESSED_DTYPES
+from src.partitioned_store import filter_mask
+from src.storage import iter_table, table_columns
+
+# Raw columns the preprocessing stage reads, with compact dtypes. Together
+# they identify a roster row for deduplication: the raw columns left out
+# are the player's name, birth details and headshot URL, which are fixed by
+# player_id, and the height in inches and weight in pounds, which are
+# conversions of the metric measurements.
+RAW_READ_PLAN = {
+    "team_code": "category",
+    "season": "int32",
+    "position_type": "category",
+    "player_id": "int32",
+    "sweater_number": "float32",
+    "position_code": "category",
+    "shoots_catches": "category",
+    "height_in_centimeters": "float32",
+    "weight_in_kilograms": "float32"
+}
+
+# Columns and dtypes each stage reads from its input table; the classifier
+# also reads the sample weights of collapsed player records and the season
+# of each row, which incremental retraining needs, when present
+READ_PLANS = {
+    "preprocess": RAW_READ_PLAN,
+    "eda": PROCESSED_DTYPES,
+    "classify": {**PROCESSED_DTYPES, "sample_weight": "int32", "season": "int32"}
+}
+
+
+def read_plan(stage: str, path: str = None) -> dict:
+    """Function to look up the columns and dtypes a stage reads.
+
+    Parameters
+    ----------
+    stage : str
+        One of the stages in `READ_PLANS`.
+    path : str, optional
+        Table the plan is for; planned columns it does not have are left
+        out of the plan. By default every planned column is kept.
+
+    Returns
+    -------
+    dict
+        Column name -> dtype, in the order the columns are read; pass the
+        keys as `columns` and the dict as `dtypes` to `read_table` or
+        `iter_table`.
+
+    Raises
+    ------
+    ValueError
+        The stage has no read plan
+    """
+    if stage not in READ_PLANS:
+        raise ValueError(f"No read plan for stage '{stage}'. Expected one of {sorted(READ_PLANS)}.")
+    plan = dict(READ_PLANS[stage])
+    if path is not None:
+        available = set(table_columns(path))
+        plan = {column: dtype for column, dtype in plan.items() if column in available}
+    return plan
+
+
+def plan_frame(df: pd.DataFrame, plan: dict, filters: list = None) -> pd.DataFrame:
+    """Function to give a frame handed over in memory by an earlier stage
+    the rows, columns, dtypes and index that reading it from a table with
+    the plan and filters would give.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The frame, which is not modified.
+    plan : dict
+        Column name -> dtype, as returned by `read_plan`; planned columns
+        the frame does not have are left out.
+    filters : list, optional
+        (column, operator, value) filters the rows must match, by default
+        all rows are kept
+
+    Returns
+    -------
+    pd.DataFrame
+        A new frame with a default index.
+    """
+    if filters:
+        df = df[filter_mask(df, filters)]
+    columns = [column for column in plan if column in df.columns]
+    return df[columns].astype({column: plan[column] for column in columns}).reset_index(drop=True)
+
+
+def memory_report(df: pd.DataFrame, path: str, sample_rows: int = 10_000) -> pd.DataFrame:
+    """Function to compare the memory of a frame read with a read plan
+    against reading every column of the same file with inferred dtypes.
+
+    The default footprint is estimated from the first `sample_rows` rows of
+    the file read without a plan, scaled to the number of rows in `df`, so
+    the full file is not read twice.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The frame read with the plan.
+    path : str
+        Path of the table it was read from.
+    sample_rows : int, optional
+        Number of rows read to estimate the default footprint, by default
+        10000
+
+    Returns
+    -------
+    pd.DataFrame
+        Per column `default_dtype`, `planned_dtype` (empty for columns the
+        plan skips), `default_mb` and `planned_mb`, followed by a `total`
+        row.
+    """
+    sample = next(iter_table(path, sample_rows), None)
+    if sample is None or sample.empty:
+        sample = pd.DataFrame(columns=df.columns)
+    rows = max(len(sample), 1)
+    default_bytes = sample.memory_usage(deep=True, index=False) / rows * len(df)
+    planned_bytes = df.memory_usage(deep=True, index=False)
+
+    columns = list(dict.fromkeys([*sample.columns, *df.columns]))
+    report = pd.DataFrame({
+        "default_dtype": [str(sample[column].dtype) if column in sample else "" for column in columns],
+        "planned_dtype": [str(df[column].dtype) if column in df else "" for column in columns],
+        "default_mb": default_bytes.reindex(columns).fillna(0).to_numpy() / 2**20,
+        "planned_mb": planned_bytes.reindex(columns).fillna(0).to_numpy() / 2**20
+    }, index=pd.Index(columns, name="column"))
+    report.loc["total"] = ["", "", report["default_mb"].sum(), report["planned_mb"].sum()]
+    return report
+
+
+def report_memory(df: pd.DataFrame, path: str, stage: str, report_to: str = None) -> pd.DataFrame:
+    """Function to log the `memory_report` of the frame a stage read and,
+    with a directory, write it to `<report_to>/<stage>_memory.csv`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The memory report.
+    """
+    report = memory_report(df, path)
+    total = report.loc["total"]
+    saving = total["default_mb"] / total["planned_mb"] if total["planned_mb"] else float("nan")
+    logging.info(f"Memory of the {stage} input with its read plan: {total['planned_mb']:.1f} MB, "
+                 f"{saving:.1f}x less than an untyped read of every column:\n"
+                 + report.to_string(float_format=lambda value: f"{value:.2f}"))
+    if report_to is not None:
+        os.makedirs(report_to, exist_ok=True)
+        report.to_csv(os.path.join(report_to, f"{stage}_memory.csv"))
+    return report
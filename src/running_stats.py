@@ -0,0 +1,255 @@
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """Mergeable approximate quantile sketch in the style of KLL.
+
+    Values are kept in levels of compactors. An item at level `i` stands for
+    `2**i` original values. When a level grows past its capacity it is
+    sorted and every other item is promoted to the next level, so memory
+    stays around `3 * k` items no matter how many values are added. Until
+    more than `exact_limit` values have been added the sketch holds every
+    value and the quantiles are exact.
+
+    Parameters
+    ----------
+    k : int, optional
+        Capacity of the top level, by default 200. Larger values give more
+        accurate quantiles at the cost of memory.
+    exact_limit : int, optional
+        Number of values kept exactly before compaction starts,
+        by default 100000
+    seed : int, optional
+        Seed for the random compaction offsets, by default 0
+    """
+
+    def __init__(self, k: int = 200, exact_limit: int = 100_000, seed: int = 0):
+        if not isinstance(k, int) or k < 2:
+            raise ValueError("k must be an integer of at least 2.")
+        self.k = k
+        self.exact_limit = exact_limit
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def n(self) -> int:
+        """Number of values summarised by the sketch."""
+        return int(sum(len(level) << i for i, level in enumerate(self.levels)))
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        if len(self.levels) == 1 and len(self.levels[0]) <= self.exact_limit:
+            return
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind so no weight is lost
+                leftover = items[len(items) - len(items) % 2:]
+                items = items[:len(items) - len(items) % 2]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = leftover
+            level += 1
+
+    def update(self, values):
+        """Add an array of values. Missing values are ignored."""
+        values = np.asarray(values, dtype=float).ravel()
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch"):
+        """Fold the values summarised by another sketch into this one."""
+        for i, level in enumerate(other.levels):
+            if i == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[i] = np.concatenate([self.levels[i], level])
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Return the approximate `q` quantile(s), interpolating linearly
+        like `pd.Series.quantile`."""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], q)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** i) for i, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        weights = weights[order]
+        # Place each item at the middle of the rank range it stands for
+        positions = (np.cumsum(weights) - weights / 2 - 0.5) / (self.n - 1)
+        return np.interp(q, positions, values)
+
+
+class RunningStats:
+    """Single-pass, mergeable summary statistics of a table.
+
+    Chunks of a table are added with `update`, and summaries built from
+    different chunks or processes are combined with `merge`. Each column
+    keeps its non-null and null counts; numeric columns also keep the mean
+    and sum of squared deviations (updated with Welford/Chan), the minimum,
+    the maximum and a `QuantileSketch`. The first rows seen are kept for
+    `head`.
+
+    Parameters
+    ----------
+    k : int, optional
+        Capacity of each column's quantile sketch, by default 200
+    exact_limit : int, optional
+        Number of values per column for which quantiles are exact,
+        by default 100000
+    n_head : int, optional
+        Number of leading rows to keep, by default 5
+    """
+
+    def __init__(self, k: int = 200, exact_limit: int = 100_000, n_head: int = 5):
+        self.k = k
+        self.exact_limit = exact_limit
+        self.n_head = n_head
+        self.rows = 0
+        self.columns = {}
+        self._head = None
+
+    @staticmethod
+    def _is_numeric(dtype) -> bool:
+        return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+    def _new_column(self, dtype) -> dict:
+        return {
+            "dtype": dtype,
+            "non_nulls": 0,
+            "nulls": 0,
+            "mean": 0.0,
+            "m2": 0.0,
+            "min": np.nan,
+            "max": np.nan,
+            "sketch": QuantileSketch(self.k, self.exact_limit) if self._is_numeric(dtype) else None
+        }
+
+    @staticmethod
+    def _combine_dtypes(left, right):
+        if left == right:
+            return left
+        if RunningStats._is_numeric(left) and RunningStats._is_numeric(right):
+            return np.result_type(left, right)
+        return np.dtype(object)
+
+    def _merge_column(self, name: str, other: dict):
+        if name not in self.columns:
+            self.columns[name] = self._new_column(other["dtype"])
+        column = self.columns[name]
+        column["dtype"] = self._combine_dtypes(column["dtype"], other["dtype"])
+        if column["sketch"] is None and self._is_numeric(column["dtype"]):
+            column["sketch"] = QuantileSketch(self.k, self.exact_limit)
+
+        n_a, n_b = column["non_nulls"], other["non_nulls"]
+        if column["sketch"] is not None and other["sketch"] is not None and n_b > 0:
+            n = n_a + n_b
+            delta = other["mean"] - column["mean"]
+            column["mean"] += delta * n_b / n
+            column["m2"] += other["m2"] + delta ** 2 * n_a * n_b / n
+            column["min"] = np.nanmin([column["min"], other["min"]])
+            column["max"] = np.nanmax([column["max"], other["max"]])
+            column["sketch"].merge(other["sketch"])
+        column["non_nulls"] = n_a + n_b
+        column["nulls"] += other["nulls"]
+
+    def update(self, chunk: pd.DataFrame):
+        """Add the rows of a DataFrame chunk.
+
+        Raises
+        ------
+        TypeError
+            The input is not a Pandas DataFrame
+        """
+        if not isinstance(chunk, pd.DataFrame):
+            raise TypeError("The input must be of type Pandas DataFrame.")
+
+        partial = RunningStats(self.k, self.exact_limit, self.n_head)
+        partial.rows = len(chunk)
+        partial._head = chunk.head(self.n_head)
+        for name in chunk.columns:
+            series = chunk[name]
+            column = partial._new_column(series.dtype)
+            nulls = int(series.isnull().sum())
+            column["nulls"] = nulls
+            column["non_nulls"] = len(series) - nulls
+            if column["sketch"] is not None and column["non_nulls"] > 0:
+                values = series.to_numpy(dtype=float, na_value=np.nan)
+                values = values[~np.isnan(values)]
+                column["mean"] = values.mean()
+                column["m2"] = ((values - column["mean"]) ** 2).sum()
+                column["min"] = values.min()
+                column["max"] = values.max()
+                column["sketch"].update(values)
+            partial.columns[name] = column
+        return self.merge(partial)
+
+    def merge(self, other: "RunningStats"):
+        """Fold the statistics of another accumulator into this one. Rows
+        of `self` come before the rows of `other` in `head`."""
+        for name, column in other.columns.items():
+            self._merge_column(name, column)
+        self.rows += other.rows
+        if other._head is not None:
+            if self._head is None:
+                self._head = other._head
+            elif len(self._head) < self.n_head:
+                self._head = pd.concat([self._head, other._head]).head(self.n_head)
+        return self
+
+    def info(self) -> pd.DataFrame:
+        """Return the name, non-null count, null count and type of each
+        column, like `DataFrame.info`."""
+        return pd.DataFrame({
+            "name": list(self.columns),
+            "non-nulls": [column["non_nulls"] for column in self.columns.values()],
+            "nulls": [column["nulls"] for column in self.columns.values()],
+            "type": [column["dtype"] for column in self.columns.values()]
+        })
+
+    def describe(self) -> pd.DataFrame:
+        """Return count, mean, std, min, quartiles and max of the numeric
+        columns, laid out like `DataFrame.describe`.
+
+        Raises
+        ------
+        ValueError
+            No columns have been seen
+        """
+        if not self.columns:
+            raise ValueError("Cannot describe a DataFrame without columns")
+
+        index = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+        summary = {}
+        for name, column in self.columns.items():
+            if column["sketch"] is None:
+                continue
+            n = column["non_nulls"]
+            quartiles = column["sketch"].quantile([0.25, 0.5, 0.75])
+            summary[name] = [
+                float(n),
+                column["mean"] if n else np.nan,
+                np.sqrt(column["m2"] / (n - 1)) if n > 1 else np.nan,
+                column["min"],
+                *quartiles,
+                column["max"]
+            ]
+        return pd.DataFrame(summary, index=index)
+
+    def head(self) -> pd.DataFrame:
+        """Return the first rows added to the accumulator."""
+        if self._head is None:
+            return pd.DataFrame()
+        return self._head
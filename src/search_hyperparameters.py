@@ -0,0 +1,195 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Tuple
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from src.fit_and_evaluate_model import fit_and_evaluate_model, check_model_inputs
+from src.instrumentation import instrumented
+
+# Solvers that can start from the previous solution when C changes
+WARM_START_SOLVERS = {"lbfgs", "newton-cg", "newton-cholesky", "sag", "saga"}
+
+# Training data and folds shared with the current worker process
+_worker_data = {}
+
+
+def _attach_training_data(X_name, X_shape, X_columns, y_name, y_classes, preprocessor, cv, random_state):
+    """Attach a worker to the training data held in shared memory, so the
+    matrix is not pickled and sent with every task."""
+    X_shm = shared_memory.SharedMemory(name=X_name)
+    y_shm = shared_memory.SharedMemory(name=y_name)
+    X = np.ndarray(X_shape, dtype=np.float64, buffer=X_shm.buf)
+    y_codes = np.ndarray(X_shape[:1], dtype=np.int64, buffer=y_shm.buf)
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state).split(X, y_codes))
+    _worker_data.update({
+        "shm": (X_shm, y_shm),
+        "X": pd.DataFrame(X, columns=X_columns, copy=False),
+        "y": np.asarray(y_classes)[y_codes],
+        "preprocessor": preprocessor,
+        "folds": folds,
+        "random_state": random_state
+    })
+
+
+def _score_path(fixed_params: dict, Cs: list, fold: int) -> list:
+    """Fit one fold along a path of C values, from the strongest to the
+    weakest regularization, and return (C, score, fit time) for each."""
+    X, y = _worker_data["X"], _worker_data["y"]
+    train_idx, valid_idx = _worker_data["folds"][fold]
+    preprocessor = clone(_worker_data["preprocessor"])
+    X_fit = preprocessor.fit_transform(X.iloc[train_idx])
+    X_valid = preprocessor.transform(X.iloc[valid_idx])
+
+    params = {"random_state": _worker_data["random_state"], **fixed_params}
+    if params.get("solver", "lbfgs") in WARM_START_SOLVERS:
+        params["warm_start"] = True
+    logreg = LogisticRegression(**params)
+
+    scores = []
+    for C in sorted(Cs):
+        start = time.perf_counter()
+        try:
+            logreg.set_params(C=C).fit(X_fit, y[train_idx])
+            score = logreg.score(X_valid, y[valid_idx])
+        except ValueError:
+            # Incompatible combinations such as penalty="l1" with lbfgs
+            score = np.nan
+        scores.append((C, score, time.perf_counter() - start))
+    return scores
+
+
+@instrumented
+def search_hyperparameters(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    preprocessor: BaseEstimator,
+    param_grid,
+    cv: int = 5,
+    n_jobs: int = None,
+    random_state: int = 123
+) -> Tuple[BaseEstimator, float, pd.DataFrame]:
+    """
+    Function to tune the logistic regression pipeline with a parallel,
+    stratified k-fold grid search, refit the best configuration on the
+    full training data and evaluate it on the test data.
+
+    Every combination of the non-C hyperparameters and every fold is one
+    task in a process pool. The training matrix is placed in shared memory
+    once and every worker reads it from there. Within a task the C values
+    are fitted from the strongest to the weakest regularization, starting
+    each fit from the previous coefficients when the solver supports warm
+    starts. Combinations the solver rejects are scored as NaN.
+
+    Parameters
+    ----------
+    X_train : pd.DataFrame
+        Numeric feature data for training.
+    y_train : pd.Series
+        Target labels for training.
+    X_test : pd.DataFrame
+        Feature data for testing.
+    y_test : pd.Series
+        Target labels for testing.
+    preprocessor : sklearn.base.BaseEstimator
+        Preprocessing pipeline to be applied to the data.
+    param_grid : dict or list of dict
+        LogisticRegression hyperparameters to search, for example
+        {"C": [0.1, 1, 10], "penalty": ["l2"], "solver": ["lbfgs"],
+        "class_weight": ["balanced", None]}.
+    cv : int, optional
+        Number of cross-validation folds, by default 5
+    n_jobs : int, optional
+        Number of worker processes; 1 runs the search in this process,
+        by default the number of CPUs.
+    random_state : int, optional
+        Seed for the folds and the models, by default 123
+
+    Returns
+    -------
+    pipeline : sklearn.pipeline.Pipeline
+        Best pipeline refitted on all the training data.
+    accuracy : float
+        Accuracy score of the best pipeline on the test set.
+    results : pd.DataFrame
+        One row per hyperparameter combination with the score of each
+        fold, the mean and standard deviation, the mean fit time and the
+        rank, laid out like GridSearchCV.cv_results_.
+
+    Raises
+    ------
+    TypeError
+        If any input data is not of type pandas DataFrame/Series.
+    ValueError
+        If any input data is empty, the number of features in X_train and
+        X_test does not match, or no combination could be fitted.
+    """
+    check_model_inputs(X_train, y_train, X_test, y_test)
+
+    # Group combinations that only differ in C so each group is one path
+    paths = {}
+    for params in ParameterGrid(param_grid):
+        params = dict(params)
+        C = params.pop("C", 1.0)
+        key = repr(sorted(params.items(), key=lambda item: item[0]))
+        paths.setdefault(key, (params, set()))[1].add(C)
+
+    X = np.ascontiguousarray(X_train.to_numpy(dtype=np.float64))
+    y_classes, y_codes = np.unique(y_train.to_numpy(), return_inverse=True)
+    X_shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    y_shm = shared_memory.SharedMemory(create=True, size=max(y_codes.size * 8, 1))
+    try:
+        np.ndarray(X.shape, dtype=np.float64, buffer=X_shm.buf)[:] = X
+        np.ndarray(y_codes.shape, dtype=np.int64, buffer=y_shm.buf)[:] = y_codes
+        shared_args = (X_shm.name, X.shape, list(X_train.columns), y_shm.name, y_classes,
+                       preprocessor, cv, random_state)
+        tasks = [(fixed_params, sorted(Cs), fold) for fixed_params, Cs in paths.values() for fold in range(cv)]
+
+        if n_jobs == 1:
+            _attach_training_data(*shared_args)
+            outputs = [_score_path(*task) for task in tasks]
+            _worker_data.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach_training_data,
+                                     initargs=shared_args) as executor:
+                outputs = list(executor.map(_score_path, *zip(*tasks)))
+    finally:
+        X_shm.close()
+        X_shm.unlink()
+        y_shm.close()
+        y_shm.unlink()
+
+    rows = {}
+    for (fixed_params, _, fold), path in zip(tasks, outputs):
+        for C, score, fit_time in path:
+            params = {"C": C, **fixed_params}
+            row = rows.setdefault(repr(sorted(params.items(), key=lambda item: item[0])), {
+                "params": params,
+                **{f"param_{name}": value for name, value in params.items()},
+                "fit_times": []
+            })
+            row[f"split{fold}_test_score"] = score
+            row["fit_times"].append(fit_time)
+
+    results = pd.DataFrame(list(rows.values()))
+    split_columns = [f"split{fold}_test_score" for fold in range(cv)]
+    results["mean_test_score"] = results[split_columns].mean(axis=1, skipna=False)
+    results["std_test_score"] = results[split_columns].std(axis=1, ddof=0, skipna=False)
+    results["mean_fit_time"] = results.pop("fit_times").apply(np.mean)
+    results["rank_test_score"] = (
+        results["mean_test_score"].rank(method="min", ascending=False).fillna(len(results)).astype(int)
+    )
+    if results["mean_test_score"].isna().all():
+        raise ValueError("None of the hyperparameter combinations could be fitted.")
+
+    best_params = results.loc[results["mean_test_score"].idxmax(), "params"]
+    pipeline, accuracy = fit_and_evaluate_model(
+        X_train, y_train, X_test, y_test, clone(preprocessor),
+        logreg_params={"random_state": random_state, **best_params}
+    )
+    return pipeline, accuracy, results.sort_values("rank_test_score").reset_index(drop=True)
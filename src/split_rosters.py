@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from src.choices import SPLITS
+from src.instrumentation import instrumented
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: spread the bits of uint64 values so that
+    nearby keys map to unrelated hashes."""
+    values = values.copy()
+    with np.errstate(over="ignore"):
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(0xBF58476D1CE4E5B9)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(0x94D049BB133111EB)
+        values ^= values >> np.uint64(31)
+    return values
+
+
+@instrumented
+def hash_split(keys, test_size: float = 0.3, random_state: int = 123) -> np.ndarray:
+    """Function to assign rows to the test split by a stable hash of their
+    group key.
+
+    Every key is hashed together with `random_state` to a number in [0, 1),
+    and its rows go to the test split when that number is below
+    `test_size`. The assignment of a key depends on nothing but the key, so
+    all rows of a player land in the same split, chunks can be split
+    independently or in parallel, and players already in the data keep
+    their split when new seasons are appended.
+
+    Parameters
+    ----------
+    keys : array-like
+        Group key of each row, e.g. the `player_id` column.
+    test_size : float, optional
+        Expected fraction of keys sent to the test split, by default 0.3
+    random_state : int, optional
+        Salt mixed into the hash; a different value gives a different
+        split, by default 123
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask that is True for the rows in the test split.
+
+    Raises
+    ------
+    ValueError
+        The test size is not between 0 and 1
+    """
+    if not 0 < test_size < 1:
+        raise ValueError("Test size must be between 0 and 1.")
+
+    keys = np.asarray(keys)
+    if keys.dtype.kind in "iu":
+        hashes = keys.astype(np.uint64)
+    else:
+        hashes = pd.util.hash_array(keys.astype(object))
+    hashes = _mix64(_mix64(hashes) ^ np.uint64(random_state % 2**64))
+    # The top 53 bits give a uniform float in [0, 1)
+    return (hashes >> np.uint64(11)).astype(np.float64) * 2.0**-53 < test_size
@@ -0,0 +1,372 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+
+# Interpreter of Python stage commands. Commands name it by this token, which
+# is replaced by the running interpreter only when they run, so that moving
+# to another environment with the same Python version keeps the cache valid
+PYTHON = "python"
+
+
+def executable(command: list) -> list:
+    """Return a stage command line with the `PYTHON` token replaced by the
+    running interpreter."""
+    return [sys.executable, *command[1:]] if command and command[0] == PYTHON else list(command)
+
+
+class Stage:
+    """One step of the analysis pipeline.
+
+    Parameters
+    ----------
+    name : str
+        Unique name of the stage.
+    commands : list of list of str
+        Command lines that run the stage, including all CLI parameters. A
+        command starting with `PYTHON` runs with the current interpreter.
+    inputs : list of str
+        Files the stage reads, including the script that implements it.
+    outputs : list of str
+        Files the stage writes.
+    always_run : bool, optional
+        Run the stage even when it is cached, by default False. For stages
+        whose result depends on something outside their inputs, such as a
+        remote file, and that are cheap when nothing changed.
+    """
+
+    def __init__(self, name: str, commands: list, inputs: list, outputs: list, always_run: bool = False):
+        self.name = name
+        self.commands = [list(command) for command in commands]
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.always_run = always_run
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+class StageCache:
+    """Content-addressed cache of stage outputs.
+
+    A stage's fingerprint is a hash of its command lines, the Python
+    version, the contents of its input files and the names of its outputs. Output files are stored
+    under the hash of their contents in `blobs/`, and `stages/` maps each
+    fingerprint to the blobs it produced. File hashes are memoised by size
+    and modification time, so unchanged files are not read again and a
+    file that is only touched hashes to the same value.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory holding the cache. It is created if needed.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "stages"), exist_ok=True)
+        self._memo_path = os.path.join(cache_dir, "digests.json")
+        self._memo = {}
+        if os.path.exists(self._memo_path):
+            with open(self._memo_path) as f:
+                self._memo = json.load(f)
+
+    def save_memo(self):
+        """Write the memoised file hashes to disk."""
+        with open(self._memo_path, "w") as f:
+            json.dump(self._memo, f)
+
+    def file_digest(self, path: str) -> str:
+        """Return the SHA-256 of a file's contents, or None if it is missing."""
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+        memo = self._memo.get(key)
+        if memo is not None and memo[0] == signature:
+            return memo[1]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self._memo[key] = [signature, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def fingerprint(self, stage: Stage) -> str:
+        """Return the fingerprint of a stage from its real inputs.
+
+        Raises
+        ------
+        FileNotFoundError
+            An input file of the stage does not exist
+        """
+        inputs = {}
+        for path in stage.inputs:
+            digest = self.file_digest(path)
+            if digest is None:
+                raise FileNotFoundError(f"Input of stage '{stage.name}' does not exist: {path}")
+            inputs[path] = digest
+        description = {
+            "commands": stage.commands,
+            # The interpreter's version rather than its path, which depends on the environment
+            "python": f"{sys.version_info.major}.{sys.version_info.minor}",
+            "inputs": inputs,
+            "outputs": stage.outputs
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", digest[:2], digest)
+
+    def _record_path(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, "stages", f"{fingerprint}.json")
+
+    def lookup(self, fingerprint: str) -> dict:
+        """Return the output digests recorded for a fingerprint, or None if
+        the stage has not been cached or its blobs are gone."""
+        record_path = self._record_path(fingerprint)
+        if not os.path.exists(record_path):
+            return None
+        with open(record_path) as f:
+            outputs = json.load(f)
+        if not all(os.path.exists(self._blob_path(digest)) for digest in outputs.values()):
+            return None
+        return outputs
+
+    def store(self, fingerprint: str, stage: Stage) -> dict:
+        """Copy a stage's outputs into the cache and record them under the
+        fingerprint.
+
+        Raises
+        ------
+        FileNotFoundError
+            The stage did not write one of its declared outputs
+        """
+        outputs = {}
+        for path in stage.outputs:
+            digest = self.file_digest(path)
+            if digest is None:
+                raise FileNotFoundError(f"Stage '{stage.name}' did not write its output: {path}")
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                shutil.copyfile(path, blob_path + ".tmp")
+                os.replace(blob_path + ".tmp", blob_path)
+            outputs[path] = digest
+        with open(self._record_path(fingerprint), "w") as f:
+            json.dump(outputs, f, indent=2)
+        return outputs
+
+    def restore(self, outputs: dict) -> bool:
+        """Bring the output files in line with the recorded digests. Return
+        True if any file had to be copied from the cache."""
+        restored = False
+        for path, digest in outputs.items():
+            if self.file_digest(path) == digest:
+                continue
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            shutil.copyfile(self._blob_path(digest), path)
+            restored = True
+        return restored
+
+
+def order_stages(stages: list, targets: list = None) -> list:
+    """Function to sort stages so that every stage comes after the stages
+    that write its inputs, keeping only the targets and what they need.
+
+    Parameters
+    ----------
+    stages : list of Stage
+        All stages of the pipeline.
+    targets : list of str, optional
+        Names of the stages to run, by default all stages.
+
+    Returns
+    -------
+    list of Stage
+        The stages to run, in dependency order.
+
+    Raises
+    ------
+    ValueError
+        A target is unknown, two stages write the same file, or the stages
+        depend on each other in a cycle
+    """
+    by_name = {stage.name: stage for stage in stages}
+    producer = {}
+    for stage in stages:
+        for path in stage.outputs:
+            if path in producer:
+                raise ValueError(f"'{path}' is an output of both '{producer[path]}' and '{stage.name}'.")
+            producer[path] = stage.name
+
+    for name in targets or []:
+        if name not in by_name:
+            raise ValueError(f"Unknown stage '{name}'.")
+
+    ordered, state = [], {}
+
+    def visit(name):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Stages depend on each other in a cycle through '{name}'.")
+        state[name] = "visiting"
+        for path in by_name[name].inputs:
+            if path in producer:
+                visit(producer[path])
+        state[name] = "done"
+        ordered.append(by_name[name])
+
+    for name in targets or list(by_name):
+        visit(name)
+    return ordered
+
+
+def run_stages(stages: list, cache_dir: str, targets: list = None, force: bool = False) -> dict:
+    """Function to run pipeline stages in dependency order, skipping every
+    stage whose fingerprint is already in the cache.
+
+    A cached stage is not run again, unless it is marked `always_run`; any
+    of its outputs that are missing or were changed are copied back from
+    the cache instead.
+
+    Parameters
+    ----------
+    stages : list of Stage
+        All stages of the pipeline.
+    cache_dir : str
+        Directory of the content-addressed cache.
+    targets : list of str, optional
+        Names of the stages to bring up to date, by default all stages.
+    force : bool, optional
+        Run the selected stages even if they are cached, by default False
+
+    Returns
+    -------
+    dict
+        Maps each stage name to "ran", "cached" or "restored".
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        A stage command failed
+    """
+    cache = StageCache(cache_dir)
+    status = {}
+    try:
+        for stage in order_stages(stages, targets):
+            fingerprint = cache.fingerprint(stage)
+            outputs = None if force or stage.always_run else cache.lookup(fingerprint)
+            if outputs is not None:
+                status[stage.name] = "restored" if cache.restore(outputs) else "cached"
+                logging.info(f"Stage '{stage.name}' is up to date ({status[stage.name]}).")
+                continue
+
+            logging.info(f"Running stage '{stage.name}'.")
+            for command in stage.commands:
+                subprocess.run(executable(command), check=True)
+            cache.store(fingerprint, stage)
+            status[stage.name] = "ran"
+    finally:
+        cache.save_memo()
+    return status
+
+
+def run_commands(commands: list, **inputs):
+    """Run a stage's command lines, for stages that have no function. The
+    results of the stages it requires are not used."""
+    for command in commands:
+        subprocess.run(executable(command), check=True)
+
+
+def run_stages_in_process(
+    stages: list,
+    functions: dict,
+    cache_dir: str,
+    targets: list = None,
+    force: bool = False,
+    n_jobs: int = None,
+    backend: str = "thread"
+) -> dict:
+    """Function to run pipeline stages as functions in this process with
+    `run_tasks`, skipping cached stages as `run_stages` does.
+
+    A stage requires the stages that write its inputs, and starts as soon
+    as they have finished, so independent stages run concurrently. Its
+    function is called with its parameters and, for each stage it
+    requires, that stage's result as a keyword argument named after it;
+    the result of a cached stage is None, and the function then reads the
+    stage's output files. Stages still write their declared outputs, which
+    are stored in the cache as they finish.
+
+    Parameters
+    ----------
+    stages : list of Stage
+        All stages of the pipeline.
+    functions : dict
+        Maps stage names to (function, kwargs). Stages without an entry
+        run their command lines.
+    cache_dir : str
+        Directory of the content-addressed cache.
+    targets : list of str, optional
+        Names of the stages to bring up to date, by default all stages.
+    force : bool, optional
+        Run the selected stages even if they are cached, by default False
+    n_jobs : int, optional
+        Number of stages run at once, by default the pool's default
+    backend : str, optional
+        "thread" or "process", by default "thread"
+
+    Returns
+    -------
+    dict
+        Maps each stage name to "ran", "cached" or "restored".
+
+    Raises
+    ------
+    Exception
+        The first exception raised by a stage
+    """
+    from src.stage_executor import Task, run_tasks
+
+    ordered = order_stages(stages, targets)
+    by_name = {stage.name: stage for stage in ordered}
+    producer = {path: stage.name for stage in stages for path in stage.outputs}
+    tasks = []
+    for stage in ordered:
+        function, kwargs = functions.get(stage.name, (run_commands, {"commands": stage.commands}))
+        requires = sorted({producer[path] for path in stage.inputs if path in producer})
+        tasks.append(Task(stage.name, function, requires=requires, kwargs=kwargs))
+
+    cache = StageCache(cache_dir)
+    status, fingerprints = {}, {}
+
+    def skip(name):
+        # Inputs written by the stages it requires exist once they have finished
+        fingerprints[name] = cache.fingerprint(by_name[name])
+        outputs = None if force or by_name[name].always_run else cache.lookup(fingerprints[name])
+        if outputs is None:
+            logging.info(f"Running stage '{name}'.")
+            return False
+        status[name] = "restored" if cache.restore(outputs) else "cached"
+        logging.info(f"Stage '{name}' is up to date ({status[name]}).")
+        return True
+
+    def on_complete(name, result):
+        cache.store(fingerprints[name], by_name[name])
+        status[name] = "ran"
+
+    try:
+        run_tasks(tasks, n_jobs=n_jobs, backend=backend, skip=skip, on_complete=on_complete)
+    finally:
+        cache.save_memo()
+    return {stage.name: status[stage.name] for stage in ordered if stage.name in status}
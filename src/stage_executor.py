@@ -0,0 +1,275 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+from src.instrumentation import propagate_run
+
+# Pools tasks may run on
+BACKENDS = ["thread", "process"]
+
+# Shared memory blocks attached in this process, kept open while their frames are in use
+_ATTACHED = []
+
+
+class Task:
+    """One unit of work run by `run_tasks`.
+
+    The function is called with `args`, `kwargs` and, for each task it
+    requires, that task's result as a keyword argument named after it.
+
+    Parameters
+    ----------
+    name : str
+        Unique name of the task.
+    function : callable
+        Function that does the work. With the process backend it must be
+        importable by name, so defined at the top level of a module.
+    requires : list of str, optional
+        Names of the tasks whose results it needs, by default none
+    args : tuple, optional
+        Positional arguments of the function, by default none
+    kwargs : dict, optional
+        Keyword arguments of the function, by default none
+    """
+
+    def __init__(self, name: str, function, requires: list = (), args: tuple = (), kwargs: dict = None):
+        self.name = name
+        self.function = function
+        self.requires = list(requires)
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+
+    def __repr__(self):
+        return f"Task({self.name!r})"
+
+
+class SharedFrame:
+    """Picklable handle to a DataFrame whose columns are held in a shared
+    memory block, so that process workers read them without a copy.
+
+    Numeric and boolean columns, the codes of categorical columns and a
+    numeric index are laid out in the block; the categories and any object
+    columns travel with the handle. Frames rebuilt from the handle are
+    backed by the block and read-only.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns = []
+        arrays = []
+        for name, series in [("__index__", df.index.to_series()), *df.items()]:
+            values = series.to_numpy()
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                spec = {"kind": "categorical", "categories": series.cat.categories, "ordered": series.cat.ordered}
+                values = series.cat.codes.to_numpy()
+            elif values.dtype.kind in "biuf":
+                spec = {"kind": "array"}
+            else:
+                spec = {"kind": "object", "values": values}
+                values = None
+            if values is not None:
+                spec.update(dtype=values.dtype.str, offset=sum(array.nbytes for array in arrays))
+                arrays.append(np.ascontiguousarray(values))
+            self.columns.append((name, spec))
+        self.rows = len(df)
+        self.index_name = df.index.name
+        self.shm = shared_memory.SharedMemory(create=True, size=max(sum(array.nbytes for array in arrays), 1))
+        for (_, spec), array in zip([column for column in self.columns if "offset" in column[1]], arrays):
+            self.shm.buf[spec["offset"]:spec["offset"] + array.nbytes] = array.view(np.uint8).reshape(-1)
+        self.name = self.shm.name
+        self.creator = os.getpid()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("shm", None)
+        return state
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild the DataFrame on top of the shared block."""
+        shm = shared_memory.SharedMemory(name=self.name)
+        if os.getpid() != self.creator:
+            # The creating process unlinks the block in `release`; keep this
+            # process's resource tracker from unlinking it when the worker exits
+            resource_tracker.unregister(shm._name, "shared_memory")
+        _ATTACHED.append(shm)
+
+        columns = {}
+        for name, spec in self.columns:
+            if spec["kind"] == "object":
+                values = spec["values"]
+            else:
+                values = np.ndarray(self.rows, dtype=np.dtype(spec["dtype"]), buffer=shm.buf, offset=spec["offset"])
+                values.flags.writeable = False
+                if spec["kind"] == "categorical":
+                    values = pd.Categorical.from_codes(values, spec["categories"], spec["ordered"])
+            columns[name] = values
+        index = pd.Index(columns.pop("__index__"), name=self.index_name)
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def release(self):
+        """Free the shared block; frames rebuilt from it must no longer be used."""
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _share(value, handles: list):
+    """Replace the DataFrames inside dicts, lists and tuples with shared handles."""
+    if isinstance(value, pd.DataFrame):
+        handle = SharedFrame(value)
+        handles.append(handle)
+        return handle
+    if isinstance(value, dict):
+        return {key: _share(item, handles) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_share(item, handles) for item in value)
+    return value
+
+
+def _attach(value):
+    """Rebuild the DataFrames of shared handles inside dicts, lists and tuples."""
+    if isinstance(value, SharedFrame):
+        return value.to_frame()
+    if isinstance(value, dict):
+        return {key: _attach(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_attach(item) for item in value)
+    return value
+
+
+def _call_shared(function, args: tuple, kwargs: dict):
+    """Run a task in a process worker on the frames shared with it."""
+    return function(*args, **_attach(kwargs))
+
+
+def order_tasks(tasks: list, targets: list = None) -> list:
+    """Function to sort tasks so that every task comes after the tasks it
+    requires, keeping only the targets and what they need.
+
+    Raises
+    ------
+    ValueError
+        Two tasks have the same name, a task or target is unknown, or the
+        tasks require each other in a cycle
+    """
+    by_name = {}
+    for task in tasks:
+        if task.name in by_name:
+            raise ValueError(f"Two tasks are named '{task.name}'.")
+        by_name[task.name] = task
+    for name in [*(targets or []), *(required for task in tasks for required in task.requires)]:
+        if name not in by_name:
+            raise ValueError(f"Unknown task '{name}'.")
+
+    ordered, state = [], {}
+
+    def visit(name):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Tasks require each other in a cycle through '{name}'.")
+        state[name] = "visiting"
+        for required in by_name[name].requires:
+            visit(required)
+        state[name] = "done"
+        ordered.append(by_name[name])
+
+    for name in targets or list(by_name):
+        visit(name)
+    return ordered
+
+
+def run_tasks(
+    tasks: list,
+    targets: list = None,
+    n_jobs: int = None,
+    backend: str = "thread",
+    skip=None,
+    on_complete=None
+) -> dict:
+    """Function to run tasks in one process, each as soon as the tasks it
+    requires have finished, so that independent tasks run concurrently on a
+    thread or process pool. Results are handed to the tasks that require
+    them in memory; with the process backend, DataFrames are passed through
+    shared memory and other values are pickled.
+
+    Parameters
+    ----------
+    tasks : list of Task
+        All tasks.
+    targets : list of str, optional
+        Names of the tasks to run with everything they require, by default
+        all tasks.
+    n_jobs : int, optional
+        Number of workers, by default the pool's default
+    backend : str, optional
+        "thread" or "process", by default "thread". Threads share every
+        result without copies and suit tasks that release the GIL, such as
+        NumPy, pandas and scikit-learn work.
+    skip : callable, optional
+        Called in this thread with a task's name once the tasks it requires
+        have finished; when it returns True the task is not run and its
+        result is None. By default every task runs.
+    on_complete : callable, optional
+        Called in this thread with a task's name and result after it runs.
+
+    Returns
+    -------
+    dict
+        Maps each task that ran or was skipped to its result.
+
+    Raises
+    ------
+    ValueError
+        The backend is not supported, or the tasks cannot be ordered
+    Exception
+        The first exception raised by a task; tasks that have not started
+        are cancelled
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend '{backend}'. Expected one of {BACKENDS}.")
+    pending = {task.name: task for task in order_tasks(tasks, targets)}
+    results, running, handles, shared = {}, {}, [], {}
+    pool = ThreadPoolExecutor(n_jobs) if backend == "thread" else ProcessPoolExecutor(n_jobs)
+
+    def submit(task):
+        inputs = {name: results[name] for name in task.requires}
+        if backend == "thread":
+            return pool.submit(propagate_run(task.function), *task.args, **task.kwargs, **inputs)
+        for name in task.requires:
+            if name not in shared:
+                shared[name] = _share(results[name], handles)
+        inputs = {name: shared[name] for name in task.requires}
+        return pool.submit(_call_shared, task.function, task.args, {**task.kwargs, **inputs})
+
+    try:
+        while pending or running:
+            # Skipped tasks make the tasks that require them ready at once
+            ready = True
+            while ready:
+                ready = [task for task in pending.values() if all(name in results for name in task.requires)]
+                for task in ready:
+                    del pending[task.name]
+                    if skip is not None and skip(task.name):
+                        results[task.name] = None
+                        continue
+                    logging.info(f"Starting task '{task.name}'.")
+                    running[submit(task)] = task.name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                results[name] = future.result()
+                logging.info(f"Finished task '{name}'.")
+                if on_complete is not None:
+                    on_complete(name, results[name])
+    except BaseException:
+        for future in running:
+            future.cancel()
+        raise
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        for handle in handles:
+            handle.release()
+    return results
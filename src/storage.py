@@ -0,0 +1,308 @@
+import os
+import pandas as pd
+from src.write_csv import COMPRESSIONS, open_csv, write_csv
+from src.instrumentation import instrumented
+
+
+# File extensions understood by the storage layer, mapped to their format
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather"
+}
+
+
+def table_format(path: str) -> str:
+    """Function to look up the storage format of a file from its extension.
+
+    Parameters
+    ----------
+    path : str
+        Path or filename of the table.
+
+    Returns
+    -------
+    str
+        One of "csv", "parquet" or "feather"; CSV files may be compressed
+        with a .gz, .bz2 or .xz suffix.
+
+    Raises
+    ------
+    ValueError
+        The extension is not a supported table format
+    """
+    root, extension = os.path.splitext(str(path).lower())
+    if extension in COMPRESSIONS and root.endswith(".csv"):
+        return "csv"
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Unsupported table format '{extension}'. "
+                         f"Expected one of {sorted(EXTENSIONS)}.")
+    return EXTENSIONS[extension]
+
+
+@instrumented
+def write_table(
+    df: pd.DataFrame,
+    directory: str,
+    filename: str,
+    keep_index: bool = False
+):
+    """Function to write a DataFrame to a specified location in the format
+    given by the filename extension. CSV files are written with `write_csv`;
+    Parquet and Feather files keep the column types of the DataFrame.
+    Feather files are written uncompressed so that they can be memory
+    mapped when read back.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The Pandas DataFrame to save.
+    directory : str
+        The location to save the file to.
+    filename : str
+        The desired filename, ending in .csv, .parquet/.pq or
+        .feather/.arrow.
+    keep_index : bool, optional
+        Boolean to indicate whether to keep the index of the DataFrame,
+        by default False
+
+    Raises
+    ------
+    TypeError
+        The input is not a Pandas DataFrame
+    FileNotFoundError
+        The directory cannot be found
+    ValueError
+        The file extension is not a supported table format
+    ValueError
+        The input DataFrame is empty
+    """
+    file_format = table_format(filename)
+    if file_format == "csv":
+        write_csv(df, directory, filename, keep_index=keep_index)
+        return
+
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("The input must be of type Pandas DataFrame.")
+    if not os.path.exists(directory):
+        raise FileNotFoundError("Directory does not exist.")
+    if df.empty:
+        raise ValueError("Dataframe must have records.")
+
+    full_path = os.path.join(directory, filename)
+    if file_format == "parquet":
+        df.to_parquet(full_path, index=keep_index)
+    else:
+        from pyarrow import feather
+        if not keep_index:
+            df = df.reset_index(drop=True)
+        feather.write_feather(df, full_path, compression="uncompressed")
+
+
+def _astype(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Cast the columns of `df` named in `dtypes`; others are left as read."""
+    if not dtypes:
+        return df
+    return df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
+
+
+def table_columns(path: str) -> list:
+    """Function to read the column names of a table without reading its
+    rows, picking the format from the file extension. The columns of a
+    partitioned store are read from its index.
+
+    Parameters
+    ----------
+    path : str
+        Path to the table or store.
+
+    Returns
+    -------
+    list
+        The column names, in file order.
+    """
+    if os.path.isdir(path):
+        from src.partitioned_store import read_index
+        return list(read_index(path)["dtypes"])
+    file_format = table_format(path)
+    if file_format == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+
+    from pyarrow import feather
+    return list(feather.read_table(path, memory_map=True).schema.names)
+
+
+@instrumented
+def read_table(path: str, columns: list = None, dtypes: dict = None, filters: list = None) -> pd.DataFrame:
+    """Function to read a table written by `write_table`, picking the format
+    from the file extension. Feather files are memory mapped, and their
+    numeric columns without missing values are read-only views of the
+    mapping rather than copies; other columns are converted. A directory is read as a
+    partitioned store with `read_store`, which opens only the partitions
+    that may match the filters.
+
+    Parameters
+    ----------
+    path : str
+        Path to the table or store.
+    columns : list, optional
+        Subset of columns to read, by default all columns.
+    dtypes : dict, optional
+        Column name -> dtype of the columns to convert; CSV columns are
+        parsed straight into these dtypes. By default the dtypes are
+        inferred or taken from the file.
+    filters : list, optional
+        (column, operator, value) tuples, all of which a row must match;
+        see `partitioned_store.read_store`. By default every row is read.
+
+    Returns
+    -------
+    pd.DataFrame
+        The table contents.
+
+    Raises
+    ------
+    ValueError
+        The file extension is not a supported table format
+    """
+    if os.path.isdir(path):
+        from src.partitioned_store import read_store
+        return read_store(path, filters, columns, dtypes)
+    if filters:
+        from src.partitioned_store import filter_mask
+        read_columns = None if columns is None else list(dict.fromkeys([*columns, *(f[0] for f in filters)]))
+        df = read_table(path, read_columns, dtypes)
+        return df[filter_mask(df, filters)].reset_index(drop=True)[columns or df.columns]
+
+    file_format = table_format(path)
+    if file_format == "csv":
+        return pd.read_csv(path, usecols=columns, dtype=dtypes)
+    if file_format == "parquet":
+        return _astype(pd.read_parquet(path, columns=columns, memory_map=True), dtypes)
+
+    from pyarrow import feather
+    # One block per column lets numeric columns without missing values wrap
+    # the mapped buffers instead of being consolidated into a copy
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return _astype(table.to_pandas(split_blocks=True, self_destruct=True), dtypes)
+
+
+def iter_table(path: str, chunksize: int, columns: list = None, dtypes: dict = None, filters: list = None,
+               **read_options):
+    """Function to read a table in chunks of at most `chunksize` rows,
+    picking the format from the file extension. A directory is read as a
+    partitioned store with `iter_store`.
+
+    Parameters
+    ----------
+    path : str
+        Path to the table or store.
+    chunksize : int
+        Maximum number of rows per chunk.
+    columns : list, optional
+        Subset of columns to read, by default all columns.
+    dtypes : dict, optional
+        Column name -> dtype of the columns to convert, by default the
+        dtypes are inferred or taken from the file.
+    filters : list, optional
+        (column, operator, value) tuples, all of which a row must match;
+        chunks of a flat table are filtered after they are read, so they
+        may hold fewer than `chunksize` rows, and chunks left empty are
+        skipped. By default every row is read.
+    **read_options
+        Extra keyword arguments passed to `pd.read_csv` for CSV files.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive chunks of the table.
+
+    Raises
+    ------
+    ValueError
+        The file extension is not a supported table format
+    """
+    if os.path.isdir(path):
+        from src.partitioned_store import iter_store
+        yield from iter_store(path, chunksize, filters, columns, dtypes)
+        return
+    if filters:
+        from src.partitioned_store import filter_mask
+        read_columns = None if columns is None else list(dict.fromkeys([*columns, *(f[0] for f in filters)]))
+        for chunk in iter_table(path, chunksize, read_columns, dtypes, **read_options):
+            chunk = chunk[filter_mask(chunk, filters)]
+            if len(chunk):
+                yield chunk[columns or chunk.columns]
+        return
+
+    file_format = table_format(path)
+    if file_format == "csv":
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns, dtype=dtypes, **read_options)
+    elif file_format == "parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield _astype(batch.to_pandas(), dtypes)
+    else:
+        from pyarrow import feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for start in range(0, table.num_rows, chunksize):
+            yield _astype(table.slice(start, chunksize).to_pandas(split_blocks=True), dtypes)
+
+
+class TableWriter:
+    """Appends DataFrame chunks to a single table file in the format given
+    by the file extension. The column names and types are fixed by the
+    `template` DataFrame when the writer is opened, so the file is valid
+    even if no chunks are written.
+
+    Use as a context manager so the file is always closed::
+
+        with TableWriter(path, template) as writer:
+            writer.write(chunk)
+    """
+
+    def __init__(self, path: str, template: pd.DataFrame):
+        self.path = path
+        self.format = table_format(path)
+        self.rows = 0
+        if self.format == "csv":
+            self._file = open_csv(path, "w")
+            template.iloc[:0].to_csv(self._file, index=False)
+            return
+
+        import pyarrow as pa
+        self._schema = pa.Schema.from_pandas(template.iloc[:0], preserve_index=False)
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def write(self, chunk: pd.DataFrame):
+        """Append a chunk with the same columns as the template."""
+        if self.format == "csv":
+            chunk.to_csv(self._file, header=False, index=False)
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        self.rows += len(chunk)
+
+    def close(self):
+        """Finish the file."""
+        if self.format == "csv":
+            self._file.close()
+        else:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,178 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+from src.clean_rosters import COLUMN_NAMES, PROCESSED_DTYPES, QUARANTINE_DTYPES, roster_schema, clean_rosters
+from src.split_rosters import SPLITS, hash_split
+from src.storage import TableWriter, iter_table, table_columns
+from src.partitioned_store import STORE_COLUMNS, PartitionedWriter
+from src.read_plan import read_plan
+from src.validate_rosters import RosterValidator
+from src.instrumentation import instrumented, record_rows
+
+
+class RowHashSet:
+    """Compact set of 64-bit row hashes used to deduplicate rows across
+    chunks. Hashes are kept in one sorted uint64 array, so the set costs
+    8 bytes per unique row rather than a full copy of each row."""
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, hashes: np.ndarray) -> np.ndarray:
+        """Add a batch of row hashes to the set.
+
+        Parameters
+        ----------
+        hashes : np.ndarray
+            uint64 hashes of the rows in a chunk.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask that is True for the rows seen for the first time,
+            both in this batch and in all earlier batches.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        first_in_batch = np.zeros(len(hashes), dtype=bool)
+        first_in_batch[np.unique(hashes, return_index=True)[1]] = True
+
+        positions = np.searchsorted(self._hashes, hashes)
+        in_range = positions < len(self._hashes)
+        seen = np.zeros(len(hashes), dtype=bool)
+        seen[in_range] = self._hashes[positions[in_range]] == hashes[in_range]
+
+        is_new = first_in_batch & ~seen
+        # Both runs are sorted, so the stable sort only has to merge them
+        self._hashes = np.sort(
+            np.concatenate([self._hashes, np.sort(hashes[is_new])]),
+            kind="stable"
+        )
+        return is_new
+
+
+@instrumented
+def stream_rosters(
+    raw_data: str,
+    data_to: str,
+    chunksize: int,
+    test_size: float = 0.3,
+    random_state: int = 123,
+    file_format: str = "csv",
+    split: str = "random",
+    keep_season: bool = False,
+    partition_by: list = None
+) -> dict:
+    """Function to preprocess the raw roster data chunk by chunk and write
+    the train and test splits as it goes, so that memory use depends on the
+    chunk size rather than on the size of the raw file.
+
+    Each chunk is deduplicated against every row seen before it, cleaned,
+    validated, and each remaining row is sent to the test split with
+    probability `test_size`. With `split="player"` the assignment is made
+    by a stable hash of `player_id` instead, so a player never appears in
+    both splits and keeps its split when new seasons are appended. Rows that fail validation are written to
+    `roster_quarantine` with the checks they failed. Only the raw columns
+    of the preprocessing read plan are parsed, into compact dtypes.
+
+    Parameters
+    ----------
+    raw_data : str
+        Path to the raw roster CSV file.
+    data_to : str
+        Directory where `roster_train`, `roster_test` and
+        `roster_quarantine` are written.
+    chunksize : int
+        Number of raw rows read per chunk.
+    test_size : float, optional
+        Fraction of rows sent to the test split, by default 0.3
+    random_state : int, optional
+        Seed for the train/test assignment, by default 123
+    file_format : str, optional
+        Extension of the output files (csv, parquet or feather),
+        by default "csv"
+    split : str, optional
+        "random" to assign each row independently or "player" to assign
+        whole players by a hash of `player_id`, by default "random"
+    keep_season : bool, optional
+        Keep each row's `season` in the splits, which incremental
+        retraining needs, by default False
+    partition_by : list, optional
+        Partition columns (season, and optionally team_code); the splits
+        are then written as partitioned stores `roster_train` and
+        `roster_test` that keep the season, team and position of each row.
+        By default the splits are single files.
+
+    Returns
+    -------
+    dict
+        Row counts for the raw, deduplicated, rejected, train and test rows.
+
+    Raises
+    ------
+    FileNotFoundError
+        The directory cannot be found
+    ValueError
+        The chunk size is not a positive integer, the test size is not
+        between 0 and 1 or the split is not supported
+    """
+    if not os.path.exists(data_to):
+        raise FileNotFoundError("Directory does not exist.")
+    if not isinstance(chunksize, int) or chunksize < 1:
+        raise ValueError("Chunk size must be a positive integer.")
+    if not 0 < test_size < 1:
+        raise ValueError("Test size must be between 0 and 1.")
+    if split not in SPLITS:
+        raise ValueError(f"Unsupported split '{split}'. Expected one of {SPLITS}.")
+
+    rng = np.random.default_rng(random_state)
+    seen = RowHashSet()
+    counts = {"raw": 0, "deduplicated": 0, "rejected": 0, "train": 0, "test": 0}
+
+    kept = STORE_COLUMNS if partition_by else ({"season": "int32"} if keep_season else {})
+    keep = list(kept)
+    dtypes = {**PROCESSED_DTYPES, **kept}
+    template = pd.DataFrame(columns=list(dtypes)).astype(dtypes)
+
+    def split_writer(name):
+        if partition_by:
+            return PartitionedWriter(os.path.join(data_to, name), template, partition_by, file_format)
+        return TableWriter(os.path.join(data_to, f"{name}.{file_format}"), template)
+
+    quarantine_path = os.path.join(data_to, f"roster_quarantine.{file_format}")
+    quarantine_template = pd.DataFrame(columns=list(QUARANTINE_DTYPES)).astype(QUARANTINE_DTYPES)
+    with split_writer("roster_train") as train_writer, \
+            split_writer("roster_test") as test_writer, \
+            TableWriter(quarantine_path, quarantine_template) as quarantine_writer:
+        validator = RosterValidator(roster_schema, quarantine=quarantine_writer)
+        # Data Validation: Check if column names are correct
+        for column in table_columns(raw_data):
+            assert column in COLUMN_NAMES, "Data Validation: Incorrect column names"
+
+        plan = read_plan("preprocess")
+        for chunk in iter_table(raw_data, chunksize, columns=list(plan), dtypes=plan):
+            counts["raw"] += len(chunk)
+
+            is_new = seen.add(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+            chunk = chunk[is_new]
+            counts["deduplicated"] += len(chunk)
+
+            if split == "player":
+                chunk = validator.validate(clean_rosters(chunk, keep=[*keep, "player_id"]))
+                is_test = hash_split(chunk.pop("player_id"), test_size, random_state)
+            else:
+                chunk = validator.validate(clean_rosters(chunk, keep=keep))
+                is_test = rng.random(len(chunk)) < test_size
+            train_writer.write(chunk[~is_test])
+            test_writer.write(chunk[is_test])
+
+        counts["rejected"] = validator.rows_rejected
+        counts["train"] = train_writer.rows
+        counts["test"] = test_writer.rows
+    record_rows(rows_in=counts["raw"], rows_out=counts["train"] + counts["test"])
+
+    logging.info("Validation failures per check:\n" + validator.summary().to_string(index=False))
+    return counts
@@ -0,0 +1,215 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+import pandas as pd
+from src.clean_rosters import COLUMN_NAMES
+from src.instrumentation import instrumented, record_rows
+from src.storage import write_table
+
+# Team codes and positions drawn for synthetic rosters
+TEAM_CODES = ["ANA", "BOS", "BUF", "CGY", "CAR", "CHI", "COL", "CBJ", "DAL", "DET", "EDM", "FLA",
+              "LAK", "MIN", "MTL", "NSH", "NJD", "NYI", "NYR", "OTT", "PHI", "PIT", "SJS", "SEA",
+              "STL", "TBL", "TOR", "VAN", "VGK", "WSH", "WPG", "UTA"]
+POSITION_CODES = np.array(["C", "L", "R", "D", "G"], dtype=object)
+POSITION_TYPES = np.array(["forwards", "forwards", "forwards", "defensemen", "goalies"], dtype=object)
+
+
+# Mean number of seasons a player appears in
+SEASONS_PER_PLAYER = 7
+# First player_id of the generated players
+FIRST_PLAYER_ID = 8_440_000
+
+
+def synthetic_rosters(
+    n_rows: int,
+    random_state: int = 123,
+    duplicate_fraction: float = 0.01,
+    missing_fraction: float = 0.01,
+    invalid_fraction: float = 0.0,
+    shard: int = 0,
+    first_player: int = 0
+) -> pd.DataFrame:
+    """Function to generate raw roster data with the columns and value
+    distributions of the NHL roster file, for benchmarks and load tests at
+    sizes the real data does not reach.
+
+    Each player appears in a run of consecutive seasons, mostly with one
+    team, and keeps their handedness and body measurements across them.
+    Heights and weights are correlated as in the real data (r = 0.76) and
+    about two thirds of players shoot left. Fractions of the rows are exact
+    duplicates, miss their weight or height, or record the weight in pounds
+    or the height in metres, so every preprocessing and validation step has
+    work to do. String columns reuse a small pool of values, so memory
+    grows with the number of rows rather than with the length of the
+    strings.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of rows to generate.
+    random_state : int, optional
+        Seed for the generator, by default 123
+    duplicate_fraction : float, optional
+        Fraction of rows that repeat an earlier row, by default 0.01
+    missing_fraction : float, optional
+        Fraction of rows missing their weight or height, by default 0.01
+    invalid_fraction : float, optional
+        Fraction of rows with a weight or height outside the range the
+        schema accepts, by default 0.0
+    shard : int, optional
+        Index of the shard being generated; shards of the same seed draw
+        independent rows, by default 0
+    first_player : int, optional
+        Offset added to the player numbers, so that shards generated
+        separately do not share players, by default 0
+
+    Returns
+    -------
+    pd.DataFrame
+        Raw roster rows with the columns of `COLUMN_NAMES`.
+
+    Raises
+    ------
+    ValueError
+        The number of rows is negative or a fraction is not in [0, 1)
+    """
+    if n_rows < 0:
+        raise ValueError("Number of rows must not be negative.")
+    if not all(0 <= fraction < 1 for fraction in [duplicate_fraction, missing_fraction, invalid_fraction]):
+        raise ValueError("Fractions must be in [0, 1).")
+
+    rng = np.random.default_rng([random_state, shard])
+    n_unique = n_rows - int(n_rows * duplicate_fraction)
+
+    # Career lengths are drawn until they cover the rows; the last one is cut short
+    careers = np.minimum(rng.geometric(1 / SEASONS_PER_PLAYER, n_unique // SEASONS_PER_PLAYER + 16), 25)
+    while careers.sum() < n_unique:
+        careers = np.concatenate([careers, np.minimum(rng.geometric(1 / SEASONS_PER_PLAYER, len(careers)), 25)])
+    n_players = int(np.searchsorted(np.cumsum(careers), n_unique)) + 1
+    careers = careers[:n_players]
+    careers[-1] -= careers.sum() - n_unique
+
+    height = rng.normal(184, 5.9, n_players).round()
+    weight = (88.7 + 1.056 * (height - 184) + rng.normal(0, 5.3, n_players)).round()
+    shoots_left = rng.random(n_players) < 0.66
+    position = rng.integers(0, len(POSITION_CODES), n_players)
+    first_season = 1917 + (rng.random(n_players) * (2024 - 1917 - careers + 1)).astype(np.int64)
+    home_team = rng.integers(0, len(TEAM_CODES), n_players)
+
+    player = np.repeat(np.arange(n_players), careers)
+    season = first_season[player] + np.arange(n_unique) - np.repeat(np.cumsum(careers) - careers, careers)
+    # Most seasons are played for the same team, some after a trade
+    traded = rng.random(n_unique) < 0.15
+    team = np.where(traded, rng.integers(0, len(TEAM_CODES), n_unique), home_team[player])
+
+    rosters = pd.DataFrame({
+        "team_code": np.asarray(TEAM_CODES, dtype=object)[team],
+        "season": season * 10_000 + season + 1,
+        "position_type": POSITION_TYPES[position[player]],
+        "player_id": FIRST_PLAYER_ID + first_player + player,
+        "headshot": "https://assets.nhle.com/mugs/nhl/headshot.png",
+        "first_name": "First",
+        "last_name": "Last",
+        "sweater_number": rng.integers(1, 99, n_unique).astype(np.float64),
+        "position_code": POSITION_CODES[position[player]],
+        "shoots_catches": np.where(shoots_left[player], "L", "R").astype(object),
+        "height_in_inches": height[player] / 2.54,
+        "weight_in_pounds": weight[player] * 2.2,
+        "height_in_centimeters": height[player],
+        "weight_in_kilograms": weight[player],
+        "birth_date": "1990-01-01",
+        "birth_city": "Toronto",
+        "birth_country": "CAN",
+        "birth_state_province": "ON"
+    }, columns=COLUMN_NAMES)
+
+    missing = np.flatnonzero(rng.random(n_unique) < missing_fraction)
+    rosters.loc[missing[::2], "weight_in_kilograms"] = np.nan
+    rosters.loc[missing[1::2], "height_in_centimeters"] = np.nan
+
+    # Unit mix-ups: weights entered in pounds and heights in metres
+    invalid = np.flatnonzero(rng.random(n_unique) < invalid_fraction)
+    rosters.loc[invalid[::2], "weight_in_kilograms"] = rosters["weight_in_pounds"].iloc[invalid[::2]].round()
+    rosters.loc[invalid[1::2], "height_in_centimeters"] = rosters["height_in_centimeters"].iloc[invalid[1::2]] / 100
+
+    if n_rows > n_unique:
+        duplicates = rng.integers(0, max(n_unique, 1), n_rows - n_unique)
+        rosters = pd.concat([rosters, rosters.iloc[duplicates]], ignore_index=True)
+    return rosters
+
+
+def _write_shard(shard: int, n_rows: int, shard_rows: int, directory: str, file_format: str,
+                 random_state: int, options: dict) -> str:
+    """Generate one shard and write it, returning its path."""
+    rosters = synthetic_rosters(n_rows, random_state, shard=shard, first_player=shard * shard_rows, **options)
+    filename = f"nhl_rosters-{shard:05d}.{file_format}"
+    write_table(rosters, directory, filename)
+    return os.path.join(directory, filename)
+
+
+@instrumented
+def write_synthetic_rosters(
+    n_rows: int,
+    directory: str,
+    shard_rows: int = 1_000_000,
+    n_jobs: int = None,
+    random_state: int = 123,
+    file_format: str = "csv",
+    **options
+) -> list:
+    """Function to generate synthetic rosters of any size in shards written
+    in parallel by a pool of processes.
+
+    Every shard is generated and written by one worker, so memory use
+    depends on the shard size and the number of workers rather than on the
+    total number of rows. The rows of a shard depend only on the seed and
+    the shard index, so the output is the same for any number of workers.
+
+    Parameters
+    ----------
+    n_rows : int
+        Total number of rows to generate.
+    directory : str
+        The location to write the shards to, as
+        `nhl_rosters-<shard>.<file_format>`.
+    shard_rows : int, optional
+        Number of rows per shard; the last one may be smaller, by default
+        1000000
+    n_jobs : int, optional
+        Number of worker processes, by default one per CPU
+    random_state : int, optional
+        Seed for the generator, by default 123
+    file_format : str, optional
+        Storage format of the shards, "csv", "parquet" or "feather", by
+        default "csv"
+    **options
+        Fractions of duplicate, missing and invalid rows passed to
+        `synthetic_rosters`.
+
+    Returns
+    -------
+    list
+        Paths of the shards, in order.
+
+    Raises
+    ------
+    FileNotFoundError
+        The directory cannot be found
+    ValueError
+        The number of rows or the shard size is not a positive integer
+    """
+    if not os.path.exists(directory):
+        raise FileNotFoundError("Directory does not exist.")
+    if n_rows < 1 or shard_rows < 1:
+        raise ValueError("Number of rows and shard size must be positive integers.")
+
+    n_shards = -(-n_rows // shard_rows)
+    sizes = [min(shard_rows, n_rows - shard * shard_rows) for shard in range(n_shards)]
+    with ProcessPoolExecutor(max_workers=min(n_jobs or os.cpu_count(), n_shards)) as executor:
+        paths = list(executor.map(
+            _write_shard, range(n_shards), sizes, repeat(shard_rows), repeat(directory),
+            repeat(file_format), repeat(random_state), repeat(options)
+        ))
+    record_rows(rows_out=n_rows)
+    return paths
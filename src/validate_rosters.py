@@ -0,0 +1,131 @@
+import logging
+import numpy as np
+import pandas as pd
+import pandera as pa
+from src.storage import TableWriter
+from src.instrumentation import instrumented
+
+
+def _check_rule(check: pa.Check):
+    """Return a function mapping a column's values to a boolean array that
+    is True where the values pass a pandera check."""
+    stats = check.statistics
+    if check.name == "in_range":
+        def in_range(values):
+            lower = values >= stats["min_value"] if stats.get("include_min", True) else values > stats["min_value"]
+            upper = values <= stats["max_value"] if stats.get("include_max", True) else values < stats["max_value"]
+            return lower & upper
+        return in_range
+    if check.name == "greater_than":
+        return lambda values: values > stats["min_value"]
+    if check.name == "greater_than_or_equal_to":
+        return lambda values: values >= stats["min_value"]
+    if check.name == "less_than":
+        return lambda values: values < stats["max_value"]
+    if check.name == "less_than_or_equal_to":
+        return lambda values: values <= stats["max_value"]
+    if check.name == "equal_to":
+        return lambda values: values == stats["value"]
+    if check.name == "isin":
+        return lambda values: np.isin(values, list(stats["allowed_values"]))
+    if check.name == "notin":
+        return lambda values: ~np.isin(values, list(stats["forbidden_values"]))
+    raise ValueError(f"Unsupported check '{check.name}'.")
+
+
+class RosterValidator:
+    """Vectorized validation engine compiled from a pandera schema.
+
+    Each column's null, range and membership checks are compiled into
+    functions on NumPy arrays. A table is then validated with one boolean
+    mask per rule and invalid rows are dropped in a single pass, without
+    building pandera's failure case frames. Rejected rows, with the names of
+    the rules they failed, are streamed to an optional quarantine writer in
+    chunks, and failures are counted per rule across every table validated.
+
+    Column dtypes are checked per table; a mismatch is counted and logged
+    but does not drop rows, as no single row is at fault.
+
+    Parameters
+    ----------
+    schema : pa.DataFrameSchema
+        Schema whose column checks are compiled.
+    quarantine : TableWriter, optional
+        Writer for the rejected rows, opened with the schema columns plus a
+        `failed_checks` column. By default rejected rows are discarded.
+    chunksize : int, optional
+        Maximum number of rejected rows written per chunk, by default 100000
+    """
+
+    def __init__(self, schema: pa.DataFrameSchema, quarantine: TableWriter = None, chunksize: int = 100_000):
+        self.schema = schema
+        self.quarantine = quarantine
+        self.chunksize = chunksize
+        self.rules = []
+        for name, column in schema.columns.items():
+            if not column.nullable:
+                self.rules.append((name, "not_null", None))
+            for check in column.checks:
+                self.rules.append((name, check.name, _check_rule(check)))
+        self.counts = {(name, rule): 0 for name, rule, _ in self.rules}
+        self.counts.update({(name, "dtype"): 0 for name in schema.columns})
+        self.rows_checked = 0
+        self.rows_rejected = 0
+
+    @instrumented
+    def validate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return the rows of `df` that pass every rule.
+
+        Raises
+        ------
+        ValueError
+            A column of the schema is missing from `df`
+        """
+        missing = [name for name in self.schema.columns if name not in df.columns]
+        if missing:
+            raise ValueError(f"Columns missing from the data: {missing}")
+
+        for name, column in self.schema.columns.items():
+            if column.dtype is not None and not column.dtype.check(pa.engines.pandas_engine.Engine.dtype(df[name].dtype)):
+                self.counts[(name, "dtype")] += len(df)
+                logging.error(f"Column '{name}' has dtype {df[name].dtype}, expected {column.dtype}.")
+
+        failed = {}
+        for name, rule, check in self.rules:
+            values = df[name].to_numpy()
+            nulls = pd.isna(values)
+            if check is None:
+                fails = nulls
+            else:
+                passes = np.zeros(len(values), dtype=bool)
+                passes[~nulls] = check(values[~nulls])
+                fails = ~passes & ~nulls
+            n_fails = int(fails.sum())
+            if n_fails:
+                self.counts[(name, rule)] += n_fails
+                failed[f"{name}:{rule}"] = fails
+
+        self.rows_checked += len(df)
+        if not failed:
+            return df
+
+        invalid = np.logical_or.reduce(list(failed.values()))
+        self.rows_rejected += int(invalid.sum())
+        if self.quarantine is not None:
+            self._write_quarantine(df[invalid], {key: fails[invalid] for key, fails in failed.items()})
+        return df[~invalid]
+
+    def _write_quarantine(self, rejected: pd.DataFrame, failed: dict):
+        labels = np.full(len(rejected), "", dtype=object)
+        for key, fails in failed.items():
+            labels = labels + np.where(fails, key + ";", "")
+        rejected = rejected[list(self.schema.columns)].assign(failed_checks=[label.rstrip(";") for label in labels])
+        for start in range(0, len(rejected), self.chunksize):
+            self.quarantine.write(rejected.iloc[start:start + self.chunksize])
+
+    def summary(self) -> pd.DataFrame:
+        """Return the number of failures per column and rule."""
+        return pd.DataFrame(
+            [(name, rule, count) for (name, rule), count in self.counts.items()],
+            columns=["column", "check", "failures"]
+        )
@@ -1,17 +1,83 @@
+import bz2
+import gzip
+import lzma
 import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 
+# Compressed CSV extensions, mapped to the module that reads and writes them
+COMPRESSIONS = {
+    ".gz": gzip,
+    ".bz2": bz2,
+    ".xz": lzma
+}
+
+
+def csv_compression(path: str):
+    """Return the compression module of a CSV path from its extension, or
+    None for an uncompressed `.csv` file."""
+    return COMPRESSIONS.get(os.path.splitext(str(path))[1].lower())
+
+
+def open_csv(path: str, mode: str = "r", compression=None):
+    """Open a CSV file in text mode, compressed according to its extension
+    or with the given compression module."""
+    compression = compression or csv_compression(path)
+    if compression is None:
+        return open(path, mode, newline="")
+    return compression.open(path, mode + "t", newline="")
+
+
+def _encode_partition(part: pd.DataFrame, header: bool, keep_index: bool, extension: str) -> bytes:
+    """Format one partition as CSV bytes, compressed as a complete stream
+    according to the file `extension`. Compression is passed by extension
+    because worker processes cannot receive module objects.
+
+    gzip, bz2 and xz readers all continue into a following stream, so the
+    streams of consecutive partitions concatenate into one valid file.
+    """
+    data = part.to_csv(header=header, index=keep_index).encode("utf-8")
+    compression = COMPRESSIONS.get(extension)
+    if compression is None:
+        return data
+    return compression.compress(data)
+
+
+def _fsync(path: str):
+    """Flush a written file's contents to disk, so that a crash after it is
+    renamed into place cannot leave an empty or truncated file."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
 
 def write_csv(
     df: pd.DataFrame,
     directory: str,
     filename: str,
-    keep_index: bool = False
+    keep_index: bool = False,
+    chunksize: int = None,
+    n_jobs: int = None
 ):
     """Function to write a DataFrame object as a CSV file to a specified
     location. Takes in an optional argument to specifiy if the index
     column should be saved or not.
 
+    The file is written to a temporary file in the same directory, flushed
+    to disk and renamed into place once complete, so an interrupted write
+    or a crash never leaves a truncated file behind. A filename ending in `.csv.gz`, `.csv.bz2` or
+    `.csv.xz` is compressed while it is written.
+
+    With a `chunksize`, the rows are split into partitions that worker
+    processes format and compress in parallel, and the partitions are
+    appended to the file in order as they complete. `to_csv` holds the GIL,
+    so threads would format them one at a time. The result is a single
+    CSV file, identical in content to an unpartitioned write, that any CSV
+    reader consumes as usual.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -23,6 +89,12 @@ def write_csv(
     keep_index : bool, optional
         Boolean to indicate whether to keep the index column
         from the DataFrame, by default False
+    chunksize : int, optional
+        Number of rows per partition written in parallel. By default the
+        frame is written in one call.
+    n_jobs : int, optional
+        Number of worker processes for partitioned writes, by default one
+        per CPU; with one, the partitions are written in this process
 
     Raises
     ------
@@ -34,15 +106,49 @@ def write_csv(
         The output file name does not end with .csv
     ValueError
         The input DataFrame is empty
+    ValueError
+        The chunk size is not a positive integer
     """
     if not isinstance(df, pd.DataFrame):
         raise TypeError("The input must be of type Pandas DataFrame.")
     if not os.path.exists(directory):
         raise FileNotFoundError("Directory does not exist.")
-    if not filename.endswith(".csv"):
-        raise ValueError("Filename must end with '.csv'.")
+    compression = csv_compression(filename)
+    stem = os.path.splitext(filename)[0] if compression else filename
+    if not stem.endswith(".csv"):
+        raise ValueError("Filename must end with '.csv'. Add .gz, .bz2 or .xz to compress it.")
     if df.empty:
         raise ValueError("Dataframe must have records.")
+    if chunksize is not None and (not isinstance(chunksize, int) or chunksize < 1):
+        raise ValueError("Chunk size must be a positive integer.")
 
     full_path = os.path.join(directory, filename)
-    df.to_csv(full_path, index=keep_index)
+    temporary_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        if chunksize is None:
+            with open_csv(temporary_path, "w", compression) as f:
+                df.to_csv(f, index=keep_index)
+        else:
+            starts = range(0, len(df), chunksize)
+            extension = os.path.splitext(filename)[1].lower()
+            n_jobs = n_jobs or os.cpu_count() or 1
+            with open(temporary_path, "wb") as f:
+                if n_jobs == 1:
+                    for start in starts:
+                        f.write(_encode_partition(df.iloc[start:start + chunksize], start == 0, keep_index, extension))
+                else:
+                    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                        # Partitions are submitted a window at a time to bound the bytes held in memory
+                        for first in range(0, len(starts), n_jobs):
+                            window = starts[first:first + n_jobs]
+                            parts = executor.map(_encode_partition,
+                                                 [df.iloc[start:start + chunksize] for start in window],
+                                                 [start == 0 for start in window],
+                                                 [keep_index] * len(window), [extension] * len(window))
+                            for data in parts:
+                                f.write(data)
+        _fsync(temporary_path)
+        os.replace(temporary_path, full_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
@@ -0,0 +1,60 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Import the binned_counts functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.binned_counts import binned_counts, nice_bins
+
+
+# Create data with two classes
+@pytest.fixture
+def rosters():
+    return pd.DataFrame({
+        "weight_in_kilograms": [57.0, 61.0, 79.9, 80.0, 95.0, 120.0, np.nan],
+        "shoots_left": [True, True, False, True, False, False, True],
+    })
+
+
+# Test that bins follow Vega-Lite's default nice bins
+def test_nice_bins():
+    assert nice_bins(57.0, 120.0) == (50.0, 120.0, 10.0)
+    assert nice_bins(160.0, 208.0) == (160.0, 210.0, 5.0)
+    assert nice_bins(0.2, 0.9) == pytest.approx((0.2, 0.9, 0.1))
+    start, stop, step = nice_bins(5.0, 5.0)
+    assert start <= 5.0 < stop
+
+
+# Test the counts per class and bin, with the maximum in the last bin
+def test_binned_counts(rosters):
+    counts = binned_counts(rosters, "weight_in_kilograms", "shoots_left")
+
+    assert counts["count"].sum() == 6
+    assert counts.columns.tolist() == ["shoots_left", "bin_start", "bin_end", "count"]
+    left = counts[counts["shoots_left"]].set_index("bin_start")["count"].to_dict()
+    right = counts[~counts["shoots_left"]].set_index("bin_start")["count"].to_dict()
+    assert left == {50.0: 1, 60.0: 1, 80.0: 1}
+    assert right == {70.0: 1, 90.0: 1, 110.0: 1}
+    assert (counts["bin_end"] - counts["bin_start"] == 10.0).all()
+
+
+# Test that the counts match a histogram of the raw rows
+def test_binned_counts_matches_histogram():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x": rng.normal(90, 8, 5000), "g": rng.random(5000) < 0.6})
+    counts = binned_counts(df, "x", "g")
+    start, stop, step = nice_bins(df["x"].min(), df["x"].max())
+    edges = np.arange(start, stop + step / 2, step)
+
+    for group, rows in df.groupby("g"):
+        expected, _ = np.histogram(rows["x"], bins=edges)
+        observed = counts[counts["g"] == group].set_index("bin_start")["count"]
+        assert observed.to_dict() == {edges[i]: n for i, n in enumerate(expected) if n}
+
+
+# Test for a missing column
+def test_binned_counts_missing_column(rosters):
+    with pytest.raises(ValueError, match="Columns missing from the data"):
+        binned_counts(rosters, "height_in_centimeters", "shoots_left")
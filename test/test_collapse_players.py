@@ -0,0 +1,54 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Import the collapse_players function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.collapse_players import collapse_players
+
+
+# Create test rosters with repeated players, a mid-season trade and a gap
+@pytest.fixture
+def rosters():
+    return pd.DataFrame({
+        "team_code": ["TOR", "TOR", "MTL", "BOS", "BOS", "MTL"],
+        "season": [20012002, 20022003, 20022003, 20102011, 20112012, 20002001],
+        "player_id": [8, 8, 8, 3, 3, 8],
+        "weight_in_kilograms": [80.0, 84.0, 84.0, 90.0, np.nan, 79.0],
+        "height_in_centimeters": [180.0, 180.0, 181.0, 190.0, 190.0, 180.0],
+        "shoots_catches": ["L", "L", "L", "R", "R", "L"],
+    })
+
+
+# Test one record per player with the number of distinct seasons as weight
+def test_collapse_players_median(rosters):
+    collapsed = collapse_players(rosters)
+
+    assert collapsed["player_id"].tolist() == [3, 8]
+    assert collapsed["sample_weight"].tolist() == [2, 3]
+    assert collapsed["weight_in_kilograms"].tolist() == [90.0, 82.0]
+    assert collapsed["shoots_catches"].tolist() == ["R", "L"]
+
+
+# Test that first and last follow the season order, not the row order
+def test_collapse_players_first_last(rosters):
+    first = collapse_players(rosters, "first")
+    last = collapse_players(rosters, {"weight_in_kilograms": "last", "height_in_centimeters": "mean"})
+
+    assert first.loc[first["player_id"] == 8, "weight_in_kilograms"].item() == 79.0
+    assert last.loc[last["player_id"] == 8, "weight_in_kilograms"].item() == 84.0
+    assert last.loc[last["player_id"] == 8, "height_in_centimeters"].item() == pytest.approx(180.25)
+
+
+# Test for an unsupported aggregation
+def test_collapse_players_bad_aggregation(rosters):
+    with pytest.raises(ValueError, match="Unsupported aggregation"):
+        collapse_players(rosters, "mode")
+
+
+# Test for a missing column
+def test_collapse_players_missing_column(rosters):
+    with pytest.raises(ValueError, match="Columns missing from the rosters"):
+        collapse_players(rosters.drop(columns="season"))
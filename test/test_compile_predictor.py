@@ -0,0 +1,75 @@
+import pytest
+import sys
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.compose import make_column_transformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.compile_predictor import compile_predictor
+
+
+@pytest.fixture
+def sample_data():
+    """Fixture to create sample roster features and labels."""
+    rng = np.random.default_rng(123)
+    X = pd.DataFrame({
+        "weight_in_kilograms": rng.normal(88, 8, 500),
+        "height_in_centimeters": rng.normal(184, 6, 500),
+    })
+    y = pd.Series(X["weight_in_kilograms"] + rng.normal(0, 8, 500) > 88, name="shoots_left")
+    return X, y
+
+
+@pytest.fixture
+def fitted_pipeline(sample_data):
+    """Fixture to create a pipeline like the one saved by the classifier."""
+    X, y = sample_data
+    preprocessor = make_column_transformer(
+        (StandardScaler(), ["height_in_centimeters", "weight_in_kilograms"])
+    )
+    pipeline = make_pipeline(preprocessor, LogisticRegression(random_state=123, class_weight="balanced"))
+    return pipeline.fit(X, y)
+
+
+def test_compile_predictor_matches_pipeline(sample_data, fitted_pipeline):
+    """Test that the compiled predictor reproduces the sklearn pipeline."""
+    X, _ = sample_data
+    predictor = compile_predictor(fitted_pipeline)
+
+    np.testing.assert_array_equal(predictor.predict(X), fitted_pipeline.predict(X))
+    np.testing.assert_allclose(predictor.predict_proba(X), fitted_pipeline.predict_proba(X), rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(
+        predictor.decision_function(X), fitted_pipeline.decision_function(X), rtol=1e-12, atol=1e-12
+    )
+
+
+def test_compile_predictor_single_row(sample_data, fitted_pipeline):
+    """Test that arrays, dicts and single rows in feature order are accepted."""
+    X, _ = sample_data
+    predictor = compile_predictor(fitted_pipeline)
+    row = X.iloc[[0]]
+    expected = fitted_pipeline.predict_proba(row)
+
+    array_row = row[predictor.feature_names].to_numpy()[0]
+    np.testing.assert_allclose(predictor.predict_proba(array_row), expected, rtol=1e-12)
+    np.testing.assert_allclose(predictor.predict_proba(row.iloc[0].to_dict()), expected, rtol=1e-12)
+
+
+def test_compile_predictor_pickle(fitted_pipeline):
+    """Test that the slotted predictor survives pickling."""
+    predictor = compile_predictor(fitted_pipeline)
+    restored = pickle.loads(pickle.dumps(predictor))
+
+    assert not hasattr(restored, "__dict__")
+    assert restored.feature_names == predictor.feature_names
+    np.testing.assert_array_equal(restored.coef, predictor.coef)
+
+
+def test_compile_predictor_invalid_input():
+    """Test compile_predictor with an unsupported model."""
+    with pytest.raises(TypeError, match="pipeline must be a Pipeline ending in a LogisticRegression."):
+        compile_predictor(LogisticRegression())
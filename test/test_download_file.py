@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Import the download_file function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.download_file import download_file
+
+
+class RosterHandler(BaseHTTPRequestHandler):
+    """Serves one file with ETag, Last-Modified and Range support."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.path != "/nhl_rosters.csv":
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = server.body
+        etag = f'"{hash(body)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") in (None, etag):
+            start = int(range_header.split("=")[1].rstrip("-"))
+        payload = body[start:]
+        server.bytes_sent += len(payload)
+
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(0, usegmt=True))
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+# Start a local stand-in for the upstream file server
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RosterHandler)
+    httpd.body = b"team_code,season\nTOR,20232024\n" * 1000
+    httpd.requests = []
+    httpd.bytes_sent = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url_for(server, name="nhl_rosters.csv"):
+    return f"http://127.0.0.1:{server.server_address[1]}/{name}"
+
+
+# Test that the file is downloaded once and then only revalidated
+def test_download_file_conditional(server, tmp_path):
+    assert download_file(url_for(server), str(tmp_path)) == "downloaded"
+    assert (tmp_path / "nhl_rosters.csv").read_bytes() == server.body
+
+    assert download_file(url_for(server), str(tmp_path)) == "not-modified"
+    assert len(server.requests) == 2
+    assert server.bytes_sent == len(server.body)
+    assert "If-None-Match" in server.requests[1]
+
+
+# Test that a changed upstream file is downloaded again
+def test_download_file_changed_upstream(server, tmp_path):
+    download_file(url_for(server), str(tmp_path))
+    server.body = b"team_code,season\nMTL,20232024\n"
+
+    assert download_file(url_for(server), str(tmp_path)) == "downloaded"
+    assert (tmp_path / "nhl_rosters.csv").read_bytes() == server.body
+
+
+# Test that an interrupted download is resumed with a range request
+def test_download_file_resume(server, tmp_path):
+    download_file(url_for(server), str(tmp_path))
+    path = tmp_path / "nhl_rosters.csv"
+    os.replace(path, str(path) + ".part")
+    with open(str(path) + ".part", "r+b") as f:
+        f.truncate(1000)
+    server.bytes_sent = 0
+
+    assert download_file(url_for(server), str(tmp_path)) == "resumed"
+    assert path.read_bytes() == server.body
+    assert server.bytes_sent == len(server.body) - 1000
+    assert not os.path.exists(str(path) + ".part")
+
+
+# Test for a URL that does not exist
+def test_download_file_bad_url(server, tmp_path):
+    with pytest.raises(ValueError, match="The URL provided does not exist."):
+        download_file(url_for(server, "missing.csv"), str(tmp_path))
+
+
+# Test for missing directory
+def test_download_file_nonexistent_directory(server):
+    with pytest.raises(ValueError, match="The directory provided does not exist."):
+        download_file(url_for(server), "/this_does_not_exist")
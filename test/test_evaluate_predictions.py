@@ -0,0 +1,63 @@
+import pytest
+import sys
+import os
+import numpy as np
+from sklearn import metrics
+
+# Import the evaluate_predictions function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.evaluate_predictions import evaluate_predictions, METRICS
+
+
+# Create labels and rounded probabilities, so that scores are tied
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(1)
+    y = rng.random(2_000) < 0.6
+    proba = np.round(np.clip(0.5 + 0.1 * (y - 0.5) + rng.normal(0, 0.2, len(y)), 0, 1), 2)
+    return y, proba
+
+
+# Test the point estimates against scikit-learn
+def test_evaluate_predictions_matches_sklearn(predictions):
+    y, proba = predictions
+    evaluation = evaluate_predictions(y, proba, n_bootstrap=0)
+    scores = evaluation["scores"]["value"]
+
+    assert scores["accuracy"] == pytest.approx(metrics.accuracy_score(y, proba > 0.5))
+    assert scores["balanced_accuracy"] == pytest.approx(metrics.balanced_accuracy_score(y, proba > 0.5))
+    assert scores["roc_auc"] == pytest.approx(metrics.roc_auc_score(y, proba))
+    assert scores["pr_auc"] == pytest.approx(metrics.average_precision_score(y, proba))
+    assert scores["log_loss"] == pytest.approx(metrics.log_loss(y, np.clip(proba, 1e-15, 1 - 1e-15)))
+    assert (evaluation["confusion_matrix"] == metrics.confusion_matrix(y, proba > 0.5)).all()
+    assert evaluation["scores"]["ci_lower"].isna().all()
+
+
+# Test that the bootstrap intervals bracket the point estimates and are reproducible
+def test_evaluate_predictions_bootstrap(predictions):
+    y, proba = predictions
+    scores = evaluate_predictions(y, proba, n_bootstrap=200)["scores"]
+
+    assert scores.index.tolist() == METRICS
+    assert (scores["ci_lower"] <= scores["value"]).all()
+    assert (scores["value"] <= scores["ci_upper"]).all()
+    assert scores.equals(evaluate_predictions(y, proba, n_bootstrap=200)["scores"])
+
+
+# Test the calibration bins
+def test_evaluate_predictions_calibration():
+    y = np.array([0, 1, 1, 1, 0])
+    proba = np.array([0.05, 0.15, 0.95, 1.0, 0.92])
+    calibration = evaluate_predictions(y, proba, n_bootstrap=0)["calibration"]
+
+    assert calibration["bin_start"].tolist() == pytest.approx([0.0, 0.1, 0.9])
+    assert calibration["count"].tolist() == [1, 1, 3]
+    assert calibration["fraction_positive"].tolist() == pytest.approx([0.0, 1.0, 2 / 3])
+
+
+# Test for bad inputs
+def test_evaluate_predictions_bad_inputs():
+    with pytest.raises(ValueError, match="same length"):
+        evaluate_predictions([1, 0], [0.5])
+    with pytest.raises(ValueError, match="Confidence must be between 0 and 1."):
+        evaluate_predictions([1, 0], [0.5, 0.2], confidence=1.5)
@@ -76,4 +76,42 @@ def test_fit_and_evaluate_model_empty_data(mock_preprocessor):
     y_test = pd.Series(dtype=bool)
 
     with pytest.raises(ValueError, match="X_train and y_train cannot be empty."):
-        fit_and_evaluate_model(X_train, y_train, X_test, y_test, mock_preprocessor)
\ No newline at end of file
+        fit_and_evaluate_model(X_train, y_train, X_test, y_test, mock_preprocessor)
+
+
+def test_fit_and_evaluate_model_sample_weight(sample_data, mock_preprocessor):
+    """Test fit_and_evaluate_model with per-row sample weights."""
+    train_df, test_df = sample_data
+
+    X_train = train_df.drop(columns=["shoots_left"])
+    y_train = train_df["shoots_left"]
+    X_test = test_df.drop(columns=["shoots_left"])
+    y_test = test_df["shoots_left"]
+    sample_weight = pd.Series([5, 1, 1, 1, 1])
+
+    weighted, _ = fit_and_evaluate_model(X_train, y_train, X_test, y_test, mock_preprocessor,
+                                         sample_weight=sample_weight)
+    unweighted, _ = fit_and_evaluate_model(X_train, y_train, X_test, y_test, mock_preprocessor)
+
+    assert not np.allclose(weighted[-1].coef_, unweighted[-1].coef_)
+
+    with pytest.raises(ValueError, match="sample_weight must have one value per row of X_train."):
+        fit_and_evaluate_model(X_train, y_train, X_test, y_test, mock_preprocessor,
+                               sample_weight=sample_weight[:2])
+
+
+def test_fit_and_evaluate_model_return_evaluation(sample_data, mock_preprocessor):
+    """Test that the full evaluation agrees with the accuracy score."""
+    train_df, test_df = sample_data
+
+    X_train = train_df.drop(columns=["shoots_left"])
+    y_train = train_df["shoots_left"]
+    X_test = test_df.drop(columns=["shoots_left"])
+    y_test = test_df["shoots_left"]
+
+    _, accuracy = fit_and_evaluate_model(X_train, y_train, X_test, y_test, mock_preprocessor)
+    _, evaluation = fit_and_evaluate_model(X_train, y_train, X_test, y_test, mock_preprocessor,
+                                           return_evaluation=True, n_bootstrap=50)
+
+    assert evaluation["scores"].loc["accuracy", "value"] == pytest.approx(accuracy)
+    assert evaluation["confusion_matrix"].sum() == len(y_test)
@@ -0,0 +1,112 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.compose import make_column_transformer
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import SGDClassifier
+
+# Import the fit_streaming_model function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.fit_streaming_model import fit_streaming_model
+from src.fit_and_evaluate_model import fit_and_evaluate_model
+from src.compile_predictor import compile_predictor
+
+
+# Create a training file where heavier players shoot left more often
+@pytest.fixture
+def train_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    weight = rng.normal(90, 8, 3_000)
+    height = rng.normal(185, 6, 3_000)
+    shoots_left = rng.random(3_000) < 1 / (1 + np.exp(-(weight - 90) / 4))
+    path = tmp_path / "roster_train.csv"
+    pd.DataFrame({
+        "weight_in_kilograms": weight,
+        "height_in_centimeters": height,
+        "shoots_left": shoots_left
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def preprocessor():
+    return make_column_transformer((StandardScaler(), ["weight_in_kilograms", "height_in_centimeters"]))
+
+
+# Test that the scaler matches one fitted in memory and the model agrees with a logistic regression
+def test_fit_streaming_model(train_csv, preprocessor):
+    pipeline, history = fit_streaming_model(train_csv, preprocessor, chunksize=256)
+    train = pd.read_csv(train_csv)
+    X, y = train.drop(columns="shoots_left"), train["shoots_left"]
+    reference, _ = fit_and_evaluate_model(X, y, X, y, preprocessor)
+
+    scaler = pipeline[0].transformers_[0][1]
+    assert scaler.mean_ == pytest.approx(X.mean().to_numpy())
+    assert scaler.n_samples_seen_ == len(X)
+    assert isinstance(pipeline[-1], SGDClassifier)
+    assert (pipeline.predict(X) == reference.predict(X)).mean() > 0.95
+    assert history.columns.tolist() == ["epoch", "loss"]
+    assert 1 <= len(history) <= 20
+
+
+# Test that the streamed pipeline can be compiled like the in-memory one
+def test_fit_streaming_model_compiles(train_csv, preprocessor):
+    pipeline, _ = fit_streaming_model(train_csv, preprocessor, chunksize=1_000, max_epochs=3)
+    X = pd.read_csv(train_csv).drop(columns="shoots_left")
+
+    assert (compile_predictor(pipeline).predict(X) == pipeline.predict(X)).all()
+
+
+# Test that training stops early once the loss stops improving
+def test_fit_streaming_model_early_stopping(train_csv, preprocessor):
+    _, history = fit_streaming_model(train_csv, preprocessor, chunksize=500, tol=1.0, n_iter_no_change=1)
+
+    assert len(history) == 2
+
+
+# Test for a bad chunk size and a single class
+def test_fit_streaming_model_bad_inputs(train_csv, preprocessor, tmp_path):
+    with pytest.raises(ValueError, match="Chunk size must be a positive integer."):
+        fit_streaming_model(train_csv, preprocessor, chunksize=0)
+
+    one_class = tmp_path / "one_class.csv"
+    pd.read_csv(train_csv).assign(shoots_left=True).to_csv(one_class, index=False)
+    with pytest.raises(ValueError, match="at least two classes"):
+        fit_streaming_model(str(one_class), preprocessor, chunksize=500)
+
+
+# Test that a table sorted by the label still trains well and the chunk order is reproducible
+def test_fit_streaming_model_sorted_table(train_csv, preprocessor, tmp_path):
+    train = pd.read_csv(train_csv).sort_values("shoots_left")
+    sorted_csv = str(tmp_path / "sorted.csv")
+    train.to_csv(sorted_csv, index=False)
+    X, y = train.drop(columns="shoots_left"), train["shoots_left"]
+    reference, _ = fit_and_evaluate_model(X, y, X, y, preprocessor)
+
+    pipeline, _ = fit_streaming_model(sorted_csv, preprocessor, chunksize=300, max_epochs=5)
+    again, _ = fit_streaming_model(sorted_csv, preprocessor, chunksize=300, max_epochs=5)
+    other, _ = fit_streaming_model(sorted_csv, preprocessor, chunksize=300, max_epochs=5, random_state=7)
+
+    assert (pipeline.predict(X) == reference.predict(X)).mean() > 0.9
+    np.testing.assert_array_equal(pipeline[-1].coef_, again[-1].coef_)
+    assert not np.array_equal(pipeline[-1].coef_, other[-1].coef_)
+
+
+# Test that only the columns the preprocessor reads are spilled, not other numeric columns
+def test_fit_streaming_model_spills_features(train_csv, preprocessor, tmp_path, monkeypatch):
+    with_season = str(tmp_path / "with_season.csv")
+    pd.read_csv(train_csv).assign(season=20232024).to_csv(with_season, index=False)
+    shapes = []
+    memmap = np.memmap
+
+    def recording_memmap(*args, **kwargs):
+        shapes.append(kwargs["shape"])
+        return memmap(*args, **kwargs)
+
+    monkeypatch.setattr(np, "memmap", recording_memmap)
+    fit_streaming_model(with_season, preprocessor, chunksize=1_000, max_epochs=1)
+
+    # The two features, the label code and the sample weight
+    assert shapes == [(3_000, 4)]
@@ -0,0 +1,140 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.compose import make_column_transformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import save_artifact, read_artifact
+from src.incremental_model import training_state, new_seasons, update_model, file_sha256
+
+FEATURES = ["weight_in_kilograms", "height_in_centimeters"]
+
+
+@pytest.fixture
+def seasons_data():
+    """Fixture to create roster features and labels over ten seasons, with
+    the weights drifting upwards season by season."""
+    rng = np.random.default_rng(123)
+    n = 20_000
+    seasons = pd.Series(rng.integers(0, 10, n) * 10001 + 20142015, name="season")
+    X = pd.DataFrame({
+        "weight_in_kilograms": rng.normal(88, 6, n) + (seasons - 20142015) / 10001,
+        "height_in_centimeters": rng.normal(184, 6, n),
+    })
+    logit = 0.1 * (X["weight_in_kilograms"] - 90) - 0.05 * (X["height_in_centimeters"] - 184) + 0.7
+    y = pd.Series(rng.random(n) < 1 / (1 + np.exp(-logit)), name="shoots_left")
+    return X, y, seasons
+
+
+def fit_pipeline(X, y):
+    preprocessor = make_column_transformer((StandardScaler(), FEATURES))
+    return make_pipeline(preprocessor, LogisticRegression(random_state=123, class_weight="balanced")).fit(X, y)
+
+
+def save_initial(X, y, seasons, path, **kwargs):
+    pipeline = fit_pipeline(X, y)
+    save_artifact(pipeline, path, **training_state(pipeline, X, y, seasons, **kwargs))
+    return pipeline
+
+
+def test_training_state(seasons_data, tmp_path):
+    """Test that a full fit stores its seasons, scaler moments and a replay sample."""
+    X, y, seasons = seasons_data
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_initial(X, y, seasons, path, replay_size=500)
+    header, arrays = read_artifact(path)
+
+    assert header["metadata"]["seasons"] == sorted(seasons.unique().tolist())
+    assert header["metadata"]["lineage"] == [
+        {"version": 1, "parent_sha256": None, "seasons_added": header["metadata"]["seasons"], "rows_added": len(X)}
+    ]
+    np.testing.assert_array_equal(arrays["n_samples_seen"], [len(X), len(X)])
+    np.testing.assert_allclose(arrays["var"], X.var(ddof=0).to_numpy())
+    np.testing.assert_array_equal(arrays["class_counts"], [(~y).sum(), y.sum()])
+    assert arrays["replay_X"].shape == (500, 2)
+    assert arrays["replay_y"].shape == (500,)
+
+
+def test_update_model_matches_full_fit(seasons_data, tmp_path):
+    """Test that adding new seasons gives the scaler of a full refit and
+    predictions close to it."""
+    X, y, seasons = seasons_data
+    old = seasons < 20212022
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_initial(X[old], y[old], seasons[old], path, replay_size=5_000)
+
+    assert new_seasons(path, seasons) == [20212022, 20222023, 20232024]
+    pipeline, state = update_model(path, X, y, seasons, replay_size=5_000)
+    full = fit_pipeline(X, y)
+
+    scaler = pipeline[0].named_transformers_["standardscaler"]
+    full_scaler = full[0].named_transformers_["standardscaler"]
+    assert scaler.n_samples_seen_ == len(X)
+    np.testing.assert_allclose(scaler.mean_, full_scaler.mean_)
+    np.testing.assert_allclose(scaler.var_, full_scaler.var_)
+    np.testing.assert_allclose(pipeline.predict_proba(X), full.predict_proba(X), atol=0.03)
+    assert pipeline[-1].get_params()["warm_start"] is False
+    assert pipeline[-1].get_params()["class_weight"] == "balanced"
+
+    lineage = state["metadata"]["lineage"]
+    assert [entry["version"] for entry in lineage] == [1, 2]
+    assert lineage[-1] == {"version": 2, "parent_sha256": file_sha256(path),
+                           "seasons_added": [20212022, 20222023, 20232024], "rows_added": int((~old).sum())}
+    assert state["metadata"]["seasons"] == sorted(seasons.unique().tolist())
+    np.testing.assert_array_equal(state["extra_arrays"]["n_samples_seen"], [len(X), len(X)])
+
+
+def test_update_model_chain(seasons_data, tmp_path):
+    """Test that an updated artifact can be updated again, and that data
+    with no new seasons leaves it unchanged."""
+    X, y, seasons = seasons_data
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_initial(X[seasons < 20222023], y[seasons < 20222023], seasons[seasons < 20222023], path)
+    for last in [20222023, 20232024]:
+        pipeline, state = update_model(path, X[seasons <= last], y[seasons <= last], seasons[seasons <= last])
+        save_artifact(pipeline, path, **state)
+
+    header, _ = read_artifact(path)
+    assert [entry["seasons_added"] for entry in header["metadata"]["lineage"][1:]] == [[20222023], [20232024]]
+    assert update_model(path, X, y, seasons)[1] is None
+
+
+def test_update_model_without_state(seasons_data, tmp_path):
+    """Test that an artifact saved without a training state cannot be updated."""
+    X, y, seasons = seasons_data
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_artifact(fit_pipeline(X, y), path)
+    with pytest.raises(ValueError, match="has no training state"):
+        update_model(path, X, y, seasons)
+    with pytest.raises(ValueError, match="one value per row"):
+        training_state(fit_pipeline(X, y), X, y, seasons[:10])
+
+
+def test_update_model_missing_artifact(seasons_data, tmp_path):
+    """Test that updating a missing artifact names the path."""
+    X, y, seasons = seasons_data
+    path = os.path.join(tmp_path, "missing.npmodel")
+    with pytest.raises(FileNotFoundError, match="There is no model artifact at .*missing.npmodel"):
+        update_model(path, X, y, seasons)
+    with pytest.raises(FileNotFoundError, match="missing.npmodel"):
+        new_seasons(path, seasons)
+
+
+def test_training_state_continues_lineage(seasons_data, tmp_path):
+    """Test that a full retrain over an artifact continues its version numbers."""
+    X, y, seasons = seasons_data
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_initial(X, y, seasons, path)
+    parent_sha256 = file_sha256(path)
+
+    state = training_state(fit_pipeline(X, y), X, y, seasons, parent_path=path)
+    lineage = state["metadata"]["lineage"]
+    assert [entry["version"] for entry in lineage] == [1, 2]
+    assert lineage[-1]["parent_sha256"] == parent_sha256
+    assert lineage[-1]["retrained"]
+    missing = os.path.join(tmp_path, "missing.npmodel")
+    assert training_state(fit_pipeline(X, y), X, y, seasons, parent_path=missing)["metadata"]["lineage"][0]["version"] == 1
@@ -0,0 +1,125 @@
+import pytest
+import sys
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Import the instrumentation functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import instrumented, measure, propagate_run, record_rows, run_manifest
+
+
+@instrumented
+def drop_half(df):
+    return df.iloc[: len(df) // 2]
+
+
+@instrumented
+def outer(df):
+    record_rows(rows_out=7)
+    return [drop_half(df) for _ in range(3)]
+
+
+# Test that spans record rows and nesting, and repeated calls are aggregated
+def test_run_manifest(tmp_path):
+    df = pd.DataFrame({"x": np.arange(100)})
+    with run_manifest("stage", str(tmp_path), trace_memory=True) as run:
+        with measure("load", rows_in=100):
+            np.ones(1_000_000)
+        outer(df)
+        record_rows(rows_in=100)
+
+    manifest = json.loads((tmp_path / "stage.json").read_text())
+    spans = {span["name"]: span for span in manifest["spans"]}
+
+    assert manifest["stage"] == "stage"
+    assert manifest["total"]["rows_in"] == 100
+    assert manifest["total"]["tracemalloc_peak_mb"] >= spans["load"]["tracemalloc_peak_mb"] > 7
+    assert spans["drop_half"]["parent"] == "outer"
+    assert spans["drop_half"]["calls"] == 3
+    assert spans["drop_half"]["rows_in"] == 300
+    assert spans["drop_half"]["rows_out"] == 150
+    assert spans["outer"]["rows_out"] == 7
+    assert spans["load"]["rows_per_second"] > 0
+    assert all(span["wall_seconds"] >= 0 and span["cpu_seconds"] >= 0 for span in manifest["spans"])
+    assert len(run.spans) == 6
+
+
+# Test the optional cProfile dump
+def test_run_manifest_profile(tmp_path):
+    with run_manifest("stage", str(tmp_path), profile=True):
+        drop_half(pd.DataFrame({"x": [1, 2]}))
+
+    assert (tmp_path / "stage.prof").exists()
+    assert (tmp_path / "stage.json").exists()
+
+
+# Test that nothing is recorded without an active run
+def test_instrumented_without_run():
+    with measure("idle") as span:
+        record_rows(rows_in=3)
+
+    assert span == {}
+    assert len(drop_half(pd.DataFrame({"x": [1, 2, 3, 4]}))) == 2
+
+
+# Test that stages run concurrently on threads each record into their own manifest
+def test_run_manifest_threads(tmp_path):
+    barrier = threading.Barrier(2)
+
+    def stage(name, rows):
+        with run_manifest(name, str(tmp_path)):
+            # Both runs are active while each stage measures its work
+            barrier.wait(timeout=10)
+            drop_half(pd.DataFrame({"x": np.arange(rows)}))
+            barrier.wait(timeout=10)
+
+    threads = [threading.Thread(target=stage, args=(name, rows)) for name, rows in [("eda", 10), ("classify", 40)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, rows in [("eda", 10), ("classify", 40)]:
+        spans = json.loads((tmp_path / f"{name}.json").read_text())["spans"]
+        assert [(span["name"], span["parent"], span["rows_in"]) for span in spans] == [("drop_half", name, rows)]
+
+
+# Test that profiling or tracing is refused while another stage is recorded
+def test_run_manifest_exclusive_flags(tmp_path):
+    def classify(**flags):
+        with run_manifest("classify", **flags):
+            pass
+
+    def concurrent(**flags):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(classify, **flags).exception()
+
+    with run_manifest("eda", str(tmp_path)):
+        assert isinstance(concurrent(profile=True), RuntimeError)
+        assert isinstance(concurrent(trace_memory=True), RuntimeError)
+    with run_manifest("eda", str(tmp_path), trace_memory=True):
+        with pytest.raises(RuntimeError, match="only valid when stages run one at a time"):
+            with run_manifest("classify"):
+                pass
+    # Runs end cleanly, so a later profiled stage is allowed
+    with run_manifest("eda", str(tmp_path), profile=True):
+        pass
+
+
+# Test that helper threads record into the run they were started from, and only when it is propagated
+def test_propagate_run(tmp_path):
+    df = pd.DataFrame({"x": np.arange(8)})
+    with run_manifest("stage", str(tmp_path)) as run:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(propagate_run(drop_half), [df, df]))
+            list(executor.map(drop_half, [df]))
+
+    assert [(span["name"], span["parent"]) for span in run.spans[:-1]] == [("drop_half", "stage")] * 2
+    # Spans measure the RSS growth over the span and the process-lifetime peak separately
+    total = run.spans[-1]
+    assert total["process_peak_rss_mb"] > 0
+    assert total["rss_growth_mb"] is None or isinstance(total["rss_growth_mb"], float)
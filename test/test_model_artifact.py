@@ -0,0 +1,124 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.compose import make_column_transformer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import FORMAT_VERSION, save_artifact, read_artifact, load_predictor, load_pipeline
+
+
+@pytest.fixture
+def sample_data():
+    """Fixture to create sample roster features and labels."""
+    rng = np.random.default_rng(123)
+    X = pd.DataFrame({
+        "weight_in_kilograms": rng.normal(88, 8, 500),
+        "height_in_centimeters": rng.normal(184, 6, 500),
+    })
+    y = pd.Series(X["weight_in_kilograms"] + rng.normal(0, 8, 500) > 88, name="shoots_left")
+    return X, y
+
+
+def fit_pipeline(X, y, model):
+    preprocessor = make_column_transformer(
+        (StandardScaler(), ["height_in_centimeters", "weight_in_kilograms"])
+    )
+    return make_pipeline(preprocessor, model).fit(X, y)
+
+
+def test_artifact_layout(sample_data, tmp_path):
+    """Test that the header describes memory mapped, aligned arrays."""
+    X, y = sample_data
+    pipeline = fit_pipeline(X, y, LogisticRegression(C=0.5, class_weight="balanced"))
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_artifact(pipeline, path)
+    header, arrays = read_artifact(path)
+
+    assert header["format_version"] == FORMAT_VERSION
+    assert header["estimator"] == "LogisticRegression"
+    assert header["params"]["C"] == 0.5
+    assert header["feature_names"] == ["height_in_centimeters", "weight_in_kilograms"]
+    assert all(isinstance(array, np.memmap) for array in arrays.values())
+    assert all(array.offset % 64 == 0 for array in arrays.values())
+    np.testing.assert_array_equal(arrays["classes"], [False, True])
+    np.testing.assert_array_equal(arrays["coef"], pipeline[-1].coef_[0])
+
+
+@pytest.mark.parametrize("model", [LogisticRegression(class_weight="balanced"),
+                                   SGDClassifier(loss="log_loss", average=True, random_state=123)])
+def test_artifact_round_trip(sample_data, tmp_path, model):
+    """Test that both loaders reproduce the saved pipeline."""
+    X, y = sample_data
+    pipeline = fit_pipeline(X, y, model)
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_artifact(pipeline, path)
+
+    predictor = load_predictor(path)
+    np.testing.assert_array_equal(predictor.predict(X), pipeline.predict(X))
+    np.testing.assert_allclose(predictor.predict_proba(X), pipeline.predict_proba(X), rtol=1e-12, atol=1e-15)
+
+    restored = load_pipeline(path)
+    assert type(restored[-1]) is type(model)
+    np.testing.assert_array_equal(restored.predict(X), pipeline.predict(X))
+    np.testing.assert_allclose(restored.predict_proba(X), pipeline.predict_proba(X), rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("average", [True, False])
+def test_artifact_sgd_partial_fit(sample_data, tmp_path, average):
+    """Test that a loaded SGD classifier continues training like the saved one."""
+    X, y = sample_data
+    pipeline = fit_pipeline(X, y, SGDClassifier(loss="log_loss", average=average, random_state=123))
+    path = os.path.join(tmp_path, "model.npmodel")
+    save_artifact(pipeline, path)
+    restored = load_pipeline(path)
+    assert restored[-1].t_ == pipeline[-1].t_
+    assert restored[-1].n_iter_ == pipeline[-1].n_iter_
+
+    X_scaled = pipeline[0].transform(X)
+    pipeline[-1].partial_fit(X_scaled, y)
+    restored[-1].partial_fit(X_scaled, y)
+    np.testing.assert_allclose(restored[-1].coef_, pipeline[-1].coef_, rtol=1e-12)
+    np.testing.assert_allclose(restored[-1].intercept_, pipeline[-1].intercept_, rtol=1e-12)
+
+
+def test_artifact_invalid_files(sample_data, tmp_path):
+    """Test that other files, newer versions and other models are rejected."""
+    X, y = sample_data
+    path = os.path.join(tmp_path, "model.npmodel")
+    with open(path, "wb") as f:
+        f.write(b"not a model")
+    with pytest.raises(ValueError, match="is not a model artifact"):
+        read_artifact(path)
+
+    save_artifact(fit_pipeline(X, y, LogisticRegression()), path)
+    with open(path, "r+b") as f:
+        contents = f.read()
+        f.seek(0)
+        f.write(contents.replace(b'"format_version": 1', b'"format_version": 9'))
+    with pytest.raises(ValueError, match="format version 9"):
+        read_artifact(path)
+
+    with pytest.raises(TypeError, match="pipeline must be a Pipeline ending in a LogisticRegression."):
+        save_artifact(LogisticRegression(), path)
+
+
+def test_artifact_extra_arrays(sample_data, tmp_path):
+    """Test that extra arrays and metadata are stored and memory mapped."""
+    X, y = sample_data
+    pipeline = fit_pipeline(X, y, LogisticRegression())
+    path = os.path.join(tmp_path, "model.npmodel")
+    replay = np.arange(12, dtype=np.float64).reshape(6, 2)
+    save_artifact(pipeline, path, extra_arrays={"replay_X": replay}, metadata={"seasons": [20232024]})
+    header, arrays = read_artifact(path)
+
+    assert header["metadata"] == {"seasons": [20232024]}
+    assert arrays["replay_X"].offset % 64 == 0
+    np.testing.assert_array_equal(arrays["replay_X"], replay)
+    np.testing.assert_array_equal(load_predictor(path).predict(X), pipeline.predict(X))
+
+    with pytest.raises(ValueError, match="has the name of a fitted array"):
+        save_artifact(pipeline, path, extra_arrays={"coef": replay})
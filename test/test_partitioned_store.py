@@ -0,0 +1,150 @@
+import pytest
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Import the partitioned store functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.storage import read_table, iter_table, table_columns
+from src.partitioned_store import (PartitionedWriter, write_store, read_store, iter_store, read_index,
+                                   prune_partitions, parse_filter, store_summary, is_store)
+
+
+# Create processed rosters over four seasons and three teams
+@pytest.fixture
+def rosters():
+    rng = np.random.default_rng(123)
+    n = 240
+    return pd.DataFrame({
+        "weight_in_kilograms": rng.integers(60, 110, n).astype("float32"),
+        "height_in_centimeters": rng.integers(165, 200, n).astype("float32"),
+        "shoots_left": rng.random(n) < 0.66,
+        "season": np.repeat([19992000, 20002001, 20012002, 20022003], n // 4).astype("int32"),
+        "team_code": pd.Categorical(rng.choice(["MTL", "TOR", "BOS"], n)),
+        "position_type": pd.Categorical(rng.choice(["forwards", "defensemen", "goalies"], n)),
+    })
+
+
+def expected_rows(df, mask, columns=None):
+    return df[mask][columns or list(df.columns)].reset_index(drop=True)
+
+
+# Test that a store round trips with its dtypes and lists its partitions in the index
+@pytest.mark.parametrize("file_format", ["csv", "parquet", "feather"])
+def test_write_and_read_store(rosters, tmp_path, file_format):
+    path = str(tmp_path / "roster_train")
+    write_store(rosters, path, ["season", "team_code"], file_format)
+
+    assert is_store(path)
+    index = read_index(path)
+    assert index["rows"] == len(rosters)
+    assert len(index["partitions"]) == 12
+    assert sum(partition["rows"] for partition in index["partitions"]) == len(rosters)
+    assert os.path.exists(os.path.join(path, "season=20002001", "team_code=TOR", f"part-00000.{file_format}"))
+
+    df = read_store(path)
+    expected = rosters.sort_values(["season", "team_code"], kind="stable").reset_index(drop=True)
+    pd.testing.assert_frame_equal(df.astype({"team_code": str, "position_type": str}),
+                                  expected.astype({"team_code": str, "position_type": str}))
+    assert isinstance(df["team_code"].dtype, pd.CategoricalDtype)
+
+
+# Test that filters open only the partitions that may match and return only matching rows
+def test_read_store_filters(rosters, tmp_path):
+    path = str(tmp_path / "roster_train")
+    write_store(rosters, path, ["season"])
+    ordered = rosters.sort_values("season", kind="stable").reset_index(drop=True)
+
+    filters = [parse_filter("season>=20012002"), parse_filter("position_type==defensemen")]
+    assert [p["values"]["season"] for p in prune_partitions(read_index(path), filters)] == [20012002, 20022003]
+    df = read_store(path, filters, columns=["weight_in_kilograms", "shoots_left"])
+    mask = (ordered["season"] >= 20012002) & (ordered["position_type"] == "defensemen")
+    pd.testing.assert_frame_equal(df, expected_rows(ordered, mask, ["weight_in_kilograms", "shoots_left"]))
+
+    # Bounds in the index prune partitions on columns that are not partition columns
+    ordered.loc[ordered["season"] == 20002001, "weight_in_kilograms"] = 200.0
+    write_store(ordered, path, ["season"])
+    heavy = prune_partitions(read_index(path), [("weight_in_kilograms", ">", 150)])
+    assert [partition["values"]["season"] for partition in heavy] == [20002001]
+
+    # Filters reach stores through the storage layer
+    assert table_columns(path) == list(rosters.columns)
+    pd.testing.assert_frame_equal(read_table(path, filters=[("team_code", "in", ["MTL"])]),
+                                  read_store(path, [("team_code", "in", ["MTL"])]))
+
+
+# Test that chunked reads of a store cover every matching row
+def test_iter_store(rosters, tmp_path):
+    path = str(tmp_path / "roster_train")
+    write_store(rosters, path, ["season"])
+    filters = [("season", "!=", 19992000)]
+
+    chunks = list(iter_table(path, 50, filters=filters))
+    assert [len(chunk) for chunk in chunks] == [50, 50, 50, 30]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), read_store(path, filters))
+    assert list(iter_store(path, 50, [("season", ">", 20222023)])) == []
+
+
+# Test that streamed CSV writes append to one part file per partition
+def test_partitioned_writer_appends(rosters, tmp_path):
+    path = str(tmp_path / "roster_train")
+    with PartitionedWriter(path, rosters.iloc[:0], ["season"]) as writer:
+        for start in range(0, len(rosters), 25):
+            writer.write(rosters.iloc[start:start + 25])
+
+    summary = store_summary(path)
+    assert summary["files"].tolist() == [1, 1, 1, 1]
+    assert summary["rows"].tolist() == [60, 60, 60, 60]
+    assert len(read_store(path)) == len(rosters)
+
+
+# Test that a failed write leaves the earlier store in place
+def test_partitioned_writer_abort(rosters, tmp_path):
+    path = str(tmp_path / "roster_train")
+    write_store(rosters, path, ["season"])
+    with pytest.raises(RuntimeError):
+        with PartitionedWriter(path, rosters, ["season"]) as writer:
+            writer.write(rosters.iloc[:10])
+            raise RuntimeError("interrupted")
+
+    assert read_index(path)["rows"] == len(rosters)
+    assert os.listdir(tmp_path) == ["roster_train"]
+
+
+# Test the parsing of filters
+def test_parse_filter():
+    assert parse_filter("season>=20002001") == ("season", ">=", 20002001)
+    assert parse_filter(" position_type == defensemen ") == ("position_type", "==", "defensemen")
+    assert parse_filter("weight_in_kilograms<90.5") == ("weight_in_kilograms", "<", 90.5)
+    assert parse_filter("team_code in TOR, MTL") == ("team_code", "in", ["TOR", "MTL"])
+    assert parse_filter("season not in 19992000") == ("season", "not in", [19992000])
+    with pytest.raises(ValueError, match="Cannot parse filter"):
+        parse_filter("season ~ 2000")
+
+
+# Test for invalid stores, partition columns and filters
+def test_store_errors(rosters, tmp_path):
+    with pytest.raises(ValueError, match="is not a partitioned store"):
+        read_store(str(tmp_path))
+    with pytest.raises(ValueError, match="Partition columns must be among"):
+        write_store(rosters, str(tmp_path / "store"), ["position_type"])
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "file.txt").write_text("x")
+    with pytest.raises(FileExistsError, match="is not a store"):
+        write_store(rosters, str(tmp_path / "other"), ["season"])
+
+    path = str(tmp_path / "store")
+    write_store(rosters, path, ["season"])
+    with pytest.raises(ValueError, match="Unsupported filter operator"):
+        read_store(path, [("season", "~", 1)])
+    with pytest.raises(ValueError, match="not in the store"):
+        read_store(path, [("player_id", "==", 1)])
+    with open(os.path.join(path, "_index.json")) as f:
+        index = json.load(f)
+    index["index_version"] = 9
+    with open(os.path.join(path, "_index.json"), "w") as f:
+        json.dump(index, f)
+    with pytest.raises(ValueError, match="index version 9"):
+        read_index(path)
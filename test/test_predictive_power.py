@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Import the predictive power functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.predictive_power import PPS_THRESHOLD, feature_label_pps, stratified_sample
+
+
+# Create data with a noise feature, a weak feature and a leaked label
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    label = rng.random(20_000) < 0.65
+    return pd.DataFrame({
+        "noise": rng.normal(size=len(label)),
+        "weak": rng.normal(size=len(label)) + 0.3 * label,
+        "leak": label + rng.normal(scale=0.01, size=len(label)),
+        "shoots_left": label
+    })
+
+
+# Test that scores separate noise from a leaked label
+def test_feature_label_pps(data):
+    pps = feature_label_pps(data, "shoots_left")
+
+    assert pps.index.tolist() == ["noise", "weak", "leak"]
+    assert pps["noise"] < 0.05
+    assert pps["leak"] >= PPS_THRESHOLD
+    assert ((pps >= 0) & (pps <= 1)).all()
+
+
+# Test sampling and the time budget give scores for every feature
+def test_feature_label_pps_sampled(data):
+    sampled = feature_label_pps(data, "shoots_left", sample_size=2_000)
+    budgeted = feature_label_pps(data, "shoots_left", time_budget=5.0)
+
+    assert sampled["leak"] >= PPS_THRESHOLD
+    assert budgeted["leak"] >= PPS_THRESHOLD
+    assert sampled.equals(feature_label_pps(data, "shoots_left", sample_size=2_000))
+
+
+# Test that the stratified sample keeps the class proportions
+def test_stratified_sample():
+    labels = np.array([0] * 700 + [1] * 300)
+    positions = stratified_sample(labels, 100)
+
+    assert len(positions) == 100
+    assert (labels[positions] == 1).sum() == 30
+    assert (np.diff(positions) > 0).all()
+
+
+# Test for bad inputs
+def test_feature_label_pps_bad_inputs(data):
+    with pytest.raises(TypeError):
+        feature_label_pps(data.to_numpy(), "shoots_left")
+    with pytest.raises(ValueError, match="Label column"):
+        feature_label_pps(data, "shoots_right")
+    with pytest.raises(ValueError, match="Sample size must be a positive integer."):
+        feature_label_pps(data, "shoots_left", sample_size=0)
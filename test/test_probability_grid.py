@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.compose import make_column_transformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import save_artifact
+from src.probability_grid import (ProbabilityGrid, build_probability_grid, grid_error, grid_state,
+                                  load_probability_grid)
+
+
+@pytest.fixture
+def fitted_pipeline():
+    """Fixture to create a pipeline like the one saved by the classifier,
+    fitted on whole-unit measurements with a strong signal."""
+    rng = np.random.default_rng(123)
+    X = pd.DataFrame({
+        "weight_in_kilograms": rng.uniform(55, 125, 2000).round(),
+        "height_in_centimeters": rng.uniform(155, 210, 2000).round(),
+    })
+    y = pd.Series(0.15 * (X["weight_in_kilograms"] - 90) - 0.1 * (X["height_in_centimeters"] - 185)
+                  + rng.logistic(size=2000) > 0, name="shoots_left")
+    preprocessor = make_column_transformer(
+        (StandardScaler(), ["height_in_centimeters", "weight_in_kilograms"])
+    )
+    return make_pipeline(preprocessor, LogisticRegression()).fit(X, y)
+
+
+def test_grid_covers_domain(fitted_pipeline):
+    """Test that the grid spans the validated ranges as compact float32."""
+    grid = build_probability_grid(fitted_pipeline)
+
+    assert grid.feature_names == ["height_in_centimeters", "weight_in_kilograms"]
+    assert grid.table.shape == (56, 71)
+    assert grid.table.dtype == np.float32
+    np.testing.assert_array_equal(grid.lows, [155, 55])
+    np.testing.assert_array_equal(grid.highs, [210, 125])
+
+
+def test_grid_exact_at_grid_points(fitted_pipeline):
+    """Test that whole-unit inputs, which are grid points, are looked up exactly."""
+    grid = build_probability_grid(fitted_pipeline)
+    X = pd.DataFrame({"weight_in_kilograms": [55.0, 80.0, 125.0], "height_in_centimeters": [155.0, 190.0, 210.0]})
+    expected = fitted_pipeline.predict_proba(X)
+
+    for method in ["nearest", "linear"]:
+        np.testing.assert_allclose(grid.predict_proba(X, method), expected, atol=1e-7)
+    np.testing.assert_array_equal(grid.predict(X), fitted_pipeline.predict(X))
+
+
+@pytest.mark.parametrize("resolution", [1.0, 0.25])
+def test_grid_error_bound(fitted_pipeline, resolution):
+    """Test that the error bounds hold anywhere in the domain and shrink with the resolution."""
+    grid = build_probability_grid(fitted_pipeline, resolution)
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"weight_in_kilograms": rng.uniform(55, 125, 5000),
+                      "height_in_centimeters": rng.uniform(155, 210, 5000)})
+    exact = fitted_pipeline.predict_proba(X)[:, 1]
+
+    for method in ["nearest", "linear"]:
+        error = np.abs(grid.predict_proba(X, method)[:, 1] - exact).max()
+        assert error <= grid.error_bound[method]
+        assert grid_error(grid, fitted_pipeline, method) <= grid.error_bound[method]
+    assert grid.error_bound["linear"] < grid.error_bound["nearest"]
+    assert grid.error_bound["linear"] < 1e-3 * resolution ** 2
+
+
+def test_grid_fallback(fitted_pipeline):
+    """Test that rows outside the domain or with missing values use the exact model."""
+    grid = build_probability_grid(fitted_pipeline)
+    X = np.array([[150.0, 80.0], [190.0, 130.0], [190.0, 80.0]])
+    expected = fitted_pipeline.predict_proba(pd.DataFrame(X, columns=grid.feature_names))
+
+    np.testing.assert_allclose(grid.predict_proba(X), expected, atol=1e-6)
+    assert np.isnan(grid.predict_proba([np.nan, 80.0])).all()
+
+    without_fallback = ProbabilityGrid(grid.feature_names, grid.classes, grid.lows, grid.steps, grid.table)
+    with pytest.raises(ValueError, match="outside the grid's domain"):
+        without_fallback.predict_proba(X)
+    with pytest.raises(ValueError, match="Unsupported method"):
+        grid.predict_proba(X, method="cubic")
+
+
+def test_grid_missing_values(fitted_pipeline):
+    """Test that rows with missing values get NaN probabilities without a warning."""
+    grid = build_probability_grid(fitted_pipeline)
+    X = pd.DataFrame({"weight_in_kilograms": [80.0, np.nan, 80.0], "height_in_centimeters": [190.0, 190.0, np.nan]})
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for method in ["nearest", "linear"]:
+            proba = grid.predict_proba(X, method)
+            assert np.isnan(proba[1:]).all()
+            np.testing.assert_allclose(proba[0], fitted_pipeline.predict_proba(X.iloc[:1])[0], atol=1e-7)
+
+
+def test_grid_artifact_round_trip(fitted_pipeline, tmp_path):
+    """Test that a grid stored in a model artifact is served memory mapped."""
+    grid = build_probability_grid(fitted_pipeline, 0.5)
+    path = str(tmp_path / "shooter_model.npmodel")
+    save_artifact(fitted_pipeline, path, **grid_state(grid))
+    loaded = load_probability_grid(path)
+
+    assert isinstance(loaded.table, np.memmap)
+    np.testing.assert_array_equal(loaded.table, grid.table)
+    assert loaded.error_bound == grid.error_bound
+    row = {"weight_in_kilograms": 81.3, "height_in_centimeters": 183.7}
+    np.testing.assert_allclose(loaded.predict_proba(row), grid.predict_proba(row))
+    np.testing.assert_allclose(loaded.predict_proba([200.0, 130.0]), grid.predict_proba([200.0, 130.0]))
+
+    save_artifact(fitted_pipeline, path)
+    with pytest.raises(ValueError, match="no probability grid"):
+        load_probability_grid(path)
+
+
+def test_grid_errors(fitted_pipeline):
+    """Test for correct error handling of bad resolutions and unknown features."""
+    with pytest.raises(ValueError, match="resolution must be positive"):
+        build_probability_grid(fitted_pipeline, 0)
+    with pytest.raises(ValueError, match="two features with a range"):
+        build_probability_grid(fitted_pipeline, ranges={"weight_in_kilograms": (55, 125)})
@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Import the read plan functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.clean_rosters import COLUMN_NAMES, clean_rosters
+from src.read_plan import RAW_READ_PLAN, read_plan, memory_report, report_memory, plan_frame
+from src.storage import read_table
+from src.synthetic_rosters import synthetic_rosters
+
+
+# Create a raw roster file
+@pytest.fixture
+def raw_csv(tmp_path):
+    path = tmp_path / "nhl_rosters.csv"
+    synthetic_rosters(2000).to_csv(path, index=False)
+    return str(path)
+
+
+# Test that a raw file read with the plan keeps the planned columns and dtypes
+def test_read_plan_raw(raw_csv):
+    plan = read_plan("preprocess")
+    rosters = read_table(raw_csv, columns=list(plan), dtypes=plan)
+    untyped = pd.read_csv(raw_csv)
+
+    assert list(rosters.columns) == list(RAW_READ_PLAN)
+    assert rosters["shoots_catches"].dtype == "category"
+    assert rosters["weight_in_kilograms"].dtype == np.float32
+    assert rosters["player_id"].dtype == np.int32
+    # The planned columns identify the same duplicate rows as all columns
+    assert rosters.duplicated().sum() == untyped.duplicated().sum()
+
+
+# Test that the categorical target of the raw read plan is cleaned to a bool column
+def test_read_plan_clean_rosters(raw_csv):
+    plan = read_plan("preprocess")
+    rosters = read_table(raw_csv, columns=list(plan), dtypes=plan)
+    assert isinstance(rosters["shoots_catches"].dtype, pd.CategoricalDtype)
+
+    cleaned = clean_rosters(rosters.drop_duplicates())
+    expected = rosters.drop_duplicates().dropna(subset=["weight_in_kilograms", "height_in_centimeters",
+                                                         "shoots_catches"])["shoots_catches"] == "L"
+    assert cleaned["shoots_left"].dtype == bool
+    assert cleaned["shoots_left"].tolist() == expected.tolist()
+
+
+# Test that planned columns missing from a table are dropped from the plan
+def test_read_plan_optional_columns(tmp_path):
+    path = tmp_path / "roster_train.csv"
+    pd.DataFrame({"weight_in_kilograms": [80.0], "height_in_centimeters": [180.0], "shoots_left": [True]}).to_csv(path, index=False)
+
+    assert "sample_weight" in read_plan("classify")
+    assert list(read_plan("classify", str(path))) == ["weight_in_kilograms", "height_in_centimeters", "shoots_left"]
+    with pytest.raises(ValueError, match="No read plan for stage"):
+        read_plan("report")
+
+
+# Test that the memory report covers every column and shows the saving
+def test_memory_report(raw_csv, tmp_path):
+    plan = read_plan("preprocess")
+    rosters = read_table(raw_csv, columns=list(plan), dtypes=plan)
+    report = memory_report(rosters, raw_csv, sample_rows=500)
+
+    assert list(report.index) == [*COLUMN_NAMES, "total"]
+    assert report.loc["headshot", "planned_mb"] == 0
+    assert report.loc["team_code", "planned_dtype"] == "category"
+    assert report.loc["total", "default_mb"] > 5 * report.loc["total", "planned_mb"]
+
+    report_memory(rosters, raw_csv, "preprocess", str(tmp_path / "reports"))
+    assert os.path.isfile(tmp_path / "reports" / "preprocess_memory.csv")
+
+
+# Test that a frame handed over in memory matches reading it from a table
+def test_plan_frame(tmp_path):
+    df = pd.DataFrame({
+        "weight_in_kilograms": np.array([80.5, 90.25, 70.0], dtype="float64"),
+        "height_in_centimeters": np.array([180.0, 190.5, 175.0], dtype="float64"),
+        "shoots_left": [True, False, True],
+        "season": [20002001, 20012002, 20022003]
+    }, index=[7, 3, 5])
+    path = tmp_path / "roster_train.csv"
+    df.to_csv(path, index=False)
+    plan = read_plan("eda")
+    filters = [("season", ">=", 20012002)]
+
+    framed = plan_frame(df, plan, filters)
+    pd.testing.assert_frame_equal(framed, read_table(str(path), columns=list(plan), dtypes=plan, filters=filters))
+    assert list(framed.dtypes.astype(str)) == ["float32", "float32", "bool"]
+    # The original is left as it was
+    assert df["weight_in_kilograms"].dtype == "float64" and list(df.index) == [7, 3, 5]
@@ -0,0 +1,64 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Import the running statistics classes from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.running_stats import RunningStats, QuantileSketch
+
+
+# Create test dataframe with missing values
+@pytest.fixture
+def test_df():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "weight_in_kilograms": rng.normal(88, 8, 1000).round(),
+        "height_in_centimeters": rng.normal(184, 6, 1000).round(),
+        "shoots_left": rng.random(1000) < 0.6
+    })
+    df.loc[[3, 50, 700], "weight_in_kilograms"] = np.nan
+    return df
+
+
+# Test that chunked statistics match pandas
+def test_running_stats_chunks(test_df):
+    stats = RunningStats()
+    for start in range(0, len(test_df), 128):
+        stats.update(test_df.iloc[start:start + 128])
+
+    pd.testing.assert_frame_equal(stats.describe(), test_df.describe())
+    pd.testing.assert_frame_equal(stats.head(), test_df.head())
+    assert stats.info()["nulls"].tolist() == [3, 0, 0]
+    assert stats.info()["non-nulls"].tolist() == [997, 1000, 1000]
+
+
+# Test that partial statistics merge to the same result
+def test_running_stats_merge(test_df):
+    left = RunningStats().update(test_df.iloc[:400])
+    right = RunningStats().update(test_df.iloc[400:])
+
+    merged = left.merge(right)
+
+    pd.testing.assert_frame_equal(merged.describe(), test_df.describe())
+    assert merged.rows == len(test_df)
+
+
+# Test that the quantile sketch stays small and accurate once it compacts
+def test_quantile_sketch_approximation():
+    values = np.random.default_rng(1).random(200_000)
+    sketch = QuantileSketch(k=200, exact_limit=1000)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    assert sketch.n == len(values)
+    assert sum(len(level) for level in sketch.levels) < 1000
+    estimates = sketch.quantile([0.1, 0.5, 0.9])
+    np.testing.assert_allclose(estimates, np.quantile(values, [0.1, 0.5, 0.9]), atol=0.02)
+
+
+# Test for edgecase, no columns seen
+def test_running_stats_no_columns():
+    with pytest.raises(ValueError, match="Cannot describe a DataFrame without columns"):
+        RunningStats().update(pd.DataFrame()).describe()
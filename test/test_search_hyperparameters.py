@@ -0,0 +1,70 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.search_hyperparameters import search_hyperparameters
+
+
+@pytest.fixture
+def sample_data():
+    """Fixture to create sample training and test datasets."""
+    rng = np.random.default_rng(123)
+    X = pd.DataFrame({
+        "feature1": rng.normal(0, 1, 300),
+        "feature2": rng.normal(0, 1, 300),
+    })
+    y = pd.Series(X["feature1"] + rng.normal(0, 1, 300) > 0, name="shoots_left")
+    return X.iloc[:200], y.iloc[:200], X.iloc[200:], y.iloc[200:]
+
+
+@pytest.fixture
+def param_grid():
+    """Fixture with a grid that includes an invalid penalty/solver pair."""
+    return {
+        "C": [0.01, 1.0, 100.0],
+        "penalty": ["l1", "l2"],
+        "solver": ["lbfgs", "liblinear"],
+        "class_weight": ["balanced", None],
+    }
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_search_hyperparameters(sample_data, param_grid, n_jobs):
+    """Test the grid search in process and across a process pool."""
+    X_train, y_train, X_test, y_test = sample_data
+
+    pipeline, accuracy, results = search_hyperparameters(
+        X_train, y_train, X_test, y_test, make_pipeline(StandardScaler()),
+        param_grid, cv=3, n_jobs=n_jobs
+    )
+
+    assert isinstance(pipeline, Pipeline)
+    assert 0 <= accuracy <= 1
+    assert len(results) == 24
+    assert results.loc[0, "rank_test_score"] == 1
+    # lbfgs does not support the l1 penalty
+    invalid = (results["param_penalty"] == "l1") & (results["param_solver"] == "lbfgs")
+    assert results.loc[invalid, "mean_test_score"].isna().all()
+    assert results.loc[~invalid, "mean_test_score"].between(0, 1).all()
+    assert pipeline[-1].C == results.loc[0, "param_C"]
+
+
+def test_search_hyperparameters_parallel_matches_serial(sample_data, param_grid):
+    """Test that the worker processes see the same shared training data."""
+    X_train, y_train, X_test, y_test = sample_data
+    preprocessor = make_pipeline(StandardScaler())
+
+    _, _, serial = search_hyperparameters(X_train, y_train, X_test, y_test, preprocessor, param_grid, cv=3, n_jobs=1)
+    _, _, parallel = search_hyperparameters(X_train, y_train, X_test, y_test, preprocessor, param_grid, cv=3, n_jobs=2)
+
+    pd.testing.assert_series_equal(serial["mean_test_score"], parallel["mean_test_score"])
+
+
+def test_search_hyperparameters_invalid_input_type(param_grid):
+    """Test search_hyperparameters with invalid input types."""
+    with pytest.raises(TypeError, match="X_train must be a pandas DataFrame."):
+        search_hyperparameters("invalid", "invalid", "invalid", "invalid", make_pipeline(StandardScaler()), param_grid)
@@ -0,0 +1,50 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Import the hash_split function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.split_rosters import hash_split
+
+
+# Test that the test fraction is close to the requested size
+def test_hash_split_fraction():
+    is_test = hash_split(np.arange(100_000), test_size=0.3)
+
+    assert is_test.dtype == bool
+    assert abs(is_test.mean() - 0.3) < 0.01
+
+
+# Test that every row of a player lands in the same split
+def test_hash_split_groups():
+    keys = np.repeat(np.arange(500), 4)
+    is_test = hash_split(keys).reshape(-1, 4)
+
+    assert (is_test.all(axis=1) | ~is_test.any(axis=1)).all()
+
+
+# Test that splitting chunk by chunk or after appending data gives the same assignment
+def test_hash_split_incremental():
+    keys = np.arange(1000)
+    whole = hash_split(keys)
+    chunks = np.concatenate([hash_split(chunk) for chunk in np.array_split(keys, 7)])
+    appended = hash_split(np.arange(2000))[:1000]
+
+    assert (whole == chunks).all()
+    assert (whole == appended).all()
+
+
+# Test string keys and that the salt changes the split
+def test_hash_split_keys_and_salt():
+    keys = pd.Series([f"player-{i}" for i in range(1000)])
+
+    assert (hash_split(keys) == hash_split(keys.to_numpy())).all()
+    assert (hash_split(keys, random_state=1) != hash_split(keys, random_state=2)).any()
+
+
+# Test for a bad test size
+def test_hash_split_bad_test_size():
+    with pytest.raises(ValueError, match="Test size must be between 0 and 1."):
+        hash_split(np.arange(10), test_size=1.5)
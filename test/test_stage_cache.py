@@ -0,0 +1,137 @@
+import pytest
+import sys
+import os
+
+# Import the stage runner from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.stage_cache import PYTHON, Stage, StageCache, order_stages, run_stages, run_stages_in_process
+
+
+# Create two chained stages that count how often they run
+@pytest.fixture
+def stages(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("roster")
+    middle = tmp_path / "middle.txt"
+    final = tmp_path / "final.txt"
+    runs = tmp_path / "runs.txt"
+
+    def copy_command(src, dst):
+        return [sys.executable, "-c",
+                f"open({str(runs)!r}, 'a').write({dst.name!r} + '\\n');"
+                f"open({str(dst)!r}, 'w').write(open({str(src)!r}).read().upper())"]
+
+    return [
+        Stage("final", [copy_command(middle, final)], inputs=[str(middle)], outputs=[str(final)]),
+        Stage("middle", [copy_command(source, middle)], inputs=[str(source)], outputs=[str(middle)]),
+    ]
+
+
+def runs(tmp_path):
+    return (tmp_path / "runs.txt").read_text().split()
+
+
+# Test that a rerun with no changes skips every stage
+def test_run_stages_cached(stages, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = run_stages(stages, cache_dir)
+    second = run_stages(stages, cache_dir)
+
+    assert list(first) == ["middle", "final"]
+    assert first == {"middle": "ran", "final": "ran"}
+    assert second == {"middle": "cached", "final": "cached"}
+    assert (tmp_path / "final.txt").read_text() == "ROSTER"
+
+
+# Test that touching an input does not invalidate the stage but editing it does
+def test_run_stages_input_change(stages, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    run_stages(stages, cache_dir)
+    source = tmp_path / "source.txt"
+
+    os.utime(source, ns=(0, 0))
+    assert run_stages(stages, cache_dir) == {"middle": "cached", "final": "cached"}
+
+    source.write_text("goalie")
+    assert run_stages(stages, cache_dir) == {"middle": "ran", "final": "ran"}
+    assert (tmp_path / "final.txt").read_text() == "GOALIE"
+
+    # Going back to earlier contents is served from the cache
+    source.write_text("roster")
+    assert run_stages(stages, cache_dir) == {"middle": "restored", "final": "restored"}
+    assert runs(tmp_path) == ["middle.txt", "final.txt", "middle.txt", "final.txt"]
+
+
+# Test that deleted outputs are restored without running the stage
+def test_run_stages_restore(stages, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    run_stages(stages, cache_dir)
+    os.remove(tmp_path / "final.txt")
+
+    assert run_stages(stages, cache_dir, targets=["final"]) == {"middle": "cached", "final": "restored"}
+    assert (tmp_path / "final.txt").read_text() == "ROSTER"
+    assert runs(tmp_path) == ["middle.txt", "final.txt"]
+
+
+
+# Test that a stage marked always_run runs while its unchanged output keeps later stages cached
+def test_run_stages_always_run(stages, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    stages[1].always_run = True
+    run_stages(stages, cache_dir)
+
+    assert run_stages(stages, cache_dir) == {"middle": "ran", "final": "cached"}
+    assert run_stages_in_process(stages, {}, cache_dir) == {"middle": "ran", "final": "cached"}
+    assert runs(tmp_path) == ["middle.txt", "final.txt", "middle.txt", "middle.txt"]
+
+
+# Test that Python commands run with the current interpreter, whose path is not fingerprinted
+def test_run_stages_python_token(tmp_path, monkeypatch):
+    output = tmp_path / "version.txt"
+    stage = Stage("version", [[PYTHON, "-c", f"open({str(output)!r}, 'w').write('ok')"]], inputs=[],
+                  outputs=[str(output)])
+    cache_dir = str(tmp_path / "cache")
+    fingerprint = StageCache(cache_dir).fingerprint(stage)
+
+    assert run_stages([stage], cache_dir) == {"version": "ran"}
+    assert output.read_text() == "ok"
+    monkeypatch.setattr(sys, "executable", "/other/env/bin/python")
+    assert StageCache(cache_dir).fingerprint(stage) == fingerprint
+    assert run_stages([stage], cache_dir) == {"version": "cached"}
+
+
+# Test for correct error handling for an output written by two stages
+def test_order_stages_duplicate_output(stages):
+    duplicate = Stage("other", [], inputs=[], outputs=stages[0].outputs)
+    with pytest.raises(ValueError, match="is an output of both"):
+        order_stages(stages + [duplicate])
+
+
+# Test for correct error handling for a missing input
+def test_fingerprint_missing_input(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    with pytest.raises(FileNotFoundError, match="does not exist"):
+        cache.fingerprint(Stage("missing", [], inputs=[str(tmp_path / "nope.csv")], outputs=[]))
+
+
+def upper_file(src, dst, **inputs):
+    with open(dst, "w") as f:
+        f.write(open(src).read().upper())
+    return sorted(inputs)
+
+
+# Test that stages run as functions get the results of the stages they require and are cached
+def test_run_stages_in_process(stages, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    middle = tmp_path / "middle.txt"
+    functions = {"middle": (upper_file, {"src": str(tmp_path / "source.txt"), "dst": str(middle)})}
+
+    assert run_stages_in_process(stages, functions, cache_dir) == {"middle": "ran", "final": "ran"}
+    assert (tmp_path / "final.txt").read_text() == "ROSTER"
+    # Only the final stage ran its command
+    assert runs(tmp_path) == ["final.txt"]
+
+    # The cache is shared with run_stages, since the fingerprints are the same
+    assert run_stages(stages, cache_dir) == {"middle": "cached", "final": "cached"}
+    os.remove(tmp_path / "final.txt")
+    assert run_stages_in_process(stages, functions, cache_dir) == {"middle": "cached", "final": "restored"}
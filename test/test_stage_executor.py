@@ -0,0 +1,122 @@
+import pytest
+import sys
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# Import the stage executor from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.stage_executor import SharedFrame, Task, order_tasks, run_tasks
+
+
+def make_frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "weight_in_kilograms": rng.uniform(55, 125, rows).astype("float32"),
+        "shoots_left": rng.random(rows) < 0.6,
+        "position_type": pd.Categorical(rng.choice(["forwards", "defensemen"], rows)),
+        "team_code": ["TOR"] * rows
+    }, index=np.arange(rows)[::-1])
+
+
+def preprocess(rows):
+    return {"train": make_frame(rows), "rows": rows}
+
+
+def summarize(preprocess):
+    train = preprocess["train"]
+    return {
+        "pid": os.getpid(),
+        "rows": preprocess["rows"],
+        "mean": float(train["weight_in_kilograms"].mean()),
+        "writeable": train["weight_in_kilograms"].to_numpy().flags.writeable
+    }
+
+
+def wait_for_both(barrier, preprocess):
+    # Only returns if the other task is running at the same time
+    barrier.wait(timeout=10)
+    return len(preprocess["train"])
+
+
+def fail(preprocess):
+    raise RuntimeError("stage failed")
+
+
+# Test that tasks come after the tasks they require and only targets are kept
+def test_order_tasks():
+    tasks = [Task("classify", len, requires=["preprocess"]), Task("eda", len, requires=["preprocess"]),
+             Task("preprocess", len, requires=["download"]), Task("download", len)]
+    assert [task.name for task in order_tasks(tasks)] == ["download", "preprocess", "classify", "eda"]
+    assert [task.name for task in order_tasks(tasks, ["eda"])] == ["download", "preprocess", "eda"]
+
+
+# Test that unknown, duplicate and cyclic tasks are rejected
+def test_order_tasks_errors():
+    with pytest.raises(ValueError, match="Unknown"):
+        order_tasks([Task("eda", len, requires=["preprocess"])])
+    with pytest.raises(ValueError, match="Two tasks"):
+        order_tasks([Task("eda", len), Task("eda", len)])
+    with pytest.raises(ValueError, match="cycle"):
+        order_tasks([Task("a", len, requires=["b"]), Task("b", len, requires=["a"])])
+
+
+# Test that a frame rebuilt from shared memory equals the original and is backed by the block
+def test_shared_frame_round_trip():
+    df = make_frame(100)
+    handle = SharedFrame(df)
+    try:
+        shared = handle.to_frame()
+        pd.testing.assert_frame_equal(shared, df)
+        assert not shared["weight_in_kilograms"].to_numpy().flags.writeable
+        del shared
+    finally:
+        from src.stage_executor import _ATTACHED
+        while _ATTACHED:
+            _ATTACHED.pop().close()
+        handle.release()
+
+
+# Test that results are handed over in memory and independent tasks run concurrently
+def test_run_tasks_threads():
+    barrier = threading.Barrier(2)
+    tasks = [Task("preprocess", preprocess, args=(50,)),
+             Task("eda", wait_for_both, requires=["preprocess"], args=(barrier,)),
+             Task("classify", wait_for_both, requires=["preprocess"], args=(barrier,))]
+    results = run_tasks(tasks, n_jobs=2)
+    assert results["eda"] == results["classify"] == 50
+
+
+# Test that process workers get the frames through shared memory, read-only
+def test_run_tasks_processes():
+    tasks = [Task("preprocess", preprocess, args=(200,)), Task("summary", summarize, requires=["preprocess"])]
+    results = run_tasks(tasks, n_jobs=2, backend="process")
+    summary = results["summary"]
+    assert summary["pid"] != os.getpid()
+    assert summary["rows"] == 200
+    assert summary["mean"] == pytest.approx(float(make_frame(200)["weight_in_kilograms"].mean()))
+    assert not summary["writeable"]
+
+
+# Test that skipped tasks are not run and still let the tasks requiring them start
+def test_run_tasks_skip():
+    completed = []
+    tasks = [Task("preprocess", preprocess, args=(10,)), Task("eda", lambda preprocess: preprocess is None,
+                                                               requires=["preprocess"])]
+    results = run_tasks(tasks, skip=lambda name: name == "preprocess",
+                        on_complete=lambda name, result: completed.append(name))
+    assert results == {"preprocess": None, "eda": True}
+    assert completed == ["eda"]
+
+
+# Test that a failing task stops the run and cancels the tasks after it
+def test_run_tasks_error():
+    started = []
+    tasks = [Task("preprocess", preprocess, args=(10,)), Task("eda", fail, requires=["preprocess"]),
+             Task("report", lambda eda: started.append("report"), requires=["eda"])]
+    with pytest.raises(RuntimeError, match="stage failed"):
+        run_tasks(tasks)
+    assert started == []
+    with pytest.raises(ValueError, match="backend"):
+        run_tasks(tasks, backend="cluster")
@@ -0,0 +1,100 @@
+import pytest
+import sys
+import os
+import pandas as pd
+
+# Import the storage functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.storage import write_table, read_table, iter_table, table_format, TableWriter
+
+
+# Create test dataframe
+@pytest.fixture
+def test_df():
+    return pd.DataFrame({
+        "weight_in_kilograms": [70.0, 80.0, 60.0, 90.5, 85.0],
+        "height_in_centimeters": [180.0, 185.0, 190.0, 178.0, 201.0],
+        "shoots_left": [False, True, False, True, True],
+    })
+
+
+# Test that each format round trips with its column types
+@pytest.mark.parametrize("file_name", ["test_df.csv", "test_df.parquet", "test_df.feather"])
+def test_write_and_read_table(test_df, tmp_path, file_name):
+    write_table(test_df, tmp_path, file_name)
+
+    calculated_df = read_table(os.path.join(tmp_path, file_name))
+
+    pd.testing.assert_frame_equal(calculated_df, test_df)
+
+
+
+# Test that numeric Feather columns are read as views of the memory map, not copies
+def test_read_table_feather_zero_copy(test_df, tmp_path):
+    write_table(test_df, tmp_path, "test_df.feather")
+
+    df = read_table(os.path.join(tmp_path, "test_df.feather"))
+
+    assert not df["weight_in_kilograms"].to_numpy().flags.writeable
+    assert not df["height_in_centimeters"].to_numpy().flags.writeable
+
+# Test that filters keep the matching rows of a flat table, read or chunked
+def test_read_table_filters(test_df, tmp_path):
+    write_table(test_df, tmp_path, "test_df.csv")
+    path = os.path.join(tmp_path, "test_df.csv")
+    filters = [("weight_in_kilograms", ">=", 80.0), ("shoots_left", "==", True)]
+
+    expected = test_df[(test_df["weight_in_kilograms"] >= 80) & test_df["shoots_left"]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(read_table(path, filters=filters), expected)
+    pd.testing.assert_frame_equal(read_table(path, columns=["height_in_centimeters"], filters=filters),
+                                  expected[["height_in_centimeters"]])
+    chunks = list(iter_table(path, chunksize=2, filters=filters))
+    assert all(len(chunk) for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+
+# Test that chunked reads cover the whole table
+@pytest.mark.parametrize("file_name", ["test_df.csv", "test_df.parquet", "test_df.feather"])
+def test_iter_table(test_df, tmp_path, file_name):
+    write_table(test_df, tmp_path, file_name)
+
+    chunks = list(iter_table(os.path.join(tmp_path, file_name), chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), test_df)
+
+
+# Test that appended chunks are read back as one table, even with no chunks
+@pytest.mark.parametrize("file_name", ["test_df.csv", "test_df.csv.gz", "test_df.parquet", "test_df.feather"])
+def test_table_writer(test_df, tmp_path, file_name):
+    path = os.path.join(tmp_path, file_name)
+    with TableWriter(path, test_df) as writer:
+        writer.write(test_df.iloc[:3])
+        writer.write(test_df.iloc[3:])
+
+    assert writer.rows == 5
+    pd.testing.assert_frame_equal(read_table(path), test_df)
+
+    with TableWriter(path, test_df):
+        pass
+    assert list(read_table(path).columns) == list(test_df.columns)
+
+
+# Test that compressed CSV files are recognized as CSV
+def test_table_format_compressed_csv():
+    assert table_format("test.csv.gz") == "csv"
+    assert table_format("test.CSV.XZ") == "csv"
+    with pytest.raises(ValueError, match="Unsupported table format"):
+        table_format("test.parquet.gz")
+
+
+# Test for correct error handling for an unsupported extension
+def test_table_format_bad_extension():
+    with pytest.raises(ValueError, match="Unsupported table format"):
+        table_format("test.ipynb")
+
+
+# Test for correct error handling for an empty DataFrame
+def test_write_table_empty_dataframe(tmp_path):
+    with pytest.raises(ValueError, match="Dataframe must have records."):
+        write_table(pd.DataFrame(), tmp_path, "test_df.parquet")
@@ -0,0 +1,135 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Import the stream_rosters function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.clean_rosters import COLUMN_NAMES
+from src.stream_rosters import stream_rosters, RowHashSet
+
+
+# Create raw roster file with duplicated and invalid rows
+@pytest.fixture
+def raw_csv(tmp_path):
+    rows = []
+    for i in range(20):
+        row = {column: "x" for column in COLUMN_NAMES}
+        row.update({
+            "season": 20232024,
+            "player_id": i,
+            "sweater_number": 10.0,
+            "shoots_catches": "L" if i % 3 else "R",
+            "height_in_inches": 72.0,
+            "weight_in_pounds": 190.0,
+            "height_in_centimeters": 170.0 + i,
+            "weight_in_kilograms": 80.0 + i
+        })
+        rows.append(row)
+    raw = pd.DataFrame(rows, columns=COLUMN_NAMES)
+    # Duplicates spread over later chunks, a missing value and an out of range weight
+    raw = pd.concat([raw, raw.iloc[[0, 5, 19]]], ignore_index=True)
+    raw.loc[3, "weight_in_kilograms"] = np.nan
+    raw.loc[4, "weight_in_kilograms"] = 300.0
+    path = tmp_path / "nhl_rosters.csv"
+    raw.to_csv(path, index=False)
+    return str(path)
+
+
+# Test that rows are deduplicated across chunks, cleaned and split
+def test_stream_rosters(raw_csv, tmp_path):
+    counts = stream_rosters(raw_csv, str(tmp_path), chunksize=4)
+
+    train = pd.read_csv(tmp_path / "roster_train.csv")
+    test = pd.read_csv(tmp_path / "roster_test.csv")
+
+    assert counts["raw"] == 23
+    assert counts["deduplicated"] == 20
+    assert counts["rejected"] == 1
+    assert len(train) + len(test) == 18
+    assert len(pd.read_csv(tmp_path / "roster_quarantine.csv")) == 1
+    assert list(train.columns) == ["weight_in_kilograms", "height_in_centimeters", "shoots_left"]
+    assert not pd.concat([train, test]).duplicated().any()
+    assert pd.concat([train, test])["weight_in_kilograms"].between(55, 125).all()
+
+
+# Test that the output does not depend on the chunk size used for deduplication
+def test_stream_rosters_chunksize(raw_csv, tmp_path):
+    small = tmp_path / "small"
+    large = tmp_path / "large"
+    small.mkdir()
+    large.mkdir()
+    small_counts = stream_rosters(raw_csv, str(small), chunksize=3)
+    large_counts = stream_rosters(raw_csv, str(large), chunksize=100)
+
+    assert small_counts["deduplicated"] == large_counts["deduplicated"]
+    assert small_counts["train"] + small_counts["test"] == large_counts["train"] + large_counts["test"]
+
+
+# Test that the player split keeps the same rows in each split for any chunk size
+def test_stream_rosters_player_split(raw_csv, tmp_path):
+    small = tmp_path / "small"
+    large = tmp_path / "large"
+    small.mkdir()
+    large.mkdir()
+    stream_rosters(raw_csv, str(small), chunksize=3, split="player")
+    stream_rosters(raw_csv, str(large), chunksize=100, split="player")
+
+    for name in ["roster_train.csv", "roster_test.csv"]:
+        pd.testing.assert_frame_equal(pd.read_csv(small / name), pd.read_csv(large / name))
+    assert list(pd.read_csv(small / "roster_train.csv").columns) == ["weight_in_kilograms", "height_in_centimeters", "shoots_left"]
+
+
+# Test that the season is kept in the splits when asked for
+def test_stream_rosters_keep_season(raw_csv, tmp_path):
+    stream_rosters(raw_csv, str(tmp_path), chunksize=4, split="player", keep_season=True)
+
+    train = pd.read_csv(tmp_path / "roster_train.csv")
+    assert list(train.columns) == ["weight_in_kilograms", "height_in_centimeters", "shoots_left", "season"]
+    assert (train["season"] == 20232024).all()
+    assert "season" not in pd.read_csv(tmp_path / "roster_quarantine.csv")
+
+
+# Test that the splits are written as partitioned stores with the season, team and position
+def test_stream_rosters_partition_by(raw_csv, tmp_path):
+    from src.partitioned_store import read_index, read_store
+    stream_rosters(raw_csv, str(tmp_path), chunksize=4, partition_by=["season"])
+
+    index = read_index(str(tmp_path / "roster_train"))
+    assert [partition["values"] for partition in index["partitions"]] == [{"season": 20232024}]
+    assert index["partitions"][0]["files"] == ["part-00000.csv"]
+    train = read_store(str(tmp_path / "roster_train"))
+    test = read_store(str(tmp_path / "roster_test"))
+    assert list(train.columns) == ["weight_in_kilograms", "height_in_centimeters", "shoots_left",
+                                   "season", "team_code", "position_type"]
+    assert len(train) + len(test) == 18
+
+
+# Test for an unsupported split
+def test_stream_rosters_bad_split(raw_csv, tmp_path):
+    with pytest.raises(ValueError, match="Unsupported split"):
+        stream_rosters(raw_csv, str(tmp_path), chunksize=4, split="season")
+
+
+# Test the row hash set across batches
+def test_row_hash_set():
+    seen = RowHashSet()
+    first = seen.add(np.array([5, 3, 5], dtype=np.uint64))
+    second = seen.add(np.array([3, 7], dtype=np.uint64))
+
+    assert first.tolist() == [True, True, False]
+    assert second.tolist() == [False, True]
+    assert len(seen) == 3
+
+
+# Test for bad chunk size
+def test_stream_rosters_bad_chunksize(raw_csv, tmp_path):
+    with pytest.raises(ValueError, match="Chunk size must be a positive integer."):
+        stream_rosters(raw_csv, str(tmp_path), chunksize=0)
+
+
+# Test for missing directory
+def test_stream_rosters_nonexistent_directory(raw_csv):
+    with pytest.raises(FileNotFoundError, match="Directory does not exist."):
+        stream_rosters(raw_csv, "/this_does_not_exist", chunksize=4)
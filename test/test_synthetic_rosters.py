@@ -0,0 +1,72 @@
+import pytest
+import sys
+import os
+import pandas as pd
+
+# Import the synthetic_rosters function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.synthetic_rosters import synthetic_rosters, write_synthetic_rosters
+from src.clean_rosters import COLUMN_NAMES, clean_rosters, roster_schema
+from src.validate_rosters import RosterValidator
+
+
+# Test that the generated rows have the raw columns and pass cleaning and validation
+def test_synthetic_rosters_shape():
+    rosters = synthetic_rosters(5000)
+
+    assert list(rosters.columns) == COLUMN_NAMES
+    assert len(rosters) == 5000
+    assert rosters.duplicated().sum() >= 50
+    assert rosters["weight_in_kilograms"].isna().any()
+    cleaned = clean_rosters(rosters.drop_duplicates())
+    roster_schema.validate(cleaned)
+    assert 0.55 < cleaned["shoots_left"].mean() < 0.7
+
+
+# Test that a player keeps their handedness and measurements across seasons
+def test_synthetic_rosters_players():
+    rosters = synthetic_rosters(5000, missing_fraction=0)
+
+    per_player = rosters.groupby("player_id")[["shoots_catches", "height_in_centimeters"]].nunique()
+    assert (per_player == 1).all().all()
+    assert rosters["player_id"].duplicated().any()
+
+
+# Test that the same seed gives the same rows and that bad arguments are rejected
+def test_synthetic_rosters_seed_and_errors():
+    pd.testing.assert_frame_equal(synthetic_rosters(100), synthetic_rosters(100))
+    assert synthetic_rosters(0).empty
+    with pytest.raises(ValueError):
+        synthetic_rosters(-1)
+    with pytest.raises(ValueError):
+        synthetic_rosters(100, duplicate_fraction=1)
+
+
+# Test that invalid rows are generated and rejected by the validator
+def test_synthetic_rosters_invalid_rows():
+    rosters = synthetic_rosters(5000, invalid_fraction=0.05, missing_fraction=0)
+    validator = RosterValidator(roster_schema)
+    validated = validator.validate(clean_rosters(rosters.drop_duplicates()))
+
+    assert 0.03 < validator.rows_rejected / validator.rows_checked < 0.07
+    assert len(validated) == validator.rows_checked - validator.rows_rejected
+
+
+# Test that sharded output is the same for any number of workers and shards share no players
+def test_write_synthetic_rosters(tmp_path):
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    serial.mkdir()
+    parallel.mkdir()
+    serial_paths = write_synthetic_rosters(2500, str(serial), shard_rows=1000, n_jobs=1)
+    parallel_paths = write_synthetic_rosters(2500, str(parallel), shard_rows=1000, n_jobs=2)
+
+    assert [os.path.basename(path) for path in serial_paths] == [
+        "nhl_rosters-00000.csv", "nhl_rosters-00001.csv", "nhl_rosters-00002.csv"
+    ]
+    shards = [pd.read_csv(path) for path in serial_paths]
+    assert [len(shard) for shard in shards] == [1000, 1000, 500]
+    for serial_path, parallel_path in zip(serial_paths, parallel_paths):
+        pd.testing.assert_frame_equal(pd.read_csv(serial_path), pd.read_csv(parallel_path))
+    assert not set(shards[0]["player_id"]) & set(shards[1]["player_id"])
+    with pytest.raises(FileNotFoundError):
+        write_synthetic_rosters(10, str(tmp_path / "missing"))
@@ -0,0 +1,70 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pandera as pa
+
+# Import the validation engine from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.clean_rosters import roster_schema, QUARANTINE_DTYPES
+from src.storage import TableWriter, read_table
+from src.validate_rosters import RosterValidator
+
+
+# Create test dataframe with one row failing each kind of check
+@pytest.fixture
+def test_df():
+    return pd.DataFrame({
+        "weight_in_kilograms": [70.0, 200.0, np.nan, 80.0, 90.0],
+        "height_in_centimeters": [180.0, 185.0, 190.0, 100.0, 195.0],
+        "shoots_left": [True, False, True, True, False],
+    })
+
+
+# Test that invalid rows are dropped and counted per check
+def test_validate(test_df):
+    validator = RosterValidator(roster_schema)
+
+    valid = validator.validate(test_df)
+
+    pd.testing.assert_frame_equal(valid, test_df.iloc[[0, 4]])
+    summary = validator.summary().set_index(["column", "check"])["failures"]
+    assert summary[("weight_in_kilograms", "in_range")] == 1
+    assert summary[("weight_in_kilograms", "not_null")] == 1
+    assert summary[("height_in_centimeters", "in_range")] == 1
+    assert validator.rows_rejected == 3
+
+
+# Test that the engine agrees with pandera on which rows fail
+def test_validate_matches_pandera(test_df):
+    valid = RosterValidator(roster_schema).validate(test_df)
+
+    with pytest.raises(pa.errors.SchemaErrors) as e:
+        roster_schema.validate(test_df, lazy=True)
+    invalid_indices = e.value.failure_cases["index"].dropna().unique()
+
+    assert set(valid.index) == set(test_df.index) - set(invalid_indices)
+
+
+# Test that rejected rows are streamed to the quarantine file in chunks
+def test_validate_quarantine(test_df, tmp_path):
+    path = os.path.join(tmp_path, "quarantine.csv")
+    template = pd.DataFrame(columns=list(QUARANTINE_DTYPES)).astype(QUARANTINE_DTYPES)
+    with TableWriter(path, template) as writer:
+        validator = RosterValidator(roster_schema, quarantine=writer, chunksize=2)
+        validator.validate(test_df)
+
+    quarantine = read_table(path)
+    assert len(quarantine) == 3
+    assert quarantine["failed_checks"].tolist() == [
+        "weight_in_kilograms:in_range",
+        "weight_in_kilograms:not_null",
+        "height_in_centimeters:in_range",
+    ]
+
+
+# Test for a missing column
+def test_validate_missing_column(test_df):
+    with pytest.raises(ValueError, match="Columns missing from the data"):
+        RosterValidator(roster_schema).validate(test_df.drop(columns="shoots_left"))
@@ -87,4 +87,57 @@ def test_write_csv_empty_dataframe(tmp_dir):
     file_name = "test_df.csv"
     
     with pytest.raises(ValueError, match="Dataframe must have records."):
-        write_csv(empty_df, tmp_dir, file_name)
\ No newline at end of file
+        write_csv(empty_df, tmp_dir, file_name)
+
+
+# Test that partitioned and compressed writes read back as the original dataframe
+@pytest.mark.parametrize("file_name", ["test_df.csv", "test_df.csv.gz", "test_df.csv.bz2", "test_df.csv.xz"])
+@pytest.mark.parametrize("chunksize", [None, 1, 2])
+def test_write_csv_partitioned_compressed(test_df, tmp_dir, file_name, chunksize):
+    write_csv(test_df, tmp_dir, file_name, keep_index=True, chunksize=chunksize, n_jobs=2)
+
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(tmp_dir, file_name), index_col=0), test_df)
+    assert os.listdir(tmp_dir) == [file_name]
+
+
+# Test that a partitioned write produces the same file as a single write
+def test_write_csv_partitioned_identical(test_df, tmp_dir):
+    write_csv(test_df, tmp_dir, "single.csv")
+    write_csv(test_df, tmp_dir, "partitioned.csv", chunksize=2, n_jobs=2)
+
+    with open(os.path.join(tmp_dir, "single.csv"), "rb") as single, \
+            open(os.path.join(tmp_dir, "partitioned.csv"), "rb") as partitioned:
+        assert single.read() == partitioned.read()
+
+
+# Test that a failed write leaves an existing file untouched and no temporary file
+def test_write_csv_atomic(test_df, tmp_dir, monkeypatch):
+    write_csv(test_df, tmp_dir, "test_df.csv")
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(pd.DataFrame, "to_csv", fail)
+    with pytest.raises(OSError):
+        write_csv(test_df.head(1), tmp_dir, "test_df.csv")
+
+    assert os.listdir(tmp_dir) == ["test_df.csv"]
+    assert len(pd.read_csv(os.path.join(tmp_dir, "test_df.csv"))) == 3
+
+
+# Test that the complete temporary file is flushed to disk before it is renamed into place
+@pytest.mark.parametrize("chunksize", [None, 2])
+def test_write_csv_fsync(test_df, tmp_dir, monkeypatch, chunksize):
+    events = []
+    fsync, replace = os.fsync, os.replace
+    monkeypatch.setattr(os, "fsync", lambda fd: events.append(("fsync", os.fstat(fd).st_size)) or fsync(fd))
+    monkeypatch.setattr(os, "replace", lambda *args: events.append(("replace", None)) or replace(*args))
+    write_csv(test_df, tmp_dir, "test_df.csv", chunksize=chunksize, n_jobs=1)
+
+    size = os.path.getsize(os.path.join(tmp_dir, "test_df.csv"))
+    assert events == [("fsync", size), ("replace", None)]
+
+
+# Test for correct error handling for a bad chunk size
+def test_write_csv_bad_chunksize(test_df, tmp_dir):
+    with pytest.raises(ValueError, match="Chunk size must be a positive integer."):
+        write_csv(test_df, tmp_dir, "test_df.csv", chunksize=0)